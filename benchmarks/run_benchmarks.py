@@ -0,0 +1,218 @@
+"""
+Benchmarks of the data pipeline on synthetic SDWPF-shaped data.
+
+Times and memory-profiles preprocessing, imputation flags, imputation, similarity computation, aggregation and the
+frontend data path at a configurable scale, writes the results as JSON and compares them to a
+saved baseline. Runs fully offline.
+
+Usage (from the project root):
+    poetry run python benchmarks/run_benchmarks.py --scale kddcup --output benchmarks/results.json
+    poetry run python benchmarks/run_benchmarks.py --scale kddcup --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+project_root = Path(__file__).parents[1]
+sys.path.append(str(project_root))
+
+from windfarm_forecast.feature_engineering import impute_power_output  # noqa: E402
+from windfarm_forecast.preprocessing import flag_impute_days, preprocess  # noqa: E402
+from windfarm_forecast.rollups import aggregate_across_turbines, aggregate_daily  # noqa: E402
+from windfarm_forecast.similarity import TurbineSimilarityIndex  # noqa: E402
+from windfarm_forecast.synthetic import generate_sdwpf  # noqa: E402
+
+# (n_turbines, n_days) of the benchmark scales
+SCALES = {
+    "smoke": (134, 14),
+    "kddcup": (134, 245),
+    "two_years": (134, 730),
+    "10x_turbines": (1340, 245),
+}
+
+
+def measure(func, repeat: int = 3) -> tuple[object, dict]:
+    """
+    Run func repeatedly and measure it.
+
+    The time is the best of repeat runs without tracing, the peak memory comes from one extra run
+    under tracemalloc (numpy and pandas report their buffers to it, the Arrow memory pool of the
+    parquet readers does not).
+
+    Returns:
+        Tuple (result of the last run, {"seconds", "peak_mb"})
+    """
+    seconds = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - start)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {"seconds": min(seconds), "peak_mb": peak / 2**20}
+
+
+def _predictions_frame(df_agg: pd.DataFrame) -> pd.DataFrame:
+    """Predictions file in the format read by the frontend, with noisy copies of the actuals as predictions."""
+    rng = np.random.default_rng(0)
+    actual = df_agg["Patv_imputed"].to_numpy() / 1000
+    split = int(len(actual) * 0.8)
+    return pd.DataFrame(
+        {
+            "actual": actual,
+            "pred_linear_regression": actual + rng.normal(0, 5, len(actual)),
+            "pred_xgboost": actual + rng.normal(0, 3, len(actual)),
+            "set": np.where(np.arange(len(actual)) < split, "train", "val"),
+        },
+        index=df_agg["timestamp"].to_numpy(),
+    )
+
+
+def run_benchmarks(n_turbines: int, n_days: int, repeat: int = 3, seed: int = 0) -> dict:
+    """
+    Benchmark the pipeline stages on synthetic data of the given size.
+
+    Args:
+        n_turbines: Number of turbines
+        n_days: Number of days
+        repeat: Timed runs per stage
+        seed: Seed of the synthetic data
+
+    Returns:
+        {"n_turbines", "n_days", "n_rows", "environment", "stages": {stage: {"seconds", "peak_mb"}}}
+    """
+    with open(project_root / "config.yaml", "r") as file:
+        config = yaml.safe_load(file)
+
+    stages = {}
+    df_raw, stages["generate"] = measure(lambda: generate_sdwpf(n_turbines, n_days, seed, base_date="2020-05-01"), 1)
+
+    df, stages["preprocess"] = measure(lambda: preprocess(df_raw, config)[0], repeat)
+    df, stages["flag_impute_days"] = measure(lambda: flag_impute_days(df), repeat)
+
+    similarity, stages["similarity"] = measure(
+        lambda: TurbineSimilarityIndex().update(df[["TurbID", "timestamp", "Patv"]]).to_frame(n_top=10), repeat
+    )
+    df, stages["impute_power_output"] = measure(lambda: impute_power_output(df, similarity), repeat)
+    df_agg, stages["aggregate_across_turbines"] = measure(lambda: aggregate_across_turbines(df), repeat)
+    _, stages["aggregate_daily"] = measure(lambda: aggregate_daily(df), repeat)
+
+    from windfarm_forecast.frontend import app
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        predictions_path = Path(tmp_dir) / "predictions.parquet"
+        _predictions_frame(df_agg).to_parquet(predictions_path)
+
+        def frontend():
+            # Uncached path of a rerun after the predictions file changed
+            app._read_predictions.clear()
+            data = app._read_predictions(str(predictions_path), predictions_path.stat().st_mtime)
+            metrics = app.MetricsIndex(data).metrics("val", data.index.min(), data.index.max())
+            figure = app.create_plot(data[data["set"] == "val"], "pred_xgboost")
+            return metrics, figure
+
+        _, stages["frontend"] = measure(frontend, repeat)
+
+    return {
+        "n_turbines": n_turbines,
+        "n_days": n_days,
+        "n_rows": len(df_raw),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+        },
+        "stages": stages,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = 1.5) -> pd.DataFrame:
+    """
+    Compare benchmark results to a baseline of the same scale.
+
+    Args:
+        results: Output of run_benchmarks
+        baseline: Output of run_benchmarks saved earlier
+        threshold: Ratio to the baseline above which a stage counts as a regression
+
+    Returns:
+        DataFrame indexed by stage with the time and memory ratios and a regression column
+    """
+    if (results["n_turbines"], results["n_days"]) != (baseline["n_turbines"], baseline["n_days"]):
+        raise ValueError("Results and baseline were run at different scales")
+
+    rows = []
+    for stage, current in results["stages"].items():
+        reference = baseline["stages"].get(stage)
+        if reference is None:
+            continue
+        time_ratio = current["seconds"] / max(reference["seconds"], 1e-9)
+        memory_ratio = current["peak_mb"] / max(reference["peak_mb"], 1e-9)
+        rows.append(
+            {
+                "stage": stage,
+                "seconds": current["seconds"],
+                "time_ratio": time_ratio,
+                "peak_mb": current["peak_mb"],
+                "memory_ratio": memory_ratio,
+                "regression": time_ratio > threshold or memory_ratio > threshold,
+            }
+        )
+
+    return pd.DataFrame(rows).set_index("stage")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=list(SCALES), default="smoke")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="compare to the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=1.5, help="ratio to the baseline counted as regression")
+    args = parser.parse_args(argv)
+
+    n_turbines, n_days = SCALES[args.scale]
+    results = run_benchmarks(n_turbines, n_days, repeat=args.repeat, seed=args.seed)
+    results["scale"] = args.scale
+
+    report = pd.DataFrame(results["stages"]).T
+    print(f"{args.scale}: {n_turbines} turbines x {n_days} days ({results['n_rows']:,} rows)")
+    print(report.round(3).to_string())
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as file:
+            comparison = compare(results, json.load(file), args.threshold)
+        print(comparison.round(3).to_string())
+        if comparison["regression"].any():
+            print(f"Regressions: {', '.join(comparison.index[comparison['regression']])}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
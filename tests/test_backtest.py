@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from windfarm_forecast.backtest import Fold, rolling_origin_folds, run_backtest, summarize
+
+
+@pytest.fixture
+def aggregated_data():
+    """Fixture providing 20 days of an aggregated series where power follows the wind power."""
+    rng = np.random.default_rng(0)
+    n = 20 * 144
+    df = pd.DataFrame({"timestamp": pd.date_range("2020-05-01", periods=n, freq="10min")})
+    df["Wspd"] = rng.gamma(2.0, 3.0, n)
+    df["Patv_imputed"] = 0.5 * df["Wspd"] ** 3 + rng.normal(0, 1, n)
+    return df
+
+
+def test_rolling_origin_folds(aggregated_data):
+    """Test expanding and sliding folds over whole days."""
+    expanding = rolling_origin_folds(aggregated_data["timestamp"], initial_train="10D", test_size="3D")
+    sliding = rolling_origin_folds(aggregated_data["timestamp"], "10D", "3D", step="2D", window="sliding")
+
+    assert expanding == [Fold(0, 1440, 1440, 1872), Fold(0, 1872, 1872, 2304), Fold(0, 2304, 2304, 2736)]
+    assert [fold.train_start for fold in sliding] == [0, 288, 576, 864]
+    assert all(fold.train_end - fold.train_start == 1440 for fold in sliding)
+    assert sliding[-1].test_end == 19 * 144
+
+
+def test_run_backtest(aggregated_data):
+    """Test per fold and per horizon errors with features generated once for all folds."""
+    folds = rolling_origin_folds(aggregated_data["timestamp"], initial_train="10D", test_size="3D")
+    results = run_backtest(
+        aggregated_data,
+        ["Wspd_cubed"],
+        "Patv_imputed",
+        folds,
+        feature_spec={"cubed": ["Wspd"]},
+        max_workers=2,
+    )
+
+    assert list(results.columns) == ["fold", "train_start", "test_start", "test_end", "horizon", "n", "mae", "rmse"]
+    assert len(results) == 3 * 3 and (results["n"] == 144).all()
+    assert results["test_start"].iloc[0] == pd.Timestamp("2020-05-11")
+    assert results["mae"].max() < 1.5
+
+    by_fold = summarize(results, by="fold")
+    assert by_fold["n"].tolist() == [432, 432, 432]
+    np.testing.assert_allclose(by_fold["mae"], results.groupby("fold")["mae"].mean())
+
+
+def test_run_backtest_recursive(aggregated_data):
+    """Test that models with lags of the target forecast the test periods recursively."""
+    folds = rolling_origin_folds(aggregated_data["timestamp"], initial_train="15D", test_size="2D")
+    results = run_backtest(
+        aggregated_data,
+        ["Wspd_cubed", "Patv_imputed_lag_1"],
+        "Patv_imputed",
+        folds,
+        feature_spec={"cubed": ["Wspd"], "lags": {"Patv_imputed": [1]}},
+        horizon_steps=6,
+        max_workers=2,
+    )
+
+    assert len(results) == len(folds) * 48
+    assert results["n"].min() == 6 and results["rmse"].notna().all()
+
+
+@pytest.mark.parametrize("features", [["Wspd_cubed"], ["Wspd_cubed", "Patv_imputed_lag_1"]])
+def test_run_backtest_linear_regression_with_missing_features(aggregated_data, features):
+    """Test that test rows with missing features are skipped instead of failing linear regression."""
+    aggregated_data.loc[[100, 2000, 2400], "Wspd"] = np.nan
+    folds = rolling_origin_folds(aggregated_data["timestamp"], initial_train="10D", test_size="3D")
+    results = run_backtest(
+        aggregated_data,
+        features,
+        "Patv_imputed",
+        folds,
+        model_name="linear_regression",
+        feature_spec={"cubed": ["Wspd"], "lags": {"Patv_imputed": [1]}},
+        max_workers=2,
+    )
+
+    n_per_fold = summarize(results, by="fold")["n"]
+    assert n_per_fold[1] < 432 and n_per_fold[0] == 432
+    assert results["mae"].notna().any()
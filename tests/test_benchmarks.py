@@ -0,0 +1,58 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+BENCHMARKS_PATH = Path(__file__).parents[1] / "benchmarks" / "run_benchmarks.py"
+
+
+@pytest.fixture
+def benchmarks():
+    """Fixture loading the benchmark script, which is not part of the package."""
+    spec = importlib.util.spec_from_file_location("run_benchmarks", BENCHMARKS_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_results(seconds: dict, peak_mb: float = 100.0, scale=(134, 14)) -> dict:
+    """Results in the format of run_benchmarks with the given seconds per stage."""
+    return {
+        "n_turbines": scale[0],
+        "n_days": scale[1],
+        "n_rows": scale[0] * scale[1] * 144,
+        "stages": {stage: {"seconds": value, "peak_mb": peak_mb} for stage, value in seconds.items()},
+    }
+
+
+def test_compare_flags_slower_stages(benchmarks):
+    """Test that only stages slower or larger than threshold times the baseline are regressions."""
+    baseline = make_results({"preprocess": 1.0, "similarity": 2.0, "frontend": 0.5})
+    results = make_results({"preprocess": 1.4, "similarity": 3.2, "frontend": 0.1, "new_stage": 5.0})
+    results["stages"]["frontend"]["peak_mb"] = 200.0
+
+    comparison = benchmarks.compare(results, baseline, threshold=1.5)
+
+    assert list(comparison.index) == ["preprocess", "similarity", "frontend"]
+    assert comparison["regression"].to_dict() == {"preprocess": False, "similarity": True, "frontend": True}
+    assert comparison.loc["similarity", "time_ratio"] == pytest.approx(1.6)
+
+
+def test_compare_rejects_other_scales(benchmarks):
+    """Test that results of different scales are not compared."""
+    with pytest.raises(ValueError):
+        benchmarks.compare(make_results({"preprocess": 1.0}), make_results({"preprocess": 1.0}, scale=(134, 245)))
+
+
+@pytest.mark.parametrize("seconds,exit_code", [(1.2, 0), (2.0, 1)])
+def test_main_exits_with_1_on_regressions(benchmarks, monkeypatch, tmp_path, capsys, seconds, exit_code):
+    """Test that main fails when a stage regressed against the baseline and writes the results."""
+    monkeypatch.setattr(benchmarks, "run_benchmarks", lambda *args, **kwargs: make_results({"preprocess": seconds}))
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(make_results({"preprocess": 1.0})))
+
+    argv = ["--scale", "smoke", "--baseline", str(baseline), "--output", str(tmp_path / "results.json")]
+    assert benchmarks.main(argv) == exit_code
+    assert ("Regressions: preprocess" in capsys.readouterr().out) == bool(exit_code)
+    assert json.loads((tmp_path / "results.json").read_text())["scale"] == "smoke"
@@ -0,0 +1,149 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from windfarm_forecast.cache import ArtifactCache, code_version
+from windfarm_forecast.preprocessing import preprocess
+
+
+@pytest.fixture
+def raw_file(tmp_path):
+    """Fixture writing a small raw input file."""
+    path = tmp_path / "raw.csv"
+    pd.DataFrame({"TurbID": [1, 2], "Patv": [1.0, 2.0]}).to_csv(path, index=False)
+    return path
+
+
+class Pipeline:
+    """Two chained stages counting their runs."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.runs = {"preprocess": 0, "features": 0}
+
+    def preprocess(self, out, raw_file):
+        self.runs["preprocess"] += 1
+        pd.read_csv(raw_file).assign(Patv=lambda df: df["Patv"] * 2).to_parquet(out)
+
+    def features(self, out, preprocessed, lags):
+        self.runs["features"] += 1
+        df = pd.read_parquet(preprocessed)
+        pd.DataFrame({f"Patv_lag_{lag}": df["Patv"].shift(lag) for lag in lags}).to_parquet(out)
+
+    def __call__(self, raw_file, config):
+        preprocessed = self.cache.run(
+            "preprocess",
+            lambda out: self.preprocess(out, raw_file),
+            inputs=[raw_file],
+            version="1",
+            config=config["preprocessing"],
+            suffix=".parquet",
+        )
+        return self.cache.run(
+            "features",
+            lambda out: self.features(out, preprocessed, config["features"]["lags"]),
+            inputs=[preprocessed],
+            version="1",
+            config=config["features"],
+            suffix=".parquet",
+        )
+
+
+def test_changing_features_config_only_reruns_features(tmp_path, raw_file):
+    """Test that a change of the features config re-runs the features stage but not the stages before it."""
+    pipeline = Pipeline(ArtifactCache(tmp_path / "cache"))
+    config = {"preprocessing": {"rules": ["Patv < 0"]}, "features": {"lags": [1]}}
+
+    first = pipeline(raw_file, config)
+    assert pipeline(raw_file, config) == first
+    assert pipeline.runs == {"preprocess": 1, "features": 1}
+
+    config["features"]["lags"] = [1, 2]
+    second = pipeline(raw_file, config)
+    assert second != first and pipeline.runs == {"preprocess": 1, "features": 2}
+    assert list(pd.read_parquet(second).columns) == ["Patv_lag_1", "Patv_lag_2"]
+
+    # A new cache instance on the same directory reuses the entries
+    pipeline = Pipeline(ArtifactCache(tmp_path / "cache"))
+    assert pipeline(raw_file, config) == second
+    assert pipeline.runs == {"preprocess": 0, "features": 0}
+    assert pipeline.cache.hits == 2
+
+
+def test_changed_input_content_invalidates(tmp_path, raw_file):
+    """Test that entries are keyed by the content of the inputs, not their modification time."""
+    pipeline = Pipeline(ArtifactCache(tmp_path / "cache"))
+    config = {"preprocessing": {}, "features": {"lags": [1]}}
+    pipeline(raw_file, config)
+
+    # Rewriting identical content is a hit, new content a miss of all stages
+    raw_file.write_text(raw_file.read_text())
+    pipeline(raw_file, config)
+    assert pipeline.runs == {"preprocess": 1, "features": 1}
+
+    raw_file.write_text(raw_file.read_text() + "3,3.0\n")
+    pipeline(raw_file, config)
+    assert pipeline.runs == {"preprocess": 2, "features": 2}
+
+
+def test_directory_outputs_and_failed_stages(tmp_path, raw_file):
+    """Test that directories can be cached and failed stages leave no entry or temporary files behind."""
+    cache = ArtifactCache(tmp_path / "cache")
+
+    def write_dataset(out):
+        (out / "Day=1").mkdir(parents=True)
+        (out / "Day=1" / "part-0.csv").write_text("a\n1\n")
+
+    output = cache.run("ingest", write_dataset, inputs=[raw_file], version="1")
+    assert (output / "Day=1" / "part-0.csv").exists()
+    assert len(cache.fingerprint(output)) == 64
+
+    def fail(out):
+        raise RuntimeError("stage failed")
+
+    with pytest.raises(RuntimeError):
+        cache.run("ingest", fail, inputs=[raw_file], version="2")
+    assert cache.run("ingest", write_dataset, inputs=[raw_file], version="1") == output
+    assert not any((tmp_path / "cache" / "tmp").iterdir())
+
+
+def test_eviction_by_age_and_size(tmp_path, raw_file):
+    """Test eviction of entries unused for longer than max_age, then least recently used beyond max_bytes."""
+    cache = ArtifactCache(tmp_path / "cache", max_age="1D", max_bytes=2500)
+
+    def write(size):
+        return lambda out: out.write_bytes(b"x" * size)
+
+    old = cache.run("stage", write(1000), inputs=[raw_file], version="old")
+    meta_path = old.with_name(old.name + ".meta.json")
+    two_days_ago = time.time() - 2 * 86400
+    os.utime(meta_path, (two_days_ago, two_days_ago))
+
+    first = cache.run("stage", write(1000), inputs=[raw_file], version="1")
+    assert not old.exists()
+
+    second = cache.run("stage", write(1000), inputs=[raw_file], version="2")
+    # Using the first entry again makes the second the least recently used one
+    time.sleep(0.01)
+    assert cache.run("stage", write(1000), inputs=[raw_file], version="1") == first
+    third = cache.run("stage", write(1000), inputs=[raw_file], version="3")
+    assert first.exists() and third.exists() and not second.exists()
+
+
+def test_output_larger_than_max_bytes_is_kept(tmp_path, raw_file):
+    """Test that an output larger than max_bytes survives its own run and evicts all other entries."""
+    cache = ArtifactCache(tmp_path / "cache", max_bytes=500)
+    small = cache.run("stage", lambda out: out.write_bytes(b"x" * 100), inputs=[raw_file], version="1")
+
+    large = cache.run("stage", lambda out: out.write_bytes(b"x" * 1000), inputs=[raw_file], version="2")
+    assert large.exists() and not small.exists()
+    assert cache.run("stage", lambda out: out.write_bytes(b"y"), inputs=[raw_file], version="2") == large
+    assert large.read_bytes() == b"x" * 1000
+
+
+def test_code_version_changes_with_source():
+    """Test that the code version is stable for the same source and differs between sources."""
+    assert code_version(preprocess) == code_version(preprocess)
+    assert code_version(preprocess) != code_version(ArtifactCache)
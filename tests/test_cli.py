@@ -0,0 +1,160 @@
+import json
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from windfarm_forecast.cli import DEFAULT_CONFIG, _feature_columns, build_parser, load_config, main
+from windfarm_forecast.predictions_archive import read_predictions
+from windfarm_forecast.synthetic import RATED_POWER, generate_sdwpf
+
+# Heavy dependencies only loaded by the commands that use them
+HEAVY_MODULES = ["mlflow", "plotly", "xgboost", "lightgbm", "streamlit"]
+IMPORT_BUDGET_SECONDS = 0.5
+
+
+def _imported_modules(code: str) -> dict:
+    """Run code in a fresh interpreter and return the import time and the heavy modules it loaded."""
+    script = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{code}\n"
+        "seconds = time.perf_counter() - start\n"
+        f"loaded = [name for name in {HEAVY_MODULES + ['pandas']} if name in sys.modules]\n"
+        "print(json.dumps({'seconds': seconds, 'loaded': loaded}))"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_cli_import_is_fast_and_light():
+    """Test that importing the CLI loads neither pandas nor the heavy dependencies."""
+    result = _imported_modules("import windfarm_forecast.cli")
+
+    assert result["loaded"] == []
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["windfarm_forecast.utils", "windfarm_forecast.feature_engineering", "windfarm_forecast.pipeline"],
+)
+def test_pipeline_modules_do_not_import_heavy_dependencies(module):
+    """Test that the pipeline modules do not load mlflow, plotly, the model libraries or streamlit."""
+    result = _imported_modules(f"import {module}")
+
+    assert [name for name in result["loaded"] if name != "pandas"] == []
+
+
+def test_help_does_not_load_the_pipeline():
+    """Test that --help lists the commands without running any of them."""
+    result = subprocess.run(
+        [sys.executable, "-m", "windfarm_forecast.cli", "--help"], capture_output=True, text=True, check=True
+    )
+    assert "serve-frontend" in result.stdout
+
+
+def test_end_to_end(tmp_path, capsys, monkeypatch):
+    """Test the commands from the raw csv to the predictions archive."""
+    # The artifact cache of the default config is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    raw = generate_sdwpf(n_turbines=6, n_days=4, seed=0)
+    raw.to_csv(tmp_path / "raw.csv", index=False)
+
+    assert main(["ingest", str(tmp_path / "raw.csv"), str(tmp_path / "ingested")]) == 0
+    assert main(["preprocess", str(tmp_path / "ingested"), str(tmp_path / "agg.parquet"), "--max-workers", "2"]) == 0
+    assert main(["features", str(tmp_path / "agg.parquet"), str(tmp_path / "features.parquet")]) == 0
+    features = ["Wspd_cubed", "Wdir_sin", "Wdir_cos", "Patv_imputed_lag_1"]
+    model_path = tmp_path / "models" / "linear_regression.joblib"
+    train_args = ["train", str(tmp_path / "features.parquet"), str(model_path), "--model", "linear_regression"]
+    assert main(train_args + ["--features"] + features) == 0
+    archive = tmp_path / "archive"
+    assert main(["predict", str(model_path), str(tmp_path / "features.parquet"), "--archive", str(archive)]) == 0
+
+    agg = pd.read_parquet(tmp_path / "agg.parquet")
+    predictions = read_predictions(archive, "val")
+    assert len(agg) == len(predictions) == 4 * 144
+    # The farm power is in MW, like the values shown in the frontend
+    assert agg["Patv_imputed"].max() <= 6 * RATED_POWER / 1000
+    np.testing.assert_array_equal(predictions["actual"], agg["Patv_imputed"])
+    assert list(predictions.columns) == ["actual", "set", "pred_linear_regression"]
+    assert np.isfinite(predictions["pred_linear_regression"].iloc[1:]).all()
+    assert "Appended" in capsys.readouterr().out
+
+
+def test_stages_reuse_the_artifact_cache(tmp_path, capsys):
+    """Test that changing the features config only re-runs the features stage."""
+    config = load_config(DEFAULT_CONFIG)
+    config["cache"]["root"] = str(tmp_path / "cache")
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+    generate_sdwpf(n_turbines=4, n_days=2, seed=0).to_csv(tmp_path / "raw.csv", index=False)
+
+    def run(command, *paths):
+        assert main(["--config", str(config_path), command] + [str(tmp_path / path) for path in paths]) == 0
+
+    def run_all(ingested):
+        # ingest never writes into an earlier ingestion
+        run("ingest", "raw.csv", ingested)
+        run("preprocess", ingested, "agg.parquet")
+        run("features", "agg.parquet", "features.parquet")
+        return capsys.readouterr().out
+
+    assert "Reused" not in run_all("ingested_1")
+    assert run_all("ingested_2").count("Reused") == 3
+
+    config["features"]["cubed"] = []
+    config_path.write_text(yaml.safe_dump(config))
+    output = run_all("ingested_3")
+    assert "Reused the cached preprocess output" in output
+    assert "Reused the cached features output" not in output
+    assert "Wspd_cubed" not in pd.read_parquet(tmp_path / "features.parquet").columns
+
+
+def test_ingest_refuses_populated_directory(tmp_path):
+    """Test that a cached dataset is not merged into a directory holding an earlier ingestion."""
+    config = load_config(DEFAULT_CONFIG)
+    config["cache"]["root"] = str(tmp_path / "cache")
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+    generate_sdwpf(n_turbines=3, n_days=2, seed=0).to_csv(tmp_path / "a.csv", index=False)
+    generate_sdwpf(n_turbines=2, n_days=3, seed=1).to_csv(tmp_path / "b.csv", index=False)
+
+    def ingest(csv, output_dir):
+        return main(["--config", str(config_path), "ingest", str(tmp_path / csv), str(tmp_path / output_dir)])
+
+    # b.csv is in the cache, then a.csv is ingested into the directory b.csv is restored to next
+    assert ingest("b.csv", "b") == 0
+    assert ingest("a.csv", "dataset") == 0
+    with pytest.raises(FileExistsError):
+        ingest("b.csv", "dataset")
+
+    assert len(pd.read_parquet(tmp_path / "dataset")) == 3 * 2 * 144
+    (tmp_path / "empty").mkdir()
+    assert ingest("b.csv", "empty") == 0
+    assert len(pd.read_parquet(tmp_path / "empty")) == 2 * 3 * 144
+
+
+def test_predict_requires_an_output():
+    """Test that predict without --output and --archive is rejected."""
+    with pytest.raises(SystemExit):
+        main(["predict", "model.joblib", "features.parquet"])
+
+
+def test_default_features_exclude_the_target():
+    """Test that the default features only use the target through its lags."""
+    args = build_parser().parse_args(["train", "features.parquet", "model.joblib"])
+    config = load_config(args.config)
+    config["features"]["rolling"]["Patv_imputed"] = {"windows": [6], "stats": ["mean"]}
+    config["features"]["cubed"].append("Patv_imputed")
+
+    feature_cols = _feature_columns(args, config)
+
+    assert "Patv_imputed_lag_1" in feature_cols
+    assert "Wspd_roll_mean_6" in feature_cols
+    assert [feature for feature in feature_cols if feature.startswith("Patv_imputed")] == [
+        feature for feature in feature_cols if feature.startswith("Patv_imputed_lag_")
+    ]
@@ -0,0 +1,107 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from windfarm_forecast.feature_engineering import FeatureGenerator, expand_feature_spec
+
+CONFIG_PATH = Path(__file__).parents[1] / "config.yaml"
+
+
+@pytest.fixture
+def aggregated_data():
+    """Fixture providing an aggregated time series with missing values."""
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = pd.DataFrame(
+        {
+            "Wspd": rng.gamma(2, 3, n),
+            "Wdir": rng.uniform(-180, 180, n),
+            "Etmp": rng.normal(20, 5, n),
+            "Patv_imputed": rng.uniform(0, 150, n),
+        },
+        index=pd.date_range("2020-05-01", periods=n, freq="10min"),
+    )
+    df.iloc[rng.choice(n, 20, replace=False), 0] = np.nan
+    return df
+
+
+def pandas_feature(df, feature):
+    """Reference implementation of a feature with shift/rolling."""
+    if "_lag_" in feature:
+        column, lag = feature.rsplit("_lag_", 1)
+        return df[column].shift(int(lag))
+    if "_roll_" in feature:
+        column, rest = feature.split("_roll_", 1)
+        stat, window = rest.split("_")
+        return getattr(df[column].rolling(int(window)), stat)()
+    if feature.endswith("_cubed"):
+        return df[feature.removesuffix("_cubed")] ** 3
+    if feature.endswith("_sin"):
+        return np.sin(np.deg2rad(df[feature.removesuffix("_sin")]))
+    return np.cos(np.deg2rad(df[feature.removesuffix("_cos")]))
+
+
+def test_config_features_match_pandas(aggregated_data):
+    """Test every feature of the config spec against shift/rolling in pandas."""
+    with open(CONFIG_PATH, "r") as file:
+        spec = yaml.safe_load(file)["features"]
+    features = FeatureGenerator(spec).transform(aggregated_data)
+
+    assert list(features.columns) == expand_feature_spec(spec)
+    assert (features.dtypes == np.float32).all()
+    for feature in features.columns:
+        expected = pandas_feature(aggregated_data, feature)
+        np.testing.assert_allclose(features[feature], expected, rtol=1e-5, atol=1e-3, err_msg=feature)
+
+
+def test_config_features_do_not_leak_target(aggregated_data):
+    """Test that no feature of the config spec at row t depends on the target at row t."""
+    with open(CONFIG_PATH, "r") as file:
+        spec = yaml.safe_load(file)["features"]
+    features = FeatureGenerator(spec).transform(aggregated_data)
+
+    t = len(aggregated_data) // 2
+    changed = aggregated_data.copy()
+    changed.iloc[t, changed.columns.get_loc("Patv_imputed")] += 1000.0
+    changed_features = FeatureGenerator(spec).transform(changed)
+
+    pd.testing.assert_series_equal(changed_features.iloc[t], features.iloc[t])
+
+
+def test_only_requested_features_computed(aggregated_data):
+    """Test that a model can request a subset of the features."""
+    generator = FeatureGenerator(["Wspd_roll_max_36", "Wspd_lag_1", "Wdir_sin"])
+    features = generator.transform(aggregated_data, ["Wspd_lag_1"])
+
+    assert list(features.columns) == ["Wspd_lag_1"]
+    with pytest.raises(ValueError):
+        generator.transform(aggregated_data, ["Etmp_lag_1"])
+
+
+def test_appended_rows_reuse_cache(aggregated_data):
+    """Test that features of appended rows computed from the cache equal a full computation."""
+    spec = {"lags": {"Wspd": [1, 144]}, "rolling": {"Wspd": {"windows": [6, 144], "stats": ["mean", "std", "min"]}}}
+    generator = FeatureGenerator(spec)
+    generator.transform(aggregated_data.iloc[:1500])
+    incremental = generator.transform(aggregated_data)
+
+    pd.testing.assert_frame_equal(incremental, FeatureGenerator(spec).transform(aggregated_data), atol=1e-4)
+
+
+def test_changed_history_invalidates_cache(aggregated_data):
+    """Test that the cache is not used when the history has changed."""
+    generator = FeatureGenerator(["Patv_imputed_roll_mean_6"])
+    generator.transform(aggregated_data)
+    changed = aggregated_data.assign(Patv_imputed=aggregated_data["Patv_imputed"] * 2)
+
+    expected = changed["Patv_imputed"].rolling(6).mean()
+    np.testing.assert_allclose(generator.transform(changed)["Patv_imputed_roll_mean_6"], expected, rtol=1e-5)
+
+
+def test_unknown_feature_name():
+    """Test that feature names without a known pattern are rejected."""
+    with pytest.raises(ValueError):
+        FeatureGenerator(["Wspd_median_6"])
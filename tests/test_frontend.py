@@ -1,10 +1,14 @@
+import os
 import sys
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from windfarm_forecast.frontend.app import main
+from windfarm_forecast.frontend import app
+from windfarm_forecast.frontend.app import downsample_minmax, main
+from windfarm_forecast.predictions_archive import read_predictions, write_predictions
 
 # Add the project root to the path
 project_root = Path(__file__).parents[2]
@@ -149,3 +153,117 @@ def test_plot_is_shown(monkeypatch, mock_data):
 
     # Assert that plotly_chart was called
     assert mock_st.plotly_chart_called, "No plot was displayed in the app"
+
+
+def test_downsample_keeps_peaks_within_budget():
+    """Test that long ranges are reduced to the point budget while keeping the extreme values."""
+    timestamps = pd.date_range(start="2020-05-01", periods=31 * 144, freq="10min")
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(
+        {"actual": rng.uniform(0, 100, len(timestamps)), "pred_xgboost": rng.uniform(0, 100, len(timestamps))},
+        index=timestamps,
+    )
+    data.iloc[1234, 0] = 500
+    data.iloc[2345, 1] = -50
+
+    result = downsample_minmax(data, ["actual", "pred_xgboost"], max_points=500)
+
+    assert len(result) <= 500
+    assert result.index.is_monotonic_increasing
+    assert result["actual"].max() == 500 and result["pred_xgboost"].min() == -50
+    assert result.index[0] == data.index[0] and result.index[-1] == data.index[-1]
+
+
+def test_downsample_returns_short_ranges_unchanged(mock_data):
+    """Test that a zoomed-in range below the budget is shown at full resolution."""
+    result = downsample_minmax(mock_data, ["actual", "pred_xgboost"], max_points=500)
+    pd.testing.assert_frame_equal(result, mock_data)
+
+
+def test_load_data_rereads_changed_file(monkeypatch, tmp_path, mock_data):
+    """Test that load_data is served from the cache until the predictions file changes."""
+    file_path = tmp_path / "predictions.parquet"
+    monkeypatch.setattr(app, "PREDICTIONS_PATH", file_path)
+
+    mock_data.to_parquet(file_path)
+    first = app.load_data()
+    assert app.load_data() is first
+
+    mock_data.iloc[:3].to_parquet(file_path)
+    os.utime(file_path, (file_path.stat().st_atime, file_path.stat().st_mtime + 10))
+    assert len(app.load_data()) == 3
+
+
+@pytest.mark.parametrize(
+    "start,end", [("2020-05-01 00:00", "2020-05-01 23:59"), ("2020-05-01 00:20", "2020-05-01 00:40")]
+)
+def test_metrics_index_matches_calculate_metrics(mock_data, start, end):
+    """Test that the prefix sum metrics of every model equal calculate_metrics on the filtered rows."""
+    metrics = app.MetricsIndex(mock_data).metrics("train", start, end)
+    display_data = mock_data[(mock_data.index >= start) & (mock_data.index <= end)]
+
+    assert list(metrics.index) == ["pred_linear_regression", "pred_xgboost"]
+    for model in metrics.index:
+        mae, rmse = app.calculate_metrics(display_data, model)
+        assert np.isclose(metrics.loc[model, "mae"], mae)
+        assert np.isclose(metrics.loc[model, "rmse"], rmse)
+
+
+def test_metrics_index_empty_range(mock_data):
+    """Test that a range without rows gives NaN metrics instead of failing."""
+    metrics = app.MetricsIndex(mock_data).metrics("train", "2021-01-01", "2021-01-02")
+    assert metrics.isna().all().all()
+
+
+def test_app_reads_selection_from_archive(monkeypatch, tmp_path, mock_data):
+    """The app reads the selected set, dates and model from the archive instead of predictions.parquet."""
+    write_predictions(tmp_path, mock_data)
+    monkeypatch.setattr(app, "PREDICTIONS_ARCHIVE", tmp_path)
+
+    def fail_load_data():
+        raise AssertionError("predictions.parquet should not be read")
+
+    monkeypatch.setattr(app, "load_data", fail_load_data)
+    reads = []
+    monkeypatch.setattr(
+        app, "read_predictions", lambda *args, **kwargs: reads.append(args) or read_predictions(*args, **kwargs)
+    )
+
+    mock_st = MockStreamlit(mock_data)
+    for name in ["set_page_config", "title", "selectbox", "date_input", "plotly_chart", "columns", "error", "info"]:
+        monkeypatch.setattr(f"streamlit.{name}", getattr(mock_st, name))
+
+    main()
+
+    assert mock_st.plotly_chart_called
+    assert reads[0][1] == "train"
+    assert reads[0][-1] == ["pred_linear_regression"]
+
+
+def test_archive_metrics_index_is_built_once_per_version(monkeypatch, tmp_path, mock_data):
+    """Test that reruns reuse the per-model MetricsIndex of the archive until new predictions are appended."""
+    write_predictions(tmp_path, mock_data, run_id="run1")
+    monkeypatch.setattr(app, "PREDICTIONS_ARCHIVE", tmp_path)
+    reads = []
+
+    def recording_read_predictions(*args, **kwargs):
+        reads.append((args, kwargs))
+        return read_predictions(*args, **kwargs)
+
+    monkeypatch.setattr(app, "read_predictions", recording_read_predictions)
+
+    mock_st = MockStreamlit(mock_data)
+    for name in ["set_page_config", "title", "selectbox", "date_input", "plotly_chart", "columns", "error", "info"]:
+        monkeypatch.setattr(f"streamlit.{name}", getattr(mock_st, name))
+
+    main()
+    main()
+    index_reads = [(args, kwargs) for args, kwargs in reads if "models" in kwargs]
+    assert index_reads == [
+        ((str(tmp_path), "train"), {"models": ["pred_linear_regression"]}),
+        ((str(tmp_path), "train"), {"models": ["pred_xgboost"]}),
+    ]
+
+    write_predictions(tmp_path, mock_data.assign(pred_xgboost=0.0), run_id="run2")
+    main()
+    assert len([args for args, kwargs in reads if "models" in kwargs]) == 4
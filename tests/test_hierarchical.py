@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import Ridge
+
+from windfarm_forecast.hierarchical import HierarchicalForecaster, cluster_turbines, reconcile
+
+
+@pytest.fixture
+def turbine_data():
+    """Fixture providing 4 turbines whose power scales with wind speed by a turbine specific factor."""
+    rng = np.random.default_rng(0)
+    timestamps = pd.date_range("2020-05-01", periods=300, freq="10min")
+    df = pd.DataFrame({"timestamp": np.repeat(timestamps, 4), "TurbID": np.tile([1, 2, 3, 4], 300)})
+    df["Wspd"] = rng.gamma(2.0, 3.0, len(df))
+    df["Etmp"] = rng.normal(20.0, 5.0, len(df))
+    df["Patv"] = df["TurbID"] * 10 * df["Wspd"] + rng.normal(0, 1, len(df))
+    df.loc[7, "Wspd"] = np.nan
+    return df
+
+
+def test_batched_ridge_matches_per_turbine_fits(turbine_data):
+    """Test that the batched solve gives the same models as fitting every turbine on its own."""
+    forecaster = HierarchicalForecaster(["Wspd", "Etmp"], "Patv", alpha=2.0).fit(turbine_data)
+    predictions = forecaster.predict_rows(turbine_data)
+
+    X = (turbine_data[["Wspd", "Etmp"]] - forecaster.mean_) / forecaster.scale_
+    for turbine in [1, 2, 3, 4]:
+        rows = (turbine_data["TurbID"] == turbine) & X.notna().all(axis=1)
+        expected = Ridge(alpha=2.0).fit(X[rows], turbine_data.loc[rows, "Patv"]).predict(X[rows])
+        np.testing.assert_allclose(predictions[rows.to_numpy()], expected)
+    assert np.isnan(predictions[7])
+
+
+def test_clusters_and_bottom_up_farm(turbine_data):
+    """Test that turbines of a cluster share one model and the farm forecast is the sum of the turbines."""
+    similar = pd.DataFrame(
+        {
+            "turbine_id": [1, 2, 3, 4],
+            "rank": [1, 1, 1, 1],
+            "similar_turbine_id": [2, 1, 4, 3],
+            "correlation": [0.9, 0.9, 0.8, 0.8],
+        }
+    )
+    clusters = cluster_turbines(similar, n_clusters=2)
+    assert clusters[1] == clusters[2] != clusters[3] == clusters[4]
+
+    forecaster = HierarchicalForecaster(["Wspd"], "Patv", clusters=clusters).fit(turbine_data)
+    turbines, farm = forecaster.predict(turbine_data)
+
+    assert len(forecaster.coef_) == 2
+    expected = turbines.groupby("timestamp")["prediction"].sum(min_count=1)
+    np.testing.assert_allclose(farm["prediction"], expected.to_numpy())
+
+
+def test_pool_models(turbine_data):
+    """Test that per-turbine tree models fitted across a process pool predict every turbine."""
+    forecaster = HierarchicalForecaster(
+        ["Wspd", "Etmp"], "Patv", model="lightgbm", params={"n_estimators": 20}, max_workers=2
+    ).fit(turbine_data)
+    turbines, farm = forecaster.predict(turbine_data)
+
+    assert len(forecaster.models_) == 4
+    assert turbines["prediction"].isna().sum() == 1
+    assert farm["prediction"].notna().all()
+
+
+def test_pool_models_skip_turbines_without_targets(turbine_data):
+    """Test that a turbine whose targets are all missing is left unfitted instead of failing the fit."""
+    turbine_data.loc[turbine_data["TurbID"] == 3, "Patv"] = np.nan
+    forecaster = HierarchicalForecaster(
+        ["Wspd", "Etmp"], "Patv", model="lightgbm", params={"n_estimators": 20}, max_workers=2
+    ).fit(turbine_data)
+    predictions = forecaster.predict_rows(turbine_data)
+
+    assert forecaster.models_[2] is None
+    assert np.isnan(predictions[turbine_data["TurbID"] == 3]).all()
+    assert np.isfinite(predictions[turbine_data["TurbID"] != 3]).sum() == 3 * 300 - 1
+
+
+def test_reconcile_to_farm_forecast():
+    """Test that turbines are scaled to the farm forecast in proportion to their positive forecasts."""
+    forecasts = np.array([[1.0, 0.0, -1.0], [3.0, 0.0, np.nan]])
+    turbines, farm = reconcile(forecasts, farm_forecast=np.array([8.0, 4.0, 5.0]))
+
+    np.testing.assert_allclose(turbines[:, 0], [2.0, 6.0])
+    np.testing.assert_allclose(turbines[:, 1], [2.0, 2.0])
+    assert turbines[0, 2] == 5.0 and np.isnan(turbines[1, 2])
@@ -2,7 +2,7 @@ import numpy as np
 import pandas as pd
 import pytest
 
-from windfarm_forecast.feature_engineering import impute_power_output
+from windfarm_forecast.feature_engineering import impute_power_output, to_turbine_matrix
 
 
 @pytest.fixture
@@ -93,6 +93,17 @@ def test_edge_cases(test_input, expected, similar_turbines_data):
     assert result.empty == expected
 
 
+def test_no_imputation_copies_patv(similar_turbines_data):
+    """Test that Patv_imputed is added as a copy of Patv when no row is flagged for imputation."""
+    df = pd.DataFrame(
+        {"timestamp": ["2021-01-01"] * 3, "TurbID": [1, 2, 3], "Patv": [100.0, np.nan, 300.0], "impute_day_patv": 0},
+        index=[5, 6, 7],
+    )
+    result = impute_power_output(df, similar_turbines_data)
+    assert list(result.index) == [0, 1, 2]
+    np.testing.assert_array_equal(result["Patv_imputed"], df["Patv"])
+
+
 def test_missing_similar_turbines(sample_data):
     """Test behavior when similar turbines data is missing."""
     empty_similar = pd.DataFrame(
@@ -122,3 +133,35 @@ def test_all_similar_turbines_need_imputation(similar_turbines_data):
 
     result_df = impute_power_output(df, similar_turbines_data)
     assert result_df["Patv_imputed"].isna().all()
+
+
+def test_n_similar_limits_neighbours_per_turbine(sample_data, similar_turbines_data):
+    """Test that only the n_similar best ranked turbines of each turbine are averaged."""
+    result_df = impute_power_output(sample_data, similar_turbines_data, n_similar=1)
+
+    # Turbine 3 and turbine 2 both use only turbine 1 (rank 1)
+    mask = sample_data["impute_day_patv"] == 1
+    expected = [100.0, 150.0]
+    assert np.allclose(result_df.loc[mask, "Patv_imputed"], expected)
+
+
+def test_duplicate_entries_raise(similar_turbines_data):
+    """Test that duplicate (timestamp, TurbID) rows are rejected like in a pivot."""
+    df = pd.DataFrame(
+        {
+            "timestamp": ["2021-01-01"] * 2,
+            "TurbID": [3, 3],
+            "Patv": [np.nan, np.nan],
+            "impute_day_patv": [1, 1],
+        }
+    )
+    with pytest.raises(ValueError):
+        impute_power_output(df, similar_turbines_data)
+
+
+def test_empty_turbine_matrix():
+    """Test that an empty frame gives an empty matrix instead of failing the duplicate check."""
+    df = pd.DataFrame({"timestamp": [], "TurbID": pd.Series([], dtype="int64"), "Patv": []})
+    matrix, turbine_ids, timestamps, _, _ = to_turbine_matrix(df)
+    assert matrix.shape == (0, 0)
+    assert len(turbine_ids) == len(timestamps) == 0
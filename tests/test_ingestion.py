@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from windfarm_forecast.ingestion import ingest_csv_to_parquet, load_ingested
+
+
+@pytest.fixture
+def raw_csv(tmp_path):
+    """Fixture writing a small csv in the raw SDWPF format and returning its path."""
+    times = [f"{hour:02d}:{minute:02d}" for hour in range(24) for minute in range(0, 60, 10)]
+    df = pd.DataFrame(
+        [(turbine, day, time) for day in [1, 2] for time in times for turbine in [1, 2]],
+        columns=["TurbID", "Day", "Tmstamp"],
+    )
+    for col in ["Wspd", "Wdir", "Etmp", "Itmp", "Ndir", "Pab1", "Pab2", "Pab3", "Prtv", "Patv"]:
+        df[col] = np.arange(len(df), dtype=float) / 10
+    df.loc[3, "Patv"] = np.nan
+
+    path = tmp_path / "raw.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_roundtrip_with_compact_dtypes(raw_csv, tmp_path):
+    """Test that all rows are ingested with compact dtypes across several chunks."""
+    n_rows = ingest_csv_to_parquet(raw_csv, tmp_path / "ingested", chunksize=100)
+    df = load_ingested(tmp_path / "ingested")
+
+    assert n_rows == len(df) == 2 * 2 * 144
+    assert df["TurbID"].dtype == "int16" and df["Day"].dtype == "int16"
+    assert df["Patv"].dtype == "float32"
+    assert df["Patv"].isna().sum() == 1
+
+
+def test_timestamps_match_notebook_parsing(raw_csv, tmp_path):
+    """Test that timestamps equal the string based parsing of the preprocessing notebook."""
+    ingest_csv_to_parquet(raw_csv, tmp_path / "ingested", chunksize=100)
+    df = load_ingested(tmp_path / "ingested")
+
+    expected = (
+        pd.to_datetime("2020-05-01")
+        + pd.to_timedelta(df["Day"].astype(int) - 1, unit="D")
+        + pd.to_timedelta(df["time"].astype(str) + ":00")
+    )
+    pd.testing.assert_series_equal(df["timestamp"], expected, check_names=False)
+
+
+def test_load_selected_days_and_columns(raw_csv, tmp_path):
+    """Test that single days and columns can be loaded from the partitioned dataset."""
+    ingest_csv_to_parquet(raw_csv, tmp_path / "ingested")
+    df = load_ingested(tmp_path / "ingested", days=[2], columns=["TurbID", "Patv"])
+
+    assert list(df.columns) == ["TurbID", "Day", "Patv"]
+    assert (df["Day"] == 2).all()
+
+
+def test_refuses_non_empty_output(raw_csv, tmp_path):
+    """Test that an earlier ingestion is not silently appended to."""
+    ingest_csv_to_parquet(raw_csv, tmp_path / "ingested")
+    with pytest.raises(FileExistsError):
+        ingest_csv_to_parquet(raw_csv, tmp_path / "ingested")
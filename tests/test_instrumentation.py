@@ -0,0 +1,83 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from windfarm_forecast import instrumentation
+from windfarm_forecast.instrumentation import instrument, stage
+from windfarm_forecast.rollups import aggregate_daily
+
+
+@pytest.fixture
+def enabled():
+    """Fixture enabling the instrumentation with memory tracing for one test."""
+    instrumentation.reset()
+    instrumentation.enable(trace_memory=True)
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+@instrument()
+def double_rows(df):
+    return pd.concat([df, df])
+
+
+def test_disabled_records_nothing():
+    """Test that nothing is recorded while disabled and the decorated function still works."""
+    instrumentation.reset()
+    with stage("noop") as record:
+        record.rows_out = 1
+
+    assert len(double_rows(pd.DataFrame({"a": [1, 2]}))) == 4
+    assert instrumentation.records() == []
+
+
+def test_nested_stages(enabled):
+    """Test that nested stages record their parent, rows and an allocation peak covering the inner stage."""
+    with stage("outer", rows_in=3) as outer:
+        double_rows(pd.DataFrame({"a": range(3)}))
+        with stage("inner"):
+            buffer = np.ones(2**20)  # 8 MB
+            del buffer
+        outer.rows_out = 6
+
+    inner, outer = instrumentation.records()[1:]
+    assert instrumentation.records()[0]["name"] == "double_rows"
+    assert instrumentation.records()[0]["rows_in"] == 3 and instrumentation.records()[0]["rows_out"] == 6
+    assert inner["parent"] == "outer" and outer["parent"] is None
+    assert inner["tracemalloc_peak_mb"] >= 8 and outer["tracemalloc_peak_mb"] >= 8
+    assert outer["wall_seconds"] >= inner["wall_seconds"] > 0
+    assert outer["rows_in"] == 3 and outer["rows_out"] == 6
+
+
+def test_wrapped_pipeline_function_and_report(enabled, tmp_path):
+    """Test that the wrapped pipeline functions appear in the JSON report."""
+    df = pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2020-05-01", periods=4, freq="12h"),
+            "TurbID": 1,
+            "Day": [1, 1, 2, 2],
+            "Wspd": 1.0,
+            "Wdir": 0.0,
+            "Etmp": 20.0,
+            "Patv": 1.0,
+            "Patv_imputed": 1.0,
+            "maintenance_day": 0,
+            "turbine_stopped": 0,
+            "turbine_at_rest": 0,
+            "impute_day_patv": 0,
+            "Itmp": 0.0,
+            "Ndir": 0.0,
+        }
+    )
+    aggregate_daily(df)
+    aggregate_daily(df)
+    instrumentation.write_report(tmp_path / "report.json")
+
+    with open(tmp_path / "report.json") as file:
+        report = json.load(file)
+    assert report["summary"]["aggregate_daily"]["calls"] == 2
+    assert report["summary"]["RollupCube.update"]["calls"] == 2
+    assert [r["rows_out"] for r in report["stages"] if r["name"] == "aggregate_daily"] == [2, 2]
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+from scipy.stats import zscore
+
+from windfarm_forecast.outliers import ExtremeValueHandler
+
+CONFIG_PATH = Path(__file__).parents[1] / "config.yaml"
+FEATURES = ["Etmp", "Wspd", "Wdir", "Itmp"]
+
+
+@pytest.fixture
+def datasets():
+    """Fixture providing training and validation data with extreme values."""
+    rng = np.random.default_rng(0)
+
+    def make(n):
+        df = pd.DataFrame({feature: rng.normal(20.0, 5.0, n) for feature in FEATURES})
+        df.loc[rng.choice(n, 10, replace=False), FEATURES] = 200.0
+        df.loc[rng.choice(n, 10, replace=False), "Wspd"] = np.nan
+        return df
+
+    return make(2000), make(500)
+
+
+def handle_extreme_values(df_train, df_validation, features_to_check, replacement_strategy="none"):
+    """handle_extreme_values of notebook 02 (without the Etmp limits) as reference, with one std for both sets."""
+    for feature in features_to_check:
+        replacement_value = None if replacement_strategy == "none" else df_train[feature].median()
+        train_z_scores = zscore(df_train[feature], nan_policy="omit")
+        train_mean = df_train[feature].mean()
+        train_std = df_train[feature].std(ddof=0)
+        df_train.loc[abs(train_z_scores) > 3, feature] = replacement_value
+        val_z_scores = (df_validation[feature] - train_mean) / train_std
+        df_validation.loc[abs(val_z_scores) > 3, feature] = replacement_value
+
+
+@pytest.mark.parametrize("replacement_strategy", ["none", "median"])
+def test_matches_notebook(datasets, replacement_strategy):
+    """Test that fit/transform gives the same result as the notebook function."""
+    df_train, df_validation = datasets
+    handler = ExtremeValueHandler(FEATURES, replacement_strategy=replacement_strategy, clip_upper={}, null_below={})
+    train = handler.fit_transform(df_train)
+    validation = handler.transform(df_validation)
+
+    handle_extreme_values(df_train, df_validation, FEATURES, replacement_strategy)
+    pd.testing.assert_frame_equal(train, df_train)
+    pd.testing.assert_frame_equal(validation, df_validation)
+
+
+def test_etmp_limits_and_persistence(datasets, tmp_path):
+    """Test the Etmp limits of the config and that a saved handler transforms new data without the training set."""
+    with open(CONFIG_PATH, "r") as file:
+        config = yaml.safe_load(file)
+    df_train, _ = datasets
+    handler = ExtremeValueHandler(**config["outliers"]).fit(df_train)
+    handler.save(tmp_path / "outliers.json")
+
+    new_data = pd.DataFrame({feature: np.float32(20.0) for feature in FEATURES}, index=range(3))
+    # Etmp of 55 is not extreme with n_std=30, so only the fixed limits apply
+    loaded = ExtremeValueHandler.load(tmp_path / "outliers.json")
+    loaded.n_std = 30
+    new_data["Etmp"] = np.array([55.0, 70.0, -60.0], dtype=np.float32)
+    result = loaded.transform(new_data)
+
+    np.testing.assert_array_equal(result["Etmp"], [55.0, 60.0, np.nan])
+    assert result["Etmp"].dtype == np.float32
+    assert loaded.stats_ == handler.stats_
+
+
+def test_not_fitted():
+    """Test that transforming with an unfitted handler raises."""
+    with pytest.raises(ValueError):
+        ExtremeValueHandler().transform(pd.DataFrame({feature: [1.0] for feature in FEATURES}))
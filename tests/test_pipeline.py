@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from windfarm_forecast.ingestion import ingest_csv_to_parquet, load_ingested
+from windfarm_forecast.pipeline import list_days, process_frame, run_partitioned
+from windfarm_forecast.preprocessing import flag_impute_days, preprocess
+from windfarm_forecast.synthetic import generate_sdwpf
+
+CONFIG_PATH = Path(__file__).parents[1] / "config.yaml"
+
+
+@pytest.fixture
+def config():
+    """Fixture providing the project config."""
+    with open(CONFIG_PATH, "r") as file:
+        return yaml.safe_load(file)
+
+
+@pytest.fixture
+def raw_data():
+    """Fixture providing synthetic SCADA data of turbines with similar output and two stopped turbine days."""
+    df = generate_sdwpf(n_turbines=20, n_days=5, seed=0, outage_rate=0.0)
+    rng = np.random.default_rng(0)
+    farm_power = df.groupby(["Day", "Tmstamp"], observed=True)["Patv"].transform("mean")
+    df["Patv"] = (farm_power * rng.uniform(0.98, 1.02, len(df))).astype(np.float32)
+    for turbine, day in [(3, 2), (7, 4)]:
+        stopped = (df["TurbID"] == turbine) & (df["Day"] == day)
+        df.loc[stopped, "Patv"] = 0.0
+        df.loc[stopped, "Wspd"] = 8.0
+    return df
+
+
+@pytest.fixture
+def dataset_dir(raw_data, tmp_path):
+    """Fixture ingesting raw_data into a Parquet dataset partitioned by Day."""
+    raw_data.to_csv(tmp_path / "raw.csv", index=False)
+    ingest_csv_to_parquet(tmp_path / "raw.csv", tmp_path / "ingested", chunksize=5000)
+    return tmp_path / "ingested"
+
+
+def test_flag_impute_days_matches_notebook(raw_data, config):
+    """Test that the flags equal the merge based computation of the preprocessing notebook."""
+    df, _ = preprocess(raw_data, config)
+    result = flag_impute_days(df)
+
+    plot_data = df.groupby(["Day", "TurbID"])["Patv"].sum().reset_index()
+    daily_stats = plot_data.groupby("Day")["Patv"].agg(["mean", "std"]).reset_index()
+    daily_stats["lower_bound"] = daily_stats["mean"] - 3 * daily_stats["std"]
+    daily_data = plot_data.merge(daily_stats, on="Day")
+    daily_data["impute_day_patv"] = 0
+    daily_data.loc[(daily_data["Patv"] == 0) & (daily_data["lower_bound"] > 0), "impute_day_patv"] = 1
+    expected = df.merge(daily_data[["Day", "TurbID", "impute_day_patv"]], on=["Day", "TurbID"], how="left")
+
+    np.testing.assert_array_equal(result["impute_day_patv"], expected["impute_day_patv"])
+    flagged = result.loc[result["impute_day_patv"] == 1, ["TurbID", "Day"]].drop_duplicates()
+    assert sorted(map(tuple, flagged.to_numpy())) == [(3, 2), (7, 4)]
+
+
+def test_partitioned_matches_in_memory(dataset_dir, config, tmp_path):
+    """Test that the day partitioned execution reproduces the in-memory pipeline exactly."""
+    df, df_agg = process_frame(load_ingested(dataset_dir), config)
+
+    result = run_partitioned(dataset_dir, config, output_dir=tmp_path / "output", max_workers=2, max_in_flight=2)
+
+    pd.testing.assert_frame_equal(result, df_agg, check_exact=True)
+    written = load_ingested(tmp_path / "output")
+    pd.testing.assert_frame_equal(written[df.columns], df, check_exact=True)
+    assert list_days(tmp_path / "output") == [1, 2, 3, 4, 5]
+    # The stopped turbine days were imputed
+    assert (df.loc[df["impute_day_patv"] == 1, "Patv_imputed"] > 0).all()
+
+
+def test_partitioned_with_given_similar_turbines(dataset_dir, config):
+    """Test that a subset of days can be processed with similar turbines computed beforehand."""
+    similar = pd.DataFrame(
+        {"turbine_id": np.arange(1, 21), "rank": 1, "similar_turbine_id": np.r_[2:21, 1], "correlation": 0.9}
+    )
+    _, df_agg = process_frame(load_ingested(dataset_dir, days=[2, 3]), config, similar_turbines_df=similar)
+
+    result = run_partitioned(dataset_dir, config, similar_turbines_df=similar, days=[3, 2], max_workers=2)
+
+    pd.testing.assert_frame_equal(result, df_agg, check_exact=True)
+
+
+def test_partitioned_without_days_raises(tmp_path, config):
+    """Test that a dataset without day partitions is rejected."""
+    with pytest.raises(ValueError, match="No days"):
+        run_partitioned(tmp_path, config)
+
+
+def test_unknown_impute_method_raises_before_processing(dataset_dir, config):
+    """Test that an unsupported imputation method is rejected in the parent, not inside a worker."""
+    config["preprocessing"]["impute_power_when_turbine_stopped"]["method"] = "linear_interpolation"
+
+    with pytest.raises(ValueError, match="most_similar_turbine"):
+        run_partitioned(dataset_dir, config)
+    with pytest.raises(ValueError, match="linear_interpolation"):
+        process_frame(pd.DataFrame(), config)
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from windfarm_forecast.predictions_archive import (
+    archive_models,
+    archive_time_range,
+    archive_version,
+    read_predictions,
+    write_predictions,
+)
+
+
+@pytest.fixture
+def predictions():
+    timestamps = pd.date_range("2020-05-01 00:10", periods=144 * 60, freq="10min")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "actual": rng.normal(size=len(timestamps)),
+            "set": np.where(timestamps < pd.Timestamp("2020-06-15"), "train", "val"),
+            "pred_linear_regression": rng.normal(size=len(timestamps)),
+            "pred_xgboost": rng.normal(size=len(timestamps)),
+        },
+        index=timestamps,
+    )
+
+
+def test_write_partitions_by_set_and_month(tmp_path, predictions):
+    """Test that files are written per set and month with row group statistics of the timestamp."""
+    paths = write_predictions(tmp_path, predictions, run_id="run1")
+
+    assert sorted(str(path.relative_to(tmp_path)) for path in paths) == [
+        "set=train/month=2020-05/run1.parquet",
+        "set=train/month=2020-06/run1.parquet",
+        "set=val/month=2020-06/run1.parquet",
+    ]
+    metadata = pq.ParquetFile(paths[0]).metadata
+    assert metadata.num_row_groups > 1
+    assert metadata.row_group(0).column(0).statistics.has_min_max
+
+
+def test_read_matches_filtered_frame(tmp_path, predictions):
+    """Test that a pushed down read equals filtering the full frame by set, date range and model."""
+    write_predictions(tmp_path, predictions, run_id="run1")
+    start, end = pd.Timestamp("2020-05-30"), pd.Timestamp("2020-06-02 23:59")
+
+    result = read_predictions(tmp_path, "train", start, end, ["pred_xgboost"])
+
+    mask = (predictions["set"] == "train") & (predictions.index >= start) & (predictions.index <= end)
+    expected = predictions.loc[mask, ["actual", "set", "pred_xgboost"]]
+    pd.testing.assert_frame_equal(result, expected, check_names=False, check_freq=False)
+
+
+def test_appended_runs_add_files_and_latest_run_wins(tmp_path, predictions):
+    """Test that a new run only adds files and its predictions replace the ones of earlier runs."""
+    write_predictions(tmp_path, predictions, run_id="run1")
+    before = {path: path.stat().st_mtime_ns for path in tmp_path.rglob("*.parquet")}
+    version = archive_version(tmp_path)
+
+    rerun = predictions[["actual", "set"]].iloc[:1000].assign(pred_xgboost=1.0, pred_lightgbm=2.0)
+    write_predictions(tmp_path, rerun, run_id="run2")
+
+    assert all(path.stat().st_mtime_ns == mtime for path, mtime in before.items())
+    assert archive_version(tmp_path) != version
+    assert archive_models(tmp_path) == ["pred_lightgbm", "pred_linear_regression", "pred_xgboost"]
+    assert archive_models(tmp_path, "val") == ["pred_linear_regression", "pred_xgboost"]
+
+    result = read_predictions(tmp_path, "train")
+    assert len(result) == (predictions["set"] == "train").sum()
+    assert (result["pred_xgboost"].iloc[:1000] == 1.0).all()
+    np.testing.assert_array_equal(
+        result["pred_xgboost"].iloc[1000:], predictions["pred_xgboost"].iloc[1000 : len(result)]
+    )
+    assert result["pred_lightgbm"].iloc[1000:].isna().all()
+
+    with pytest.raises(FileExistsError):
+        write_predictions(tmp_path, rerun, run_id="run2")
+
+
+def test_time_range_from_statistics(tmp_path, predictions):
+    """Test that the time range of a set is read from the statistics and missing sets are handled."""
+    write_predictions(tmp_path, predictions)
+
+    assert archive_time_range(tmp_path, "val") == (pd.Timestamp("2020-06-15"), predictions.index[-1])
+    assert archive_time_range(tmp_path, "test") is None
+    assert read_predictions(tmp_path, "test", models=["pred_xgboost"]).empty
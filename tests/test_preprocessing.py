@@ -0,0 +1,106 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from windfarm_forecast.preprocessing import apply_rules, compile_rules, parse_condition, preprocess
+
+CONFIG_PATH = Path(__file__).parents[1] / "config.yaml"
+
+
+@pytest.fixture
+def config():
+    """Fixture providing the project config."""
+    with open(CONFIG_PATH, "r") as file:
+        return yaml.safe_load(file)
+
+
+@pytest.fixture
+def raw_data():
+    """Fixture providing raw SCADA rows hitting every data quality rule."""
+    rng = np.random.default_rng(0)
+    n = 1000
+    df = pd.DataFrame(
+        {
+            "TurbID": np.tile([1, 2, 3, 4], n // 4),
+            "Day": np.repeat(np.arange(60, 70), n // 10),
+            "Wspd": rng.uniform(0, 10, n),
+            "Wdir": rng.uniform(-200, 200, n),
+            "Ndir": rng.uniform(-800, 800, n),
+            "Pab1": rng.uniform(0, 100, n),
+            "Pab2": rng.uniform(0, 92, n),
+            "Pab3": rng.uniform(0, 92, n),
+            "Patv": rng.uniform(-50, 1500, n),
+        }
+    )
+    df.loc[::50, "Patv"] = np.nan
+    return df
+
+
+def notebook_preprocessing(df):
+    """Reference implementation: the mask cells of notebook 01, one pass per rule."""
+    df = df.copy()
+    df.loc[df["Patv"] < 0, "Patv"] = 0
+    df["maintenance_day"] = 0
+    df.loc[df["Day"] == 66, "maintenance_day"] = 1
+    turbine_stopped_mask = (df["Patv"] <= 0) & (df["Wspd"] > 2.5)
+    df["turbine_stopped"] = 0
+    df.loc[turbine_stopped_mask, "turbine_stopped"] = 1
+    df.loc[df["turbine_stopped"] == 1, "Patv"] = None
+    pab_mask = (df["Pab1"] > 89) | (df["Pab2"] > 89) | (df["Pab3"] > 89)
+    df.loc[pab_mask, "Patv"] = None
+    df["turbine_at_rest"] = 0
+    df.loc[pab_mask, "turbine_at_rest"] = 1
+    df.loc[(df["Ndir"] > 720) | (df["Ndir"] < -720), "Patv"] = None
+    df.loc[(df["Wdir"] > 180) | (df["Wdir"] < -180), "Patv"] = None
+    return df
+
+
+def test_matches_notebook_preprocessing(raw_data, config):
+    """Test that the configured rules reproduce the preprocessing of notebook 01."""
+    result, _ = preprocess(raw_data, config)
+    expected = notebook_preprocessing(raw_data)
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_report_counts_hits(raw_data, config):
+    """Test that the report has one row per rule with the number of affected rows."""
+    _, report = preprocess(raw_data, config)
+
+    assert list(report["rule"]) == [rule["name"] for rule in config["preprocessing"]["rules"]]
+    assert report.set_index("rule").loc["negative_patv", "hits"] == (raw_data["Patv"] < 0).sum()
+    assert report.set_index("rule").loc["maintenance_day", "hits"] == (raw_data["Day"] == 66).sum()
+    assert (report["seconds"] >= 0).all()
+
+
+def test_input_not_modified(raw_data, config):
+    """Test that the input DataFrame is left untouched."""
+    original = raw_data.copy()
+    preprocess(raw_data, config)
+    pd.testing.assert_frame_equal(raw_data, original)
+
+
+@pytest.mark.parametrize("condition", ["Wspd >", "Wspd ~ 2", "Wspd > high"])
+def test_invalid_condition(condition):
+    """Test that malformed conditions are rejected."""
+    with pytest.raises(ValueError):
+        parse_condition(condition)
+
+
+def test_set_target_requires_value():
+    """Test that a set_target rule without a value is rejected."""
+    with pytest.raises(ValueError):
+        compile_rules([{"name": "clip", "conditions": ["Patv < 0"], "action": "set_target"}])
+
+
+def test_float32_target_keeps_dtype():
+    """Test that a float32 target (as written by the ingestion) is not upcast."""
+    df = pd.DataFrame({"Patv": np.array([-1.0, 2.0], dtype="float32")})
+    rules = compile_rules([{"name": "clip", "conditions": ["Patv < 0"], "action": "set_target", "value": 0}])
+    result, _ = apply_rules(df, rules)
+
+    assert result["Patv"].dtype == "float32"
+    assert result["Patv"].tolist() == [0.0, 2.0]
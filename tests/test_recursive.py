@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from windfarm_forecast.recursive import RecursiveForecaster
+
+FEATURES = ["Wspd_cubed", "Patv_imputed_lag_1", "Patv_imputed_lag_3"]
+
+
+@pytest.fixture
+def aggregated_data():
+    """Fixture providing an aggregated series where power depends on wind power and its own lags."""
+    rng = np.random.default_rng(0)
+    n = 600
+    df = pd.DataFrame({"timestamp": pd.date_range("2020-05-01", periods=n, freq="10min")})
+    df["Wspd_cubed"] = rng.gamma(2.0, 3.0, n) ** 3 / 100
+    patv = np.zeros(n)
+    for t in range(3, n):
+        patv[t] = 0.5 * df["Wspd_cubed"].iloc[t] + 0.3 * patv[t - 1] + 0.1 * patv[t - 3] + rng.normal(0, 0.1)
+    df["Patv_imputed"] = patv
+    df["Patv_imputed_lag_1"] = df["Patv_imputed"].shift(1)
+    df["Patv_imputed_lag_3"] = df["Patv_imputed"].shift(3)
+    return df
+
+
+@pytest.fixture
+def model(aggregated_data):
+    """Fixture providing a one-step linear model fitted on a DataFrame."""
+    train = aggregated_data.dropna()
+    return LinearRegression().fit(train[FEATURES], train["Patv_imputed"])
+
+
+def naive_forecast(model, df, origin, horizon):
+    """Origin by origin, step by step reference implementation."""
+    history = list(df["Patv_imputed"].iloc[:origin])
+    forecasts = []
+    for step in range(horizon):
+        row = pd.DataFrame(
+            {"Wspd_cubed": [df["Wspd_cubed"].iloc[origin + step]], "Patv_imputed_lag_1": [history[-1]]}
+            | {"Patv_imputed_lag_3": [history[-3]]}
+        )
+        forecasts.append(model.predict(row[FEATURES])[0])
+        history.append(forecasts[-1])
+    return np.array(forecasts)
+
+
+def test_matches_naive_loop(aggregated_data, model):
+    """Test that the lockstep forecasts equal the origin-by-origin recursion."""
+    forecaster = RecursiveForecaster(model, FEATURES, horizon=12)
+    origins = np.array([3, 100, 250, 588])
+    forecasts = forecaster.forecast(aggregated_data, origins)
+
+    assert forecasts.shape == (4, 12)
+    for origin, forecast in zip(origins, forecasts):
+        np.testing.assert_allclose(forecast, naive_forecast(model, aggregated_data, origin, 12), rtol=1e-4)
+
+
+def test_evaluate_per_horizon(aggregated_data, model):
+    """Test the per-horizon errors over all origins, skipping origins spanning a gap."""
+    data = aggregated_data.drop(index=[300]).reset_index(drop=True)
+    forecaster = RecursiveForecaster(model, FEATURES, horizon=6)
+    origins = forecaster.default_origins(data, stride=2)
+    errors = forecaster.evaluate(data, origins)
+
+    assert not np.isin(np.arange(296, 303), origins).any()
+    assert errors["horizon"].tolist() == [1, 2, 3, 4, 5, 6]
+    assert (errors["n_origins"] == len(origins)).all()
+    # The first step only uses observed lags, later steps accumulate forecast errors
+    assert errors["mae"].iloc[0] < 0.2
+    assert errors["mae"].iloc[-1] >= errors["mae"].iloc[0]
+
+
+def test_rejects_non_lag_target_features(model):
+    """Test that features of the current target cannot be forecast recursively."""
+    with pytest.raises(ValueError):
+        RecursiveForecaster(model, ["Wspd_cubed", "Patv_imputed_roll_mean_6"])
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from windfarm_forecast.rollups import RollupCube, aggregate_across_turbines, aggregate_daily
+
+
+@pytest.fixture
+def turbine_data():
+    """Fixture providing 4 days of imputed data of 5 turbines with missing values and missing rows."""
+    rng = np.random.default_rng(0)
+    timestamps = pd.date_range("2020-05-01", periods=4 * 144, freq="10min")
+    df = pd.DataFrame({"timestamp": np.repeat(timestamps, 5), "TurbID": np.tile(np.arange(1, 6), len(timestamps))})
+    df["Day"] = (df["timestamp"] - pd.Timestamp("2020-05-01")).dt.days + 1
+    df["time"] = df["timestamp"].dt.strftime("%H:%M")
+    for col in ["Wspd", "Wdir", "Etmp", "Itmp", "Ndir", "Patv", "Patv_imputed"]:
+        df[col] = rng.normal(5, 100, len(df))
+        df.loc[rng.random(len(df)) < 0.1, col] = np.nan
+    for col in ["maintenance_day", "turbine_stopped", "turbine_at_rest", "impute_day_patv"]:
+        df[col] = rng.integers(0, 2, len(df))
+    return df.drop(index=rng.choice(len(df), 50, replace=False)).reset_index(drop=True)
+
+
+def notebook_aggregate_across_turbines(df):
+    """Reference implementation: aggregate_across_turbines of notebook 03."""
+    aggregations = {"TurbID": "count", "Day": "mean", "time": "first"}
+    aggregations.update({col: "mean" for col in ["Wspd", "Wdir", "Etmp", "Itmp", "Ndir", "maintenance_day"]})
+    aggregations.update({col: "mean" for col in ["turbine_stopped", "turbine_at_rest", "impute_day_patv"]})
+    aggregations.update({"Patv": "sum", "Patv_imputed": "sum"})
+    df_agg = df.groupby(["timestamp"]).agg(aggregations).rename(columns={"TurbID": "num_turbines"})
+    df_agg["n_active_turbines"] = df.groupby("timestamp")["Patv_imputed"].apply(lambda x: (x > 0).sum())
+    return df_agg.reset_index()
+
+
+def notebook_aggregate_daily(df):
+    """Reference implementation: aggregate_daily of notebook 03."""
+    aggregations = {"Wspd": ["mean", "std"], "Wdir": ["mean", "std"], "Etmp": ["mean"], "Patv": "sum"}
+    aggregations.update({col: "mean" for col in ["maintenance_day", "turbine_stopped", "turbine_at_rest"]})
+    df_daily = df.groupby(["Day"]).agg(aggregations).reset_index()
+    df_daily.columns = ["_".join(col).strip("_") for col in df_daily.columns.values]
+    return df_daily
+
+
+def test_aggregate_across_turbines_matches_notebook(turbine_data):
+    """Test that the farm-level 10 minute rollup equals the groupby of notebook 03."""
+    expected = notebook_aggregate_across_turbines(turbine_data)
+    pd.testing.assert_frame_equal(aggregate_across_turbines(turbine_data), expected)
+
+
+def test_aggregate_daily_matches_notebook(turbine_data):
+    """Test that the farm-level daily rollup equals the groupby of notebook 03."""
+    expected = notebook_aggregate_daily(turbine_data)
+    pd.testing.assert_frame_equal(aggregate_daily(turbine_data), expected)
+
+
+def test_incremental_update_with_partial_day(turbine_data):
+    """Test that updates split in the middle of a day give the same cube as a single update."""
+    cut = turbine_data["timestamp"] < pd.Timestamp("2020-05-02 13:00")
+    cube = RollupCube(days_per_block=1).update(turbine_data[cut]).update(turbine_data[~cut])
+
+    pd.testing.assert_frame_equal(cube.frame("day"), RollupCube().update(turbine_data).frame("day"))
+
+
+def test_shared_cube_sliced_for_validation(turbine_data):
+    """Test that train and validation aggregations are sliced from one cube."""
+    cube = RollupCube().update(turbine_data)
+    validation = turbine_data[turbine_data["timestamp"] >= pd.Timestamp("2020-05-03")]
+
+    expected = notebook_aggregate_across_turbines(validation)
+    pd.testing.assert_frame_equal(aggregate_across_turbines(validation, cube), expected)
+
+
+def test_turbine_hourly_rollup(turbine_data):
+    """Test the per-turbine hourly means."""
+    hourly = RollupCube().update(turbine_data).frame("hour", scope="turbine").set_index(["timestamp", "TurbID"])
+    expected = turbine_data.groupby([turbine_data["timestamp"].dt.floor("h"), "TurbID"])["Wspd"].mean()
+
+    np.testing.assert_allclose(hourly["Wspd"].reindex(expected.index), expected)
+
+
+def test_save_and_load(turbine_data, tmp_path):
+    """Test that a persisted cube is restored and can be updated further."""
+    first_days = turbine_data["timestamp"] < pd.Timestamp("2020-05-03")
+    RollupCube().update(turbine_data[first_days]).save(tmp_path / "cube.npz")
+    cube = RollupCube.load(tmp_path / "cube.npz").update(turbine_data[~first_days])
+
+    pd.testing.assert_frame_equal(cube.frame("hour"), RollupCube().update(turbine_data).frame("hour"))
+
+
+@pytest.mark.parametrize("level", ["10min", "hour", "day"])
+def test_farm_only_cube_matches_full_cube(turbine_data, level):
+    """Test that a cube without per-turbine rollups gives the same farm-level rollups."""
+    cube = RollupCube(turbine_rollups=False).update(turbine_data)
+
+    pd.testing.assert_frame_equal(cube.frame(level), RollupCube().update(turbine_data).frame(level))
+    with pytest.raises(ValueError):
+        cube.frame("day", scope="turbine")
+
+
+def test_daily_updates_grow_capacity_geometrically(turbine_data):
+    """Test that appending day by day doubles the allocated days instead of copying on every update."""
+    cube = RollupCube(days_per_block=1)
+    capacities = []
+    for _, day_data in turbine_data.groupby("Day"):
+        cube.update(day_data)
+        capacities.append(len(cube._arrays[("farm", "day", "sum", "Patv")]))
+
+    assert capacities == [1, 2, 4, 4]
+    pd.testing.assert_frame_equal(cube.frame("hour"), RollupCube().update(turbine_data).frame("hour"))
+    assert len(cube.frame("day")) == 4
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from windfarm_forecast.sequences import SequenceDataset
+
+
+@pytest.fixture
+def aggregated_data():
+    """Fixture providing 10 days of an aggregated series where Patv equals the row number."""
+    n = 10 * 144
+    return pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2020-05-01", periods=n, freq="10min"),
+            "Wspd": np.arange(n, dtype=float) / 100,
+            "Patv": np.arange(n, dtype=float),
+        }
+    )
+
+
+def test_windows_are_views(aggregated_data):
+    """Test that the windows hold the right rows without copying the buffer."""
+    dataset = SequenceDataset(aggregated_data, ["Wspd", "Patv"], "Patv", input_steps=144, horizon=36, stride=6)
+    inputs, target = dataset[2]
+
+    assert len(dataset) == len(range(0, 10 * 144 - 144 - 36 + 1, 6))
+    assert inputs.shape == (144, 2) and target.shape == (36,)
+    assert inputs[0, 1] == 12 and inputs[-1, 1] == 12 + 143 and target[0] == 12 + 144
+    assert np.shares_memory(inputs, dataset._features) and np.shares_memory(target, dataset._target)
+    assert dataset.origins()[2] == aggregated_data["timestamp"][12 + 144]
+
+
+def test_nan_and_gap_windows_filtered(aggregated_data):
+    """Test that windows with missing values or spanning missing timestamps are skipped."""
+    aggregated_data.loc[200, "Wspd"] = np.nan
+    data = aggregated_data.drop(index=[1000])
+    dataset = SequenceDataset(data, ["Wspd"], "Patv", input_steps=144, horizon=36)
+
+    for i in range(len(dataset)):
+        inputs, target = dataset[i]
+        assert not np.isnan(inputs).any() and not np.isnan(target).any()
+        # Consecutive rows of the source: Patv increases by one per step
+        assert target[-1] - target[0] == 35 and inputs[-1, 0] * 100 + 1 == pytest.approx(target[0])
+
+
+def test_shuffled_batches_cover_all_windows(aggregated_data):
+    """Test that shuffled batches return every window exactly once."""
+    dataset = SequenceDataset(aggregated_data, ["Wspd", "Patv"], "Patv", input_steps=144, horizon=36, stride=12)
+    batches = list(dataset.iter_batches(batch_size=16, shuffle=True, seed=0, flatten=True))
+
+    assert batches[0][0].shape == (16, 144 * 2)
+    first_targets = np.sort(np.concatenate([targets[:, 0] for _, targets in batches]))
+    np.testing.assert_array_equal(first_targets, dataset.starts + 144)
+
+
+def test_too_short_series(aggregated_data):
+    """Test that a series shorter than one window gives an empty dataset."""
+    dataset = SequenceDataset(aggregated_data.iloc[:100], ["Wspd"], "Patv", input_steps=144, horizon=36)
+
+    assert len(dataset) == 0
+    assert list(dataset.iter_batches()) == []
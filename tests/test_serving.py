@@ -0,0 +1,101 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from windfarm_forecast.serving import MicroBatcher, PredictionServer, load_models
+
+
+@pytest.fixture
+def model():
+    """Fixture providing a linear model fitted on two aggregated features."""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"Wspd": rng.gamma(2.0, 3.0, 200), "Etmp": rng.normal(20.0, 5.0, 200)})
+    return LinearRegression().fit(X, 50 * X["Wspd"] - 2 * X["Etmp"] + 10)
+
+
+@pytest.fixture
+def server(model, tmp_path):
+    """Fixture providing a running server on a free port with the model loaded from disk."""
+    joblib.dump(model, tmp_path / "linear_regression.joblib")
+    models = load_models({"linear_regression": tmp_path / "linear_regression.joblib"})
+    server = PredictionServer(models, port=0, max_batch_size=256, max_latency_ms=20)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, path, payload=None):
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    data = None if payload is None else json.dumps(payload).encode()
+    with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+        return json.loads(response.read())
+
+
+def test_micro_batcher_coalesces_requests(model):
+    """Test that concurrent submits are predicted in one batch and split back per request."""
+    batcher = MicroBatcher({"lr": model}, max_batch_size=100, max_latency_ms=200)
+    features = [np.full((n, 2), n, dtype=np.float32) for n in [1, 5, 3]]
+    futures = [batcher.submit("lr", f) for f in features]
+    results = [future.result(timeout=5) for future in futures]
+    batcher.close()
+
+    for f, result in zip(features, results):
+        np.testing.assert_allclose(result, model.predict(pd.DataFrame(f, columns=["Wspd", "Etmp"])), rtol=1e-5)
+    assert batcher.stats.n_batches == 1
+
+
+def test_micro_batcher_isolates_failing_requests(model):
+    """Test that a request failing the model only fails its own future, not the others of the batch."""
+    batcher = MicroBatcher({"lr": model}, max_batch_size=100, max_latency_ms=200)
+    good = np.full((2, 2), 5.0, dtype=np.float32)
+    bad = np.array([[5.0, np.nan]], dtype=np.float32)
+    futures = [batcher.submit("lr", features) for features in [good, bad, good]]
+    good_results = [futures[0].result(timeout=5), futures[2].result(timeout=5)]
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=5)
+    batcher.close()
+
+    expected = model.predict(pd.DataFrame(good, columns=["Wspd", "Etmp"]))
+    for result in good_results:
+        np.testing.assert_allclose(result, expected, rtol=1e-5)
+    assert batcher.stats.n_batches == 1
+
+
+def test_predict_endpoint(server, model):
+    """Test that concurrent requests return the predictions of the model and are counted in the metrics."""
+    features = {"Wspd": [1.0, 5.0, 12.0], "Etmp": [20.0, 25.0, 10.0]}
+    payload = {"model": "linear_regression", "features": features, "timestamp": ["t0", "t1", "t2"]}
+
+    with ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(lambda _: request(server, "/predict", payload), range(16)))
+
+    expected = model.predict(pd.DataFrame(features))
+    for response in responses:
+        np.testing.assert_allclose(response["Patv"], expected, rtol=1e-5)
+        assert response["timestamp"] == ["t0", "t1", "t2"]
+
+    metrics = request(server, "/metrics")
+    assert metrics["requests"] == 16 and metrics["rows"] == 48
+    assert metrics["batches"] < 16
+    assert metrics["latency_p99_ms"] >= metrics["latency_p50_ms"] > 0
+
+
+def test_invalid_payload(server):
+    """Test that unknown models and missing features are rejected with status 400."""
+    for payload in [{"model": "arima", "features": {}}, {"model": "linear_regression", "features": {"Wspd": [1]}}]:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            request(server, "/predict", payload)
+        assert error.value.code == 400
+
+    assert request(server, "/metrics")["errors"] == 2
+    assert request(server, "/health")["models"] == {"linear_regression": ["Wspd", "Etmp"]}
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from windfarm_forecast.similarity import TurbineSimilarityIndex
+from windfarm_forecast.tensor_store import TensorStore
+
+
+@pytest.fixture
+def power_data():
+    """Fixture providing correlated power output of 6 turbines over 3 days with missing values."""
+    rng = np.random.default_rng(0)
+    n_turbines, n_timestamps = 6, 3 * 144
+    timestamps = pd.date_range("2020-05-01", periods=n_timestamps, freq="10min")
+    common = rng.uniform(0, 1500, n_timestamps)
+
+    df = pd.DataFrame(
+        {
+            "timestamp": np.repeat(timestamps, n_turbines),
+            "TurbID": np.tile(np.arange(1, n_turbines + 1), n_timestamps),
+        }
+    )
+    noise_level = np.tile(np.linspace(10, 600, n_turbines), n_timestamps)
+    df["Patv"] = np.repeat(common, n_turbines) + rng.normal(0, 1, len(df)) * noise_level
+    df.loc[rng.random(len(df)) < 0.1, "Patv"] = np.nan
+    return df
+
+
+def test_correlation_matches_pandas(power_data):
+    """Test that the correlation equals the pairwise-complete DataFrame.corr of the pivot."""
+    index = TurbineSimilarityIndex().update(power_data)
+    expected = power_data.pivot(index="timestamp", columns="TurbID", values="Patv").corr()
+
+    np.testing.assert_allclose(index.correlation(), expected.loc[index.turbine_ids, index.turbine_ids].to_numpy())
+
+
+def test_incremental_updates_equal_full_fit(power_data):
+    """Test that absorbing the data day by day gives the same index as one update."""
+    full = TurbineSimilarityIndex().update(power_data)
+    incremental = TurbineSimilarityIndex()
+    for _, day in power_data.groupby(power_data["timestamp"].dt.date):
+        incremental.update(day)
+
+    assert incremental.n_timestamps == full.n_timestamps
+    pd.testing.assert_frame_equal(incremental.to_frame(), full.to_frame())
+
+
+def test_frame_format(power_data):
+    """Test that the frame has the format consumed by impute_power_output, best turbines first."""
+    df = TurbineSimilarityIndex().update(power_data).to_frame(n_top=3)
+
+    assert list(df.columns) == ["turbine_id", "rank", "similar_turbine_id", "correlation"]
+    assert len(df) == 6 * 3
+    assert (df["turbine_id"] != df["similar_turbine_id"]).all()
+    assert (df.groupby("turbine_id")["correlation"].diff().dropna() <= 0).all()
+    # The two least noisy turbines are each other's most similar turbine
+    top = df[df["rank"] == 1].set_index("turbine_id")["similar_turbine_id"]
+    assert top[1] == 2 and top[2] == 1
+
+
+def test_new_turbine_in_later_update(power_data):
+    """Test that turbines showing up in a later update are added to the index."""
+    first_day = power_data["timestamp"] < pd.Timestamp("2020-05-02")
+    index = TurbineSimilarityIndex().update(power_data[first_day & (power_data["TurbID"] != 6)])
+    index.update(power_data[~first_day])
+
+    assert sorted(index.turbine_ids) == [1, 2, 3, 4, 5, 6]
+    assert not np.isnan(index.correlation()).any()
+
+
+def test_save_and_load(power_data, tmp_path):
+    """Test that a persisted index is restored unchanged."""
+    index = TurbineSimilarityIndex().update(power_data)
+    index.save(tmp_path / "similarity_index.npz")
+    loaded = TurbineSimilarityIndex.load(tmp_path / "similarity_index.npz")
+
+    assert loaded.n_timestamps == index.n_timestamps
+    pd.testing.assert_frame_equal(loaded.to_frame(), index.to_frame())
+
+
+def test_update_from_store_in_chunks(power_data, tmp_path):
+    """Test that absorbing a TensorStore chunk by chunk equals one update with the stored values."""
+    store = TensorStore.create(tmp_path / "store", power_data, ["Patv"])
+    index = TurbineSimilarityIndex().update_store(store, chunk_size=100)
+
+    # The store keeps float32 values
+    expected = TurbineSimilarityIndex().update(power_data.assign(Patv=power_data["Patv"].astype(np.float32)))
+    assert index.n_timestamps == expected.n_timestamps
+    np.testing.assert_allclose(index.correlation(), expected.correlation(), rtol=1e-6)
+    pd.testing.assert_frame_equal(index.to_frame(3), expected.to_frame(3))
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from windfarm_forecast.ingestion import ingest_csv_to_parquet, load_ingested
+from windfarm_forecast.pipeline import process_frame
+from windfarm_forecast.similarity import TurbineSimilarityIndex
+from windfarm_forecast.streaming import StreamingIngestor
+from windfarm_forecast.synthetic import generate_sdwpf
+
+CONFIG_PATH = Path(__file__).parents[1] / "config.yaml"
+
+
+@pytest.fixture
+def config():
+    """Fixture providing the project config."""
+    with open(CONFIG_PATH, "r") as file:
+        return yaml.safe_load(file)
+
+
+@pytest.fixture
+def raw_data():
+    """Fixture providing synthetic SCADA data of turbines with similar output and two stopped turbine days."""
+    df = generate_sdwpf(n_turbines=12, n_days=4, seed=1, outage_rate=0.0)
+    rng = np.random.default_rng(1)
+    farm_power = df.groupby(["Day", "Tmstamp"], observed=True)["Patv"].transform("mean")
+    df["Patv"] = (farm_power * rng.uniform(0.98, 1.02, len(df))).astype(np.float32)
+    for turbine, day in [(2, 1), (5, 3)]:
+        stopped = (df["TurbID"] == turbine) & (df["Day"] == day)
+        df.loc[stopped, "Patv"] = 0.0
+        df.loc[stopped, "Wspd"] = 8.0
+    return df
+
+
+@pytest.fixture
+def similar_turbines(raw_data):
+    """Fixture providing the 3 most similar turbines of every turbine."""
+    steps = raw_data["Day"].astype(np.int64) * 144 + raw_data["Tmstamp"].cat.codes
+    return TurbineSimilarityIndex().update(raw_data.assign(timestamp=steps)).to_frame(3)
+
+
+def _batches(df, size):
+    """Raw records in order of arrival as lists of dicts of size records."""
+    records = df.astype({"Tmstamp": str}).to_dict("records")
+    return [records[i : i + size] for i in range(0, len(records), size)]
+
+
+def test_streaming_matches_batch_pipeline(raw_data, similar_turbines, config, tmp_path):
+    """Test that streamed records give the same cleaned and imputed days as the batch pipeline."""
+    raw_data.to_csv(tmp_path / "raw.csv", index=False)
+    ingest_csv_to_parquet(tmp_path / "raw.csv", tmp_path / "ingested")
+    expected, _ = process_frame(load_ingested(tmp_path / "ingested"), config, similar_turbines, n_similar=3)
+
+    ingestor = StreamingIngestor(config, similar_turbines, n_similar=3)
+    closed = []
+    for batch in _batches(raw_data, 36):
+        closed += ingestor.push(batch)
+    assert len(closed) == 3 and ingestor.open_days == [4]
+    closed += ingestor.flush()
+
+    result = pd.concat(closed, ignore_index=True)
+    pd.testing.assert_frame_equal(
+        result.astype({"time": str}), expected.astype({"time": str}), check_dtype=False, check_exact=True
+    )
+    assert (result.loc[result["Day"] == 3, "impute_day_patv"] == 1).any()
+
+
+def test_days_close_as_records_arrive(raw_data, similar_turbines, config):
+    """Test that a day is only closed by records of the next day and cleaned records are available before."""
+    closed_days = []
+    ingestor = StreamingIngestor(
+        config, similar_turbines, n_similar=3, on_day_closed=lambda day, df: closed_days.append(day)
+    )
+    day_1 = raw_data[raw_data["Day"] == 1]
+
+    assert ingestor.push(day_1.iloc[:100]) == []
+    current = ingestor.current()
+    assert len(current) == 100 and "turbine_stopped" in current.columns
+    assert ingestor.push(day_1.iloc[100:]) == []
+
+    closed = ingestor.push(raw_data[raw_data["Day"] == 2].iloc[:12])
+    assert closed_days == [1] and len(closed) == 1 and len(closed[0]) == len(day_1)
+
+    with pytest.raises(ValueError, match="closed days"):
+        ingestor.push(day_1.iloc[:1])
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from windfarm_forecast.sweep import build_model, expand_grid, run_sweep, time_series_folds
+
+
+@pytest.fixture
+def training_data():
+    """Fixture providing a linear target of two features, ordered by time."""
+    rng = np.random.default_rng(0)
+    n = 600
+    df = pd.DataFrame({"Wspd": rng.gamma(2.0, 3.0, n), "Etmp": rng.normal(20.0, 5.0, n)})
+    df["Patv"] = 50 * df["Wspd"] - 2 * df["Etmp"]
+    df.loc[10, "Patv"] = np.nan
+    return df
+
+
+def test_expand_grid():
+    """Test that every combination of values becomes one config."""
+    configs = expand_grid({"xgboost": {"max_depth": [3, 6], "n_estimators": [100, 200]}, "linear_regression": {}})
+
+    assert len(configs) == 5
+    assert ("xgboost", {"max_depth": 6, "n_estimators": 100}) in configs
+    assert ("linear_regression", {}) in configs
+
+
+def test_time_series_folds():
+    """Test that every fold trains on all rows before its test block."""
+    folds = time_series_folds(100, n_folds=4)
+
+    assert folds[0] == (0, 20, 20, 40)
+    assert folds[-1] == (0, 80, 80, 100)
+    with pytest.raises(ValueError):
+        time_series_folds(3, n_folds=5)
+
+
+def test_unknown_model():
+    """Test that an unknown model name raises a ValueError."""
+    with pytest.raises(ValueError):
+        build_model("random_forest", {})
+
+
+def test_run_sweep(training_data):
+    """Test that a sweep across a process pool returns one row per config and fold."""
+    grid = {"linear_regression": {"fit_intercept": [True, False]}}
+    results = run_sweep(training_data, ["Wspd", "Etmp"], "Patv", grid, n_folds=3, max_workers=2, log_to_mlflow=False)
+
+    assert list(results.columns) == ["config_id", "model", "params", "fold", "mae", "rmse", "n_test", "fit_seconds"]
+    assert len(results) == 2 * 3
+    assert results["fold"].tolist() == [0, 1, 2, 0, 1, 2]
+    # With an intercept the target is fitted exactly
+    assert results.loc[results["config_id"] == 0, "mae"].max() == pytest.approx(0.0, abs=1e-2)
+
+
+def test_run_sweep_with_missing_features(training_data):
+    """Test that rows with missing features do not fail linear regression and all models score the same rows."""
+    training_data.loc[[5, 250, 450], "Wspd"] = np.nan
+    grid = {"linear_regression": {}, "xgboost": {"n_estimators": [10]}}
+    results = run_sweep(training_data, ["Wspd", "Etmp"], "Patv", grid, n_folds=3, max_workers=2, log_to_mlflow=False)
+
+    assert len(results) == 2 * 3
+    assert np.isfinite(results["mae"]).all()
+    assert results.loc[results["model"] == "linear_regression", "mae"].max() == pytest.approx(0.0, abs=1e-2)
+    n_test = results.pivot(index="fold", columns="model", values="n_test")
+    assert (n_test["linear_regression"] == n_test["xgboost"]).all()
+    assert n_test["xgboost"].tolist() == [148, 148, 149]
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from windfarm_forecast.ingestion import RAW_DTYPES
+from windfarm_forecast.synthetic import MAINTENANCE_DAY, generate_sdwpf, iter_sdwpf_days
+
+
+def test_raw_schema():
+    """Test that the generated frame has the raw SDWPF columns with the ingestion dtypes."""
+    df = generate_sdwpf(n_turbines=5, n_days=2, base_date="2020-05-01")
+
+    assert list(df.columns) == list(RAW_DTYPES) + ["timestamp"]
+    assert df.dtypes.drop("timestamp").astype(str).to_dict() == RAW_DTYPES
+    assert len(df) == 5 * 2 * 144
+    assert df["Tmstamp"].iloc[5 * 143] == "23:50"
+    assert df["timestamp"].iloc[-1] == pd.Timestamp("2020-05-02 23:50")
+
+
+def test_deterministic_and_independent_of_chunking():
+    """Test that the same seed gives the same data regardless of the chunk size."""
+    by_day = pd.concat(iter_sdwpf_days(n_turbines=4, n_days=5, seed=3, days_per_chunk=1), ignore_index=True)
+    by_chunk = pd.concat(iter_sdwpf_days(n_turbines=4, n_days=5, seed=3, days_per_chunk=2), ignore_index=True)
+
+    pd.testing.assert_frame_equal(by_day, by_chunk)
+    pd.testing.assert_frame_equal(by_day, generate_sdwpf(n_turbines=4, n_days=5, seed=3))
+    assert not by_day.equals(generate_sdwpf(n_turbines=4, n_days=5, seed=4))
+
+
+def test_data_quality_patterns():
+    """Test that the data contains the patterns handled by the preprocessing rules."""
+    df = generate_sdwpf(n_turbines=20, n_days=MAINTENANCE_DAY, missing_rate=0.2, stopped_rate=0.2)
+
+    assert df.loc[df["Day"] == MAINTENANCE_DAY, "Patv"].isna().all()
+    assert df.loc[df["Day"] < MAINTENANCE_DAY, "Patv"].isna().mean() > 0
+    assert ((df["Patv"] <= 0) & (df["Wspd"] > 2.5)).any()
+    assert (df["Pab1"] > 89).any() and (df["Patv"] < 0).any()
+    assert df["Patv"].max() < 1.2 * 1550
+    # Turbines share the farm-wide wind
+    wspd = df.pivot_table(index=["Day", "Tmstamp"], columns="TurbID", values="Wspd", observed=True)
+    assert np.nanmin(wspd.corr().to_numpy()) > 0.5
@@ -0,0 +1,105 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from windfarm_forecast.feature_engineering import build_similarity_index, similar_turbines_mean
+from windfarm_forecast.tensor_store import TensorStore
+
+
+@pytest.fixture
+def long_data():
+    """Fixture providing two days of data of 3 turbines in long format with missing rows."""
+    rng = np.random.default_rng(0)
+    timestamps = pd.date_range("2020-05-01", periods=2 * 144, freq="10min")
+    df = pd.DataFrame({"timestamp": np.repeat(timestamps, 3), "TurbID": np.tile([1, 2, 3], len(timestamps))})
+    df["Patv"] = rng.uniform(0, 1500, len(df)).astype(np.float32)
+    df["Wspd"] = rng.uniform(0, 20, len(df)).astype(np.float32)
+    df["turbine_stopped"] = rng.integers(0, 2, len(df))
+    # Missing rows end up as NaN in the store
+    return df.drop(index=[4, 5]).reset_index(drop=True)
+
+
+@pytest.fixture
+def store(long_data, tmp_path):
+    """Fixture providing a store created from long_data."""
+    return TensorStore.create(tmp_path / "store", long_data, ["Patv", "Wspd", "turbine_stopped"])
+
+
+def test_roundtrip(store, long_data):
+    """Test that the long format is restored from the store, with NaN for the missing rows."""
+    df = store.to_frame()
+
+    assert len(df) == 2 * 144 * 3
+    restored = long_data.merge(df, on=["timestamp", "TurbID"], suffixes=("", "_store"))
+    for variable in ["Patv", "Wspd", "turbine_stopped"]:
+        np.testing.assert_array_equal(restored[variable].astype(np.float32), restored[f"{variable}_store"])
+    assert df["Patv"].isna().sum() == 2
+
+
+def test_get_slices_without_loading(store, long_data):
+    """Test slicing by time range and turbines on the memory mapped arrays."""
+    assert isinstance(store.array("Patv").base, np.memmap)
+
+    patv = store.get("Patv", start="2020-05-01 01:00", end="2020-05-01 02:00", turbines=[3, 1])
+    assert patv.shape == (2, 7)
+    expected = long_data[(long_data["TurbID"] == 3) & (long_data["timestamp"] == "2020-05-01 01:00")]["Patv"]
+    assert patv[0, 0] == expected.iloc[0]
+
+
+def test_append_days_and_reopen(long_data, tmp_path):
+    """Test that new days are appended and visible to a newly opened store."""
+    first_day = long_data["timestamp"] < pd.Timestamp("2020-05-02")
+    TensorStore.create(tmp_path / "store", long_data[first_day], ["Patv"])
+    TensorStore(tmp_path / "store").append(long_data[~first_day])
+
+    reopened = TensorStore(tmp_path / "store")
+    assert reopened.n_timestamps == 2 * 144
+    assert reopened.timestamps[-1] == pd.Timestamp("2020-05-02 23:50")
+
+
+def test_read_while_appending(long_data, tmp_path):
+    """Test that a store opened during appends always sees a complete header matching the data files."""
+    hours = long_data["timestamp"].dt.floor("h")
+    chunks = [chunk for _, chunk in long_data.groupby(hours)]
+    TensorStore.create(tmp_path / "store", chunks[0], ["Patv"])
+
+    def append_all():
+        writer = TensorStore(tmp_path / "store")
+        for chunk in chunks[1:]:
+            writer.append(chunk)
+
+    appender = threading.Thread(target=append_all)
+    appender.start()
+    n_timestamps = []
+    while appender.is_alive():
+        reader = TensorStore(tmp_path / "store")
+        assert reader.array("Patv").shape == (3, reader.n_timestamps)
+        n_timestamps.append(reader.n_timestamps)
+    appender.join()
+
+    assert n_timestamps == sorted(n_timestamps)
+    assert TensorStore(tmp_path / "store").n_timestamps == 2 * 144
+
+
+def test_append_rejects_overlap_and_unknown_turbines(store, long_data):
+    """Test that appending past data or unknown turbines fails."""
+    with pytest.raises(ValueError):
+        store.append(long_data)
+
+    new_turbine = pd.DataFrame({"timestamp": [pd.Timestamp("2020-05-03")], "TurbID": [99], "Patv": [1.0]})
+    with pytest.raises(ValueError):
+        store.append(new_turbine.assign(Wspd=1.0, turbine_stopped=0))
+
+
+def test_impute_from_store_without_pivot(store):
+    """Test that the imputation kernel works directly on arrays sliced from the store."""
+    similar_turbines_df = pd.DataFrame({"turbine_id": [1, 1], "rank": [1, 2], "similar_turbine_id": [2, 3]})
+    similar_index = build_similarity_index(similar_turbines_df, store.turbine_ids, n_similar=2)
+    power = store.get("Patv", end="2020-05-01 23:50")
+
+    means, has_neighbours = similar_turbines_mean(power, similar_index, np.array([0, 1]), np.array([10, 10]))
+
+    assert np.isclose(means[0], power[1:, 10].mean())
+    assert has_neighbours.tolist() == [True, False]
@@ -0,0 +1,245 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from windfarm_forecast.feature_engineering import FeatureGenerator
+from windfarm_forecast.instrumentation import instrument
+from windfarm_forecast.recursive import RecursiveForecaster
+from windfarm_forecast.shared_arrays import attach_shared_arrays, release, shared_array, to_shared
+from windfarm_forecast.sweep import build_model
+
+STEPS_PER_DAY = 144  # 10 minute steps
+WINDOWS = {"expanding", "sliding"}
+
+
+class Fold(NamedTuple):
+    """Row ranges [start, end) of the training and test period of a fold."""
+
+    train_start: int
+    train_end: int
+    test_start: int
+    test_end: int
+
+
+def rolling_origin_folds(
+    timestamps: pd.Series | np.ndarray,
+    initial_train: str = "120D",
+    test_size: str = "14D",
+    step: str | None = None,
+    window: str = "expanding",
+) -> list[Fold]:
+    """
+    Rolling-origin folds over time-ordered data.
+
+    The first fold trains on initial_train and tests on the following test_size. Every next fold
+    moves the origin by step: expanding folds keep the start of the training period, sliding folds
+    keep its length.
+
+    Args:
+        timestamps: Timestamps of the rows, ordered
+        initial_train: Length of the training period of the first fold
+        test_size: Length of the test period of every fold
+        step: Distance between the origins of consecutive folds, test_size if None
+        window: "expanding" or "sliding"
+
+    Returns:
+        List of Folds in row positions
+    """
+    if window not in WINDOWS:
+        raise ValueError(f"Invalid window '{window}', expected one of {sorted(WINDOWS)}")
+
+    timestamps = pd.DatetimeIndex(timestamps)
+    initial_train, test_size = pd.Timedelta(initial_train), pd.Timedelta(test_size)
+    step = test_size if step is None else pd.Timedelta(step)
+
+    # End of the period covered by the last row
+    data_end = timestamps[-1] + (timestamps[-1] - timestamps[-2] if len(timestamps) > 1 else pd.Timedelta(0))
+
+    folds = []
+    origin = timestamps[0] + initial_train
+    while origin + test_size <= data_end:
+        train_from = timestamps[0] if window == "expanding" else origin - initial_train
+        first, test_start, test_end = timestamps.searchsorted([train_from, origin, origin + test_size])
+        folds.append(Fold(int(first), int(test_start), int(test_start), int(test_end)))
+        origin += step
+
+    return folds
+
+
+def _run_fold(
+    model_name: str,
+    params: dict,
+    fold: Fold,
+    feature_cols: list[str],
+    target_col: str,
+    n_threads: int,
+    horizon_steps: int,
+) -> dict:
+    """Fit one fold on the shared feature matrix and return the error sums per horizon bucket."""
+    X = shared_array("X")
+    y = shared_array("y")
+
+    X_train, y_train = X[fold.train_start : fold.train_end], y[fold.train_start : fold.train_end]
+    valid = ~np.isnan(y_train)
+    if model_name == "linear_regression":
+        valid &= ~np.isnan(X_train).any(axis=1)
+    model = build_model(model_name, params, n_threads)
+    model.fit(pd.DataFrame(X_train[valid], columns=feature_cols), y_train[valid])
+
+    # Forecast the test period from its origin, recursively if the model uses lags of the target. Rows
+    # with missing features are not predicted for linear regression, their NaN errors are skipped below
+    forecaster = RecursiveForecaster(
+        model,
+        feature_cols,
+        target_col,
+        horizon=fold.test_end - fold.test_start,
+        skip_missing=model_name == "linear_regression",
+    )
+    if forecaster.lags:
+        first = fold.test_start - forecaster.max_lag
+        frame = pd.DataFrame(X[first : fold.test_end], columns=feature_cols)
+        frame[target_col] = y[first : fold.test_end]
+        predictions = forecaster.forecast(frame, origins=np.array([forecaster.max_lag]))[0]
+    else:
+        predictions = forecaster.predict(X[fold.test_start : fold.test_end])
+
+    errors = predictions - y[fold.test_start : fold.test_end]
+    valid = ~np.isnan(errors)
+    horizon = np.arange(len(errors)) // horizon_steps
+    n_buckets = horizon.max() + 1 if len(horizon) else 0
+    return {
+        "n": np.bincount(horizon, weights=valid, minlength=n_buckets),
+        "abs_error": np.bincount(horizon, weights=np.where(valid, np.abs(errors), 0.0), minlength=n_buckets),
+        "squared_error": np.bincount(horizon, weights=np.where(valid, errors**2, 0.0), minlength=n_buckets),
+    }
+
+
+@instrument()
+def run_backtest(
+    df: pd.DataFrame,
+    feature_cols: list[str],
+    target_col: str,
+    folds: list[Fold],
+    model_name: str = "linear_regression",
+    params: dict | None = None,
+    feature_spec: dict | None = None,
+    horizon_steps: int = STEPS_PER_DAY,
+    max_workers: int | None = None,
+    n_threads: int = 1,
+    timestamp_col: str = "timestamp",
+) -> pd.DataFrame:
+    """
+    Backtest a model over rolling-origin folds in a process pool.
+
+    Features are computed once for the union of all folds (FeatureGenerator features are causal, so
+    every fold sees the same values as if they were computed on its own history) and shared with the
+    workers through shared memory; every fold only slices its rows. The test period of every fold is
+    forecast from its origin, recursively via RecursiveForecaster if the features contain lags of the
+    target.
+
+    Args:
+        df: Aggregated frame ordered by time with a regular 10 minute step
+        feature_cols: Columns of df or features of feature_spec used by the model
+        target_col: Column to forecast
+        folds: Folds as returned by rolling_origin_folds
+        model_name: Model of build_model
+        params: Hyperparameters of the model
+        feature_spec: Spec of the FeatureGenerator computing the generated features in feature_cols
+        horizon_steps: Number of 10 minute steps per horizon bucket of the report, e.g. 144 for days
+        max_workers: Size of the process pool, number of cpus if None
+        n_threads: Threads per model for xgboost and lightgbm
+        timestamp_col: Name of the column containing timestamps
+
+    Returns:
+        Tidy DataFrame with one row per (fold, horizon) and the columns fold, train_start, test_start,
+        test_end, horizon (1 = first bucket), n, mae and rmse
+    """
+    end = max(fold.test_end for fold in folds)
+    data = df.iloc[:end]
+    features = pd.DataFrame(index=data.index)
+    if feature_spec is not None:
+        generator = FeatureGenerator(feature_spec)
+        generated = [col for col in feature_cols if col in generator.features]
+        features = generator.transform(data, generated)
+    X = np.column_stack(
+        [
+            features[col].to_numpy(dtype=np.float32)
+            if col in features
+            else data[col].to_numpy(dtype=np.float32, na_value=np.nan)
+            for col in feature_cols
+        ]
+    )
+
+    X_block, X_spec = to_shared(np.ascontiguousarray(X))
+    y_block, y_spec = to_shared(data[target_col].to_numpy(dtype=np.float32, na_value=np.nan))
+    del X
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count(),
+            initializer=attach_shared_arrays,
+            initargs=({"X": X_spec, "y": y_spec},),
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _run_fold, model_name, params or {}, fold, feature_cols, target_col, n_threads, horizon_steps
+                )
+                for fold in folds
+            ]
+            sums = [future.result() for future in futures]
+    finally:
+        release(X_block, y_block)
+
+    timestamps = data[timestamp_col].to_numpy()
+    frames = []
+    for i, (fold, fold_sums) in enumerate(zip(folds, sums)):
+        n = fold_sums["n"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "fold": i,
+                        "train_start": timestamps[fold.train_start],
+                        "test_start": timestamps[fold.test_start],
+                        "test_end": timestamps[fold.test_end - 1],
+                        "horizon": np.arange(1, len(n) + 1),
+                        "n": n.astype(np.int64),
+                        "mae": fold_sums["abs_error"] / n,
+                        "rmse": np.sqrt(fold_sums["squared_error"] / n),
+                    }
+                )
+            )
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def summarize(results: pd.DataFrame, by: str = "fold") -> pd.DataFrame:
+    """
+    Combine the rows of run_backtest per fold or per horizon, weighting by the number of errors.
+
+    Args:
+        results: Output of run_backtest
+        by: "fold" or "horizon"
+
+    Returns:
+        DataFrame indexed by fold or horizon with the columns n, mae and rmse
+    """
+    sums = (
+        pd.DataFrame(
+            {
+                by: results[by],
+                "n": results["n"],
+                "abs_error": results["mae"].fillna(0) * results["n"],
+                "squared_error": results["rmse"].fillna(0) ** 2 * results["n"],
+            }
+        )
+        .groupby(by)
+        .sum()
+    )
+
+    return pd.DataFrame(
+        {"n": sums["n"], "mae": sums["abs_error"] / sums["n"], "rmse": np.sqrt(sums["squared_error"] / sums["n"])}
+    )
@@ -0,0 +1,272 @@
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+# Fingerprints of input files by (path, size, mtime), so unchanged inputs are not hashed again
+FINGERPRINTS_FILE = "fingerprints.json"
+CHUNK_SIZE = 1 << 20
+
+
+def code_version(*objects) -> str:
+    """
+    Version of the code of a stage as a hash of the source of its functions and classes.
+
+    Args:
+        objects: Functions, classes or modules implementing the stage
+
+    Returns:
+        Hex digest changing whenever the source of one of the objects changes
+    """
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()[:16]
+
+
+def _directory_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+class ArtifactCache:
+    """
+    Content-addressed cache of the outputs of the pipeline stages (preprocessed data, similar turbines, features).
+
+    The output of a stage is stored under a sha256 key of the content of its input artifacts, the
+    version of the stage code and its section of the config, so it is reused exactly when nothing it
+    depends on has changed: changing the features section of the config only re-runs the feature
+    engineering, not the ingestion and imputation before it. Outputs of cached stages are keyed by
+    their cache key when used as inputs of a later stage, other input files are hashed once per
+    (path, size, modification time). Entries are evicted by age of last use and by total size.
+    """
+
+    def __init__(self, root: str | Path, max_age: str | pd.Timedelta | None = "30D", max_bytes: int | None = None):
+        """
+        Args:
+            root: Directory of the cache
+            max_age: Entries not used for longer are evicted, never if None
+            max_bytes: Least recently used entries are evicted beyond this total size, unbounded if None
+        """
+        self.root = Path(root)
+        self.max_age = None if max_age is None else pd.Timedelta(max_age)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._fingerprints = self._read_fingerprints()
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ArtifactCache":
+        """Create the cache of the cache section of the config."""
+        cache_config = config["cache"]
+        max_gb = cache_config.get("max_gb")
+        max_age_days = cache_config.get("max_age_days")
+        return cls(
+            cache_config["root"],
+            max_age=None if max_age_days is None else pd.Timedelta(days=max_age_days),
+            max_bytes=None if max_gb is None else int(max_gb * 1e9),
+        )
+
+    def _read_fingerprints(self) -> dict:
+        path = self.root / FINGERPRINTS_FILE
+        if not path.exists():
+            return {}
+        with open(path, "r") as file:
+            return json.load(file)
+
+    def _write_fingerprints(self) -> None:
+        tmp_path = self.root / f"{FINGERPRINTS_FILE}.{uuid.uuid4().hex}"
+        with open(tmp_path, "w") as file:
+            json.dump(self._fingerprints, file)
+        os.replace(tmp_path, self.root / FINGERPRINTS_FILE)
+
+    def _file_fingerprint(self, path: Path) -> str:
+        stat = path.stat()
+        memo_key = str(path.resolve())
+        memo = self._fingerprints.get(memo_key)
+        if memo and memo["size"] == stat.st_size and memo["mtime_ns"] == stat.st_mtime_ns:
+            return memo["sha256"]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            while chunk := file.read(CHUNK_SIZE):
+                digest.update(chunk)
+        self._fingerprints[memo_key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest.hexdigest(),
+        }
+        return digest.hexdigest()
+
+    def fingerprint(self, artifact: str | Path) -> str:
+        """
+        Content hash of an input artifact.
+
+        Args:
+            artifact: File or directory; entries of this cache are identified by their key
+
+        Returns:
+            Hex digest of the content
+        """
+        path = Path(artifact)
+        try:
+            relative = path.resolve().relative_to(self.root.resolve())
+        except ValueError:
+            relative = None
+        if relative is not None and len(relative.parts) == 2:
+            # Output of a cached stage: <root>/<stage>/<key>[.suffix]
+            return relative.parts[1].split(".", 1)[0]
+
+        if path.is_file():
+            return self._file_fingerprint(path)
+        if not path.is_dir():
+            raise FileNotFoundError(f"Input artifact {path} does not exist")
+
+        digest = hashlib.sha256()
+        for file in sorted(file for file in path.rglob("*") if file.is_file()):
+            digest.update(file.relative_to(path).as_posix().encode())
+            digest.update(self._file_fingerprint(file).encode())
+        return digest.hexdigest()
+
+    def key(self, stage: str, inputs: list[str | Path], version: str, config: dict | None = None) -> str:
+        """
+        Cache key of a stage output.
+
+        Args:
+            stage: Name of the stage, e.g. "preprocess"
+            inputs: Input artifacts (files or directories) of the stage
+            version: Version of the stage code, e.g. from code_version
+            config: Section of the config the stage depends on
+
+        Returns:
+            Hex digest identifying the output
+        """
+        description = {
+            "stage": stage,
+            "version": version,
+            "config": config,
+            "inputs": [self.fingerprint(artifact) for artifact in inputs],
+        }
+        self._write_fingerprints()
+        return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _entries(self) -> list[tuple[Path, Path]]:
+        """(metadata file, output path) of all entries."""
+        entries = []
+        for meta_path in self.root.glob("*/*.meta.json"):
+            with open(meta_path, "r") as file:
+                meta = json.load(file)
+            entries.append((meta_path, meta_path.parent / meta["output"]))
+        return entries
+
+    def run(
+        self,
+        stage: str,
+        compute: Callable[[Path], None],
+        inputs: list[str | Path],
+        version: str,
+        config: dict | None = None,
+        suffix: str = "",
+    ) -> Path:
+        """
+        Return the cached output of a stage, computing it on a miss.
+
+        Args:
+            stage: Name of the stage, e.g. "preprocess"
+            compute: Called with the path to write the output to (a file or a directory) on a miss
+            inputs: Input artifacts of the stage
+            version: Version of the stage code, e.g. code_version(preprocess)
+            config: Section of the config the stage depends on
+            suffix: Suffix of the output path, e.g. ".parquet"
+
+        Returns:
+            Path of the output in the cache
+        """
+        key = self.key(stage, inputs, version, config)
+        stage_dir = self.root / stage
+        output = stage_dir / f"{key}{suffix}"
+        meta_path = stage_dir / f"{key}.meta.json"
+
+        if meta_path.exists() and output.exists():
+            self.hits += 1
+            # The modification time of the metadata is the time of last use
+            os.utime(meta_path)
+            return output
+
+        self.misses += 1
+        tmp_dir = self.root / "tmp" / uuid.uuid4().hex
+        tmp_dir.mkdir(parents=True)
+        try:
+            tmp_output = tmp_dir / output.name
+            compute(tmp_output)
+            if not tmp_output.exists():
+                raise FileNotFoundError(f"Stage '{stage}' did not write its output")
+
+            stage_dir.mkdir(exist_ok=True)
+            if output.exists():
+                # Incomplete earlier entry
+                shutil.rmtree(output) if output.is_dir() else output.unlink()
+            os.replace(tmp_output, output)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        meta = {
+            "stage": stage,
+            "output": output.name,
+            "version": version,
+            "config": config,
+            "inputs": [str(artifact) for artifact in inputs],
+            "created": time.time(),
+            "bytes": _directory_size(output),
+        }
+        with open(meta_path, "w") as file:
+            json.dump(meta, file, indent=2, default=str)
+
+        # The new entry is kept even if it exceeds max_bytes on its own, older entries make room for it
+        self.evict(keep=meta_path)
+        return output
+
+    def evict(self, keep: Path | None = None) -> list[Path]:
+        """
+        Remove the entries not used within max_age, then the least recently used ones beyond max_bytes.
+
+        Args:
+            keep: Metadata file of an entry never to remove, e.g. the one just written
+
+        Returns:
+            Output paths of the removed entries
+        """
+        now = time.time()
+        # Most recently used first, the kept entry before all others
+        entries = sorted(
+            (
+                (meta_path == keep, meta_path.stat().st_mtime, meta_path, output)
+                for meta_path, output in self._entries()
+            ),
+            reverse=True,
+        )
+
+        removed = []
+        total = 0
+        for kept, last_used, meta_path, output in entries:
+            size = _directory_size(output) if output.exists() else 0
+            expired = self.max_age is not None and now - last_used > self.max_age.total_seconds()
+            too_large = self.max_bytes is not None and total + size > self.max_bytes
+            if not kept and (expired or too_large):
+                if output.exists():
+                    shutil.rmtree(output) if output.is_dir() else output.unlink()
+                meta_path.unlink()
+                removed.append(output)
+            else:
+                total += size
+
+        return removed
@@ -0,0 +1,286 @@
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+DEFAULT_CONFIG = Path(__file__).parents[1] / "config.yaml"
+FRONTEND_APP = Path(__file__).parent / "frontend" / "app.py"
+
+# Only the standard library is imported at module level, every command imports what it needs when it
+# runs, so short-lived processes do not pay for pandas, mlflow, plotly, xgboost or streamlit at startup
+
+
+def load_config(path: str | Path) -> dict:
+    import yaml
+
+    with open(path, "r") as file:
+        return yaml.safe_load(file)
+
+
+def _feature_columns(args, config: dict) -> list[str]:
+    """
+    Features of the --features option, the features of the features section of the config otherwise.
+
+    Of the config features, features of the target other than lags are left out, since rolling
+    windows and pointwise transforms include the value to forecast.
+    """
+    if args.features:
+        return args.features
+
+    from windfarm_forecast.feature_engineering import expand_feature_spec, parse_feature
+
+    feature_cols = []
+    for feature in expand_feature_spec(config["features"]):
+        kind, column, _, _ = parse_feature(feature)
+        if column != args.target or kind == "lag":
+            feature_cols.append(feature)
+    return feature_cols
+
+
+def _run_stage(
+    config: dict, stage: str, compute, inputs: list, version: tuple, stage_config, output, use_cache: bool = True
+) -> None:
+    """
+    Run a stage through the artifact cache of the cache section of the config and copy its output to output.
+
+    compute is called with the path to write the output to on a miss (directly with output without
+    the cache), version holds the functions and modules implementing the stage.
+    """
+    import os
+    import shutil
+    import uuid
+
+    from windfarm_forecast.cache import ArtifactCache, code_version
+
+    output = Path(output)
+    if not use_cache:
+        compute(output)
+        return
+
+    # Same guard as ingest_csv_to_parquet, a restored dataset is never merged into an existing one
+    if output.is_dir() and any(output.iterdir()):
+        raise FileExistsError(f"{output} is not empty, refusing to write the {stage} output into it")
+
+    cache = ArtifactCache.from_config(config)
+    cached = cache.run(stage, compute, inputs, code_version(*version), stage_config, suffix=output.suffix)
+    if cache.hits:
+        print(f"Reused the cached {stage} output {cached}")
+
+    if cached.is_dir():
+        # Copy next to the output, then move it into place (over an empty directory if there is one)
+        tmp_output = output.with_name(f".{output.name}.{uuid.uuid4().hex}")
+        shutil.copytree(cached, tmp_output)
+        try:
+            os.replace(tmp_output, output)
+        finally:
+            shutil.rmtree(tmp_output, ignore_errors=True)
+    else:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(cached, output)
+
+
+def ingest(args, config: dict) -> None:
+    from windfarm_forecast import ingestion
+
+    base_date = args.base_date or config["ingestion"]["base_date"]
+
+    def compute(output_dir):
+        n_rows = ingestion.ingest_csv_to_parquet(
+            args.csv,
+            output_dir,
+            base_date=base_date,
+            chunksize=args.chunksize or config["ingestion"]["chunksize"],
+        )
+        print(f"Ingested {n_rows} rows")
+
+    # The chunk size does not change the output
+    stage_config = {"base_date": base_date}
+    _run_stage(config, "ingest", compute, [args.csv], (ingestion,), stage_config, args.output_dir, not args.no_cache)
+    print(f"Wrote the ingested dataset to {args.output_dir}")
+
+
+def preprocess(args, config: dict) -> None:
+    import pandas as pd
+
+    from windfarm_forecast import feature_engineering, ingestion, pipeline, preprocessing, rollups, similarity
+
+    similar_turbines_df = pd.read_parquet(args.similar_turbines) if args.similar_turbines else None
+
+    def compute(output):
+        # The models are trained and evaluated on the farm power in MW, like in notebook 03
+        df_agg = pipeline.run_partitioned(
+            args.dataset_dir,
+            config,
+            output_dir=args.turbine_output_dir,
+            similar_turbines_df=similar_turbines_df,
+            days=args.days,
+            max_workers=args.max_workers,
+        )
+        df_agg = pipeline.to_megawatts(df_agg)
+        df_agg.to_parquet(output)
+        print(f"Aggregated {len(df_agg)} rows")
+
+    inputs = [args.dataset_dir] + ([args.similar_turbines] if args.similar_turbines else [])
+    version = (
+        pipeline,
+        preprocessing,
+        similarity,
+        rollups,
+        ingestion.load_ingested,
+        feature_engineering.to_turbine_matrix,
+        feature_engineering.impute_power_output,
+    )
+    stage_config = {"preprocessing": config["preprocessing"], "days": args.days}
+    # The per-turbine data is a side output the cache does not hold
+    use_cache = not (args.no_cache or args.turbine_output_dir)
+    _run_stage(config, "preprocess", compute, inputs, version, stage_config, args.output, use_cache)
+    print(f"Wrote the aggregated data to {args.output}")
+
+
+def features(args, config: dict) -> None:
+    import pandas as pd
+
+    from windfarm_forecast import feature_engineering
+
+    def compute(output):
+        df = pd.read_parquet(args.input).sort_values("timestamp").reset_index(drop=True)
+        generated = feature_engineering.FeatureGenerator(config["features"]).transform(df)
+        df = pd.concat([df, generated], axis=1)
+        df.to_parquet(output)
+        print(f"Generated {generated.shape[1]} features of {len(df)} rows")
+
+    version = (feature_engineering,)
+    _run_stage(config, "features", compute, [args.input], version, config["features"], args.output, not args.no_cache)
+    print(f"Wrote the data with features to {args.output}")
+
+
+def train(args, config: dict) -> None:
+    import joblib
+    import pandas as pd
+
+    from windfarm_forecast.sweep import build_model
+
+    feature_cols = _feature_columns(args, config)
+    if args.target in feature_cols:
+        raise ValueError(f"The target {args.target} cannot be a feature")
+    df = pd.read_parquet(args.input)
+    df = df.dropna(subset=[args.target] + (feature_cols if args.model == "linear_regression" else []))
+
+    model = build_model(args.model, json.loads(args.params), n_threads=args.n_threads)
+    model.fit(df[feature_cols], df[args.target])
+    Path(args.model_path).parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model, args.model_path)
+    print(f"Trained {args.model} on {len(df)} rows, saved to {args.model_path}")
+
+
+def predict(args, config: dict) -> None:
+    import numpy as np
+    import pandas as pd
+
+    from windfarm_forecast.serving import load_models, model_features
+
+    name = args.name or Path(args.model_path).stem
+    model = load_models({name: args.model_path})[name]
+    feature_cols = model_features(model)
+
+    df = pd.read_parquet(args.input)
+    predictions = pd.DataFrame(
+        {"actual": df[args.target].to_numpy(), "set": args.set}, index=pd.DatetimeIndex(df["timestamp"])
+    )
+    predictions[f"pred_{name}"] = np.full(len(df), np.nan)
+    valid = np.ones(len(df), dtype=bool) if args.allow_missing else df[feature_cols].notna().all(axis=1).to_numpy()
+    if valid.any():
+        predictions.loc[valid, f"pred_{name}"] = model.predict(df.loc[valid, feature_cols])
+
+    if args.output:
+        predictions.to_parquet(args.output)
+        print(f"Wrote {len(predictions)} predictions to {args.output}")
+    if args.archive:
+        from windfarm_forecast.predictions_archive import write_predictions
+
+        paths = write_predictions(args.archive, predictions)
+        print(f"Appended {len(paths)} files to {args.archive}")
+
+
+def serve_frontend(args, config: dict) -> None:
+    # streamlit is only imported by the child process
+    command = [sys.executable, "-m", "streamlit", "run", str(FRONTEND_APP), "--server.port", str(args.port)]
+    subprocess.run(command, check=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="windfarm-forecast", description="Wind farm power forecasting pipeline")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="Path to config.yaml")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Run ingest, preprocess and features without the artifact cache"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("ingest", help="Stream a raw SDWPF csv into a Parquet dataset partitioned by Day")
+    command.add_argument("csv", help="Raw csv, e.g. sdwpf_245days_v1.csv")
+    command.add_argument("output_dir", help="Directory of the Parquet dataset")
+    command.add_argument("--base-date", help="Date of Day 1, from the ingestion config if not given")
+    command.add_argument("--chunksize", type=int, help="Number of csv rows per chunk")
+    command.set_defaults(func=ingest)
+
+    command = commands.add_parser("preprocess", help="Preprocess, impute and aggregate an ingested dataset per day")
+    command.add_argument("dataset_dir", help="Directory written by ingest")
+    command.add_argument("output", help="Parquet file of the aggregated data, with the farm power in MW")
+    command.add_argument(
+        "--turbine-output-dir", help="Directory to write the imputed per-turbine data to, runs without the cache"
+    )
+    command.add_argument(
+        "--similar-turbines", help="Parquet file of similar turbines, computed from the data if not given"
+    )
+    command.add_argument("--days", type=int, nargs="+", help="Days to process, all days if not given")
+    command.add_argument("--max-workers", type=int, help="Size of the process pool")
+    command.set_defaults(func=preprocess)
+
+    command = commands.add_parser("features", help="Add the features of the config to aggregated data")
+    command.add_argument("input", help="Parquet file written by preprocess")
+    command.add_argument("output", help="Parquet file of the data with features")
+    command.set_defaults(func=features)
+
+    command = commands.add_parser("train", help="Train a model on data with features")
+    command.add_argument("input", help="Parquet file written by features")
+    command.add_argument("model_path", help="Path to save the model to with joblib")
+    command.add_argument("--model", default="xgboost", choices=["linear_regression", "xgboost", "lightgbm"])
+    command.add_argument("--params", default="{}", help="Hyperparameters as JSON, e.g. '{\"max_depth\": 6}'")
+    command.add_argument("--target", default="Patv_imputed", help="Column to forecast")
+    command.add_argument("--features", nargs="+", help="Feature columns, all features of the config if not given")
+    command.add_argument("--n-threads", type=int, default=1, help="Threads of xgboost and lightgbm")
+    command.set_defaults(func=train)
+
+    command = commands.add_parser("predict", help="Predict data with features with a trained model")
+    command.add_argument("model_path", help="Model saved by train")
+    command.add_argument("input", help="Parquet file written by features")
+    command.add_argument("--output", help="Parquet file of the predictions in the format of predictions.parquet")
+    command.add_argument("--archive", help="Predictions archive to append the predictions to")
+    command.add_argument("--name", help="Model name of the prediction column pred_<name>, the file name if not given")
+    command.add_argument("--set", default="val", help="Set of the predictions, e.g. train or val")
+    command.add_argument("--target", default="Patv_imputed", help="Column of the actual values")
+    command.add_argument(
+        "--allow-missing", action="store_true", help="Predict rows with missing features (xgboost, lightgbm)"
+    )
+    command.set_defaults(func=predict)
+
+    command = commands.add_parser("serve-frontend", help="Run the streamlit app")
+    command.add_argument("--port", type=int, default=8501)
+    command.set_defaults(func=serve_frontend)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "predict" and not (args.output or args.archive):
+        parser.error("predict needs --output or --archive")
+
+    args.func(args, load_config(args.config))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,117 @@
+import re
+
+import numpy as np
 import pandas as pd
 
+from windfarm_forecast.instrumentation import instrument
+
+
+def to_turbine_matrix(
+    df: pd.DataFrame,
+    value_col: str = "Patv",
+    turbine_col: str = "TurbID",
+    timestamp_col: str = "timestamp",
+    dtype=np.float32,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Scatter a long-format column into a dense turbine x time matrix without pivoting.
+
+    Args:
+        df: DataFrame in long format with one row per (timestamp, turbine)
+        value_col: Name of the column holding the values to scatter
+        turbine_col: Name of the column containing turbine IDs
+        timestamp_col: Name of the column containing timestamps
+        dtype: dtype of the returned matrix
+
+    Returns:
+        Tuple (matrix, turbine_ids, timestamps, turbine_codes, time_codes) where matrix has shape
+        (n_turbines, n_timestamps), turbine_ids and timestamps are the sorted axis labels and
+        turbine_codes/time_codes give the matrix position of every row of df.
+    """
+    turbine_codes, turbine_ids = pd.factorize(df[turbine_col], sort=True)
+    time_codes, timestamps = pd.factorize(df[timestamp_col], sort=True)
+
+    # Same contract as DataFrame.pivot: each cell may only be filled once
+    flat_codes = turbine_codes.astype(np.int64) * len(timestamps) + time_codes
+    # Adjacent equal codes after sorting, without a count array over all cells of the matrix
+    if (np.diff(np.sort(flat_codes)) == 0).any():
+        raise ValueError(f"Duplicate ({timestamp_col}, {turbine_col}) entries, cannot build turbine matrix")
+
+    matrix = np.full((len(turbine_ids), len(timestamps)), np.nan, dtype=dtype)
+    matrix[turbine_codes, time_codes] = df[value_col].to_numpy(dtype=dtype, na_value=np.nan)
+
+    return matrix, np.asarray(turbine_ids), np.asarray(timestamps), turbine_codes, time_codes
+
+
+def build_similarity_index(similar_turbines_df: pd.DataFrame, turbine_ids: np.ndarray, n_similar: int) -> np.ndarray:
+    """
+    Build a fixed-width lookup of the most similar turbines for every turbine.
+
+    Args:
+        similar_turbines_df: DataFrame with columns [turbine_id, rank, similar_turbine_id, correlation]
+        turbine_ids: Turbine IDs defining the row/position order of the index
+        n_similar: Number of similar turbines to keep per turbine
+
+    Returns:
+        Integer array of shape (len(turbine_ids), <= n_similar) holding positions into turbine_ids,
+        padded with -1 where fewer similar turbines are known.
+    """
+    if similar_turbines_df.empty or n_similar <= 0:
+        return np.full((len(turbine_ids), max(n_similar, 0)), -1, dtype=np.intp)
+
+    # Keep the n_similar best ranked neighbours of each turbine
+    top = similar_turbines_df.sort_values(["turbine_id", "rank"], kind="stable")
+    slot = top.groupby("turbine_id").cumcount().to_numpy()
+    top = top[slot < n_similar]
+    slot = slot[slot < n_similar]
 
+    # No need for more columns than the best covered turbine has neighbours
+    index = np.full((len(turbine_ids), min(n_similar, slot.max() + 1)), -1, dtype=np.intp)
+
+    # Translate turbine IDs to matrix positions, dropping turbines that are not in the data
+    turbine_ids = pd.Index(turbine_ids)
+    rows = turbine_ids.get_indexer(top["turbine_id"])
+    cols = turbine_ids.get_indexer(top["similar_turbine_id"])
+    known = (rows >= 0) & (cols >= 0)
+    index[rows[known], slot[known]] = cols[known]
+
+    return index
+
+
+def similar_turbines_mean(
+    power: np.ndarray, similar_index: np.ndarray, turbine_pos: np.ndarray, time_pos: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Mean power of the similar turbines for a batch of (turbine, time) cells of a turbine x time matrix.
+
+    Args:
+        power: Array of shape (n_turbines, n_timestamps), e.g. from to_turbine_matrix or TensorStore.get
+        similar_index: Similar turbines lookup from build_similarity_index in the row order of power
+        turbine_pos: Row positions of the cells
+        time_pos: Column positions of the cells
+
+    Returns:
+        Tuple (means, has_neighbours): the NaN-aware mean power of the similar turbines of every cell
+        (NaN if all of them are missing) and whether the turbine of the cell has any similar turbines
+    """
+    # Gather the power of the similar turbines of every cell
+    neighbours = similar_index[turbine_pos]
+    has_neighbours = (neighbours >= 0).any(axis=1)
+    similar_powers = power[np.where(neighbours >= 0, neighbours, 0), time_pos[:, None]]
+    similar_powers[neighbours < 0] = np.nan
+
+    # Calculate mean power of similar turbines (excluding NaN), NaN if all of them are missing
+    n_valid = np.count_nonzero(~np.isnan(similar_powers), axis=1)
+    power_sum = np.nansum(similar_powers, axis=1, dtype=np.float64)
+    means = np.divide(power_sum, n_valid, out=np.full(len(turbine_pos), np.nan), where=n_valid > 0)
+
+    return means, has_neighbours
+
+
+@instrument()
 def impute_power_output(df: pd.DataFrame, similar_turbines_df: pd.DataFrame, n_similar: int = 10) -> pd.DataFrame:
     """
-    Iimpute the power output using the average of similar turbines.
+    Impute the power output using the average of similar turbines.
 
     Args:
         df: DataFrame containing power output data
@@ -11,57 +119,246 @@ def impute_power_output(df: pd.DataFrame, similar_turbines_df: pd.DataFrame, n_s
         n_similar: Number of similar turbines to use for imputation
 
     Returns:
-        DataFrame with imputed power values
+        DataFrame with a RangeIndex and the imputed power values in the Patv_imputed column, also
+        added (as a copy of Patv) when no row is flagged for imputation
     """
     df = df.copy()
+    patv_imputed = df["Patv"].to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
 
-    # Early exit if no imputation needed
-    if not (df["impute_day_patv"] == 1).any():
-        print("No values to impute")
+    # Early exit if no imputation needed, Patv_imputed is then a copy of Patv
+    impute_mask = (df["impute_day_patv"] == 1).to_numpy()
+    if not impute_mask.any():
+        df = df.reset_index(drop=True)
+        df["Patv_imputed"] = patv_imputed
         return df
 
-    # Prepare similar turbines lookup
-    similar_lookup = (
-        similar_turbines_df.nsmallest(n_similar, "rank", keep="all")
-        .groupby("turbine_id")["similar_turbine_id"]
-        .agg(list)
-        .to_dict()
-    )
+    # Dense turbine x time matrix of power values and the fixed similar turbines lookup
+    power, turbine_ids, _, turbine_codes, time_codes = to_turbine_matrix(df)
+    similar_index = build_similarity_index(similar_turbines_df, turbine_ids, n_similar)
+
+    # Gather-mean of the similar turbines for all cells needing imputation at once
+    rows = np.flatnonzero(impute_mask)
+    imputed_values, has_neighbours = similar_turbines_mean(power, similar_index, turbine_codes[rows], time_codes[rows])
+
+    # Write back by position; turbines without any similar turbines keep their original value
+    patv_imputed[rows[has_neighbours]] = imputed_values[has_neighbours]
+
+    df = df.reset_index(drop=True)
+    df["Patv_imputed"] = patv_imputed
+
+    return df
+
+
+# Feature names understood by FeatureGenerator, e.g. Patv_lag_6, Wspd_roll_mean_36, Wspd_cubed, Wdir_sin
+FEATURE_PATTERNS = {
+    "lag": re.compile(r"^(?P<column>.+)_lag_(?P<window>\d+)$"),
+    "roll": re.compile(r"^(?P<column>.+)_roll_(?P<stat>mean|std|min|max|sum)_(?P<window>\d+)$"),
+    "cubed": re.compile(r"^(?P<column>.+)_cubed$"),
+    "sin": re.compile(r"^(?P<column>.+)_sin$"),
+    "cos": re.compile(r"^(?P<column>.+)_cos$"),
+}
+
 
-    # Create a pivot table of power values
-    power_pivot = df.pivot(index="timestamp", columns="TurbID", values="Patv")
+def expand_feature_spec(spec: dict) -> list[str]:
+    """
+    Expand the compact feature spec of the config into feature names.
+
+    Args:
+        spec: Dict with optional keys
+            - lags: {column: [lag, ...]}
+            - rolling: {column: {"windows": [window, ...], "stats": ["mean", "std", "min", "max", "sum"]}}
+            - cubed: [column, ...] (e.g. wind power from Wspd)
+            - cyclical: [column, ...] (angles in degrees, encoded as sin and cos)
+
+    Returns:
+        List of feature names
+    """
+    features = []
+    for column, lags in spec.get("lags", {}).items():
+        features += [f"{column}_lag_{lag}" for lag in lags]
+    for column, rolling in spec.get("rolling", {}).items():
+        features += [f"{column}_roll_{stat}_{window}" for window in rolling["windows"] for stat in rolling["stats"]]
+    features += [f"{column}_cubed" for column in spec.get("cubed", [])]
+    for column in spec.get("cyclical", []):
+        features += [f"{column}_sin", f"{column}_cos"]
+
+    return features
+
+
+def parse_feature(feature: str) -> tuple[str, str, str | None, int]:
+    """
+    Parse a feature name.
+
+    Args:
+        feature: Feature name, e.g. "Wspd_roll_mean_36"
+
+    Returns:
+        Tuple (kind, column, stat, window) with window 0 for pointwise features
+    """
+    for kind, pattern in FEATURE_PATTERNS.items():
+        match = pattern.match(feature)
+        if match:
+            groups = match.groupdict()
+            return kind, groups["column"], groups.get("stat"), int(groups.get("window") or 0)
+
+    raise ValueError(f"Unknown feature '{feature}', expected one of the patterns {list(FEATURE_PATTERNS)}")
+
+
+def _lag(values: np.ndarray, window: int) -> np.ndarray:
+    """values shifted by window steps (like Series.shift)."""
+    out = np.full(len(values), np.nan)
+    if window < len(values):
+        out[window:] = values[: len(values) - window]
+    return out
+
+
+def _window_extreme(values: np.ndarray, window: int, ufunc: np.ufunc) -> np.ndarray:
+    """
+    Minimum or maximum of all windows of length window in O(n) (van Herk/Gil-Werman), NaN if the window has NaN.
+    """
+    # Running extremes from the start and from the end of blocks of length window
+    n_blocks = -(-len(values) // window)
+    padded = np.full(n_blocks * window, np.nan)
+    padded[: len(values)] = values
+    blocks = padded.reshape(n_blocks, window)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    # Every window spans the end of one block and the start of the next
+    n_windows = len(values) - window + 1
+    return ufunc(suffix[:n_windows], prefix[window - 1 : window - 1 + n_windows])
+
+
+def _cumulative_sums(values: np.ndarray) -> dict:
+    """
+    Cumulative sums of the valid values (shifted by their mean to limit cancellation), their squares
+    and the number of valid values, each with a leading 0, shared by all rolling windows of a column.
+    """
+    valid = ~np.isnan(values)
+    shift = values[valid].mean() if valid.any() else 0.0
+    centered = np.where(valid, values - shift, 0.0)
 
-    # Create a pivot table of imputation flags
-    impute_pivot = df.pivot(index="timestamp", columns="TurbID", values="impute_day_patv")
+    def cumsum(x):
+        return np.concatenate([[0.0], np.cumsum(x)])
+
+    return {"shift": shift, "count": cumsum(valid), "sum": cumsum(centered), "sumsq": cumsum(centered**2)}
+
+
+def _rolling(values: np.ndarray, stat: str, window: int, sums: dict | None = None) -> np.ndarray:
+    """
+    Trailing rolling statistic (like Series.rolling(window).<stat>()), NaN unless all window values are present.
+    """
+    out = np.full(len(values), np.nan)
+    if window > len(values) or window < 1:
+        return out
+
+    if stat in ("min", "max"):
+        out[window - 1 :] = _window_extreme(values, window, np.minimum if stat == "min" else np.maximum)
+        return out
+
+    # Window sums as differences of cumulative sums
+    sums = _cumulative_sums(values) if sums is None else sums
+    shift = sums["shift"]
+    complete = sums["count"][window:] - sums["count"][:-window] == window
+    total = sums["sum"][window:] - sums["sum"][:-window]
+    if stat == "sum":
+        result = total + shift * window
+    elif stat == "mean":
+        result = total / window + shift
+    elif window > 1:
+        # Sample standard deviation (ddof=1)
+        variance = (sums["sumsq"][window:] - sums["sumsq"][:-window] - total**2 / window) / (window - 1)
+        result = np.sqrt(np.maximum(variance, 0.0))
+    else:
+        result = np.nan
+
+    out[window - 1 :] = np.where(complete, result, np.nan)
+    return out
+
+
+def _compute_feature(
+    values: np.ndarray, kind: str, stat: str | None, window: int, sums: dict | None = None
+) -> np.ndarray:
+    if kind == "lag":
+        return _lag(values, window)
+    if kind == "roll":
+        return _rolling(values, stat, window, sums)
+    if kind == "cubed":
+        return values**3
+    return np.sin(np.deg2rad(values)) if kind == "sin" else np.cos(np.deg2rad(values))
+
+
+class FeatureGenerator:
+    """
+    Vectorized lag, rolling, wind power and cyclical features of time-ordered data.
+
+    All features are computed with cumulative sum or strided kernels on NumPy arrays and returned as
+    float32. Computed features are cached per source column: when the same generator is called again
+    on data whose history is unchanged (e.g. the same frame with new rows appended), only the values
+    of the new rows are computed.
+    """
 
-    # Get locations needing imputation
-    impute_mask = impute_pivot == 1
+    def __init__(self, spec: dict | list[str]):
+        self.features = expand_feature_spec(spec) if isinstance(spec, dict) else list(spec)
+        self._parsed = {feature: parse_feature(feature) for feature in self.features}
+        # column -> (source values, {feature: values})
+        self._cache = {}
 
-    # Iterate through turbines that need imputation (should be much fewer iterations)
-    turbines_to_impute = impute_mask.columns[impute_mask.any()]
+    def _cached_values(self, column: str, values: np.ndarray) -> tuple[dict, int]:
+        """Cached features of column and the number of rows they are valid for."""
+        if column not in self._cache:
+            return {}, 0
+        cached_values, features = self._cache[column]
+        n_cached = len(cached_values)
+        if n_cached > len(values) or not np.array_equal(cached_values, values[:n_cached], equal_nan=True):
+            return {}, 0
+        return features, n_cached
 
-    for turbine_id in turbines_to_impute:
-        # Get similar turbines for this turbine
-        similar_turbines = similar_lookup.get(turbine_id, [])
-        if not similar_turbines:
-            continue
+    @instrument()
+    def transform(self, df: pd.DataFrame, features: list[str] | None = None) -> pd.DataFrame:
+        """
+        Compute the requested features for the rows of df, which must be ordered by time.
 
-        # Get power values of similar turbines
-        similar_powers = power_pivot[similar_turbines]
+        Args:
+            df: DataFrame with the source columns
+            features: Subset of the features of the generator that the model requests, all if None
 
-        # Calculate mean power of similar turbines (excluding NaN)
-        imputed_values = similar_powers.mean(axis=1)
+        Returns:
+            DataFrame with one float32 column per requested feature and the index of df
+        """
+        features = self.features if features is None else features
+        unknown = [feature for feature in features if feature not in self._parsed]
+        if unknown:
+            raise ValueError(f"Features {unknown} are not part of the spec of this generator")
 
-        # Get timestamps where this turbine needs imputation
-        timestamps_to_impute = impute_mask.index[impute_mask[turbine_id]]
+        # Group the requested features by source column
+        by_column = {}
+        for feature in features:
+            by_column.setdefault(self._parsed[feature][1], []).append(feature)
 
-        # Update the power pivot table with imputed values
-        power_pivot.loc[timestamps_to_impute, turbine_id] = imputed_values.loc[timestamps_to_impute]
+        output = {}
+        for column, column_features in by_column.items():
+            values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            cached, n_cached = self._cached_values(column, values)
+            computed = {}
+            sums = None
 
-    # Convert pivot table back to original format
-    df_imputed = power_pivot.reset_index().melt(id_vars=["timestamp"], var_name="TurbID", value_name="Patv_imputed")
+            for feature in column_features:
+                kind, _, stat, window = self._parsed[feature]
+                if feature in cached:
+                    # Only compute the new rows, with the history the kernel needs as context
+                    context = window if kind == "lag" else max(window - 1, 0)
+                    start = max(n_cached - context, 0)
+                    tail = _compute_feature(values[start:], kind, stat, window)[n_cached - start :]
+                    computed[feature] = np.concatenate([cached[feature], tail.astype(np.float32)])
+                else:
+                    if kind == "roll" and stat not in ("min", "max") and sums is None:
+                        sums = _cumulative_sums(values)
+                    computed[feature] = _compute_feature(values, kind, stat, window, sums).astype(np.float32)
+                output[feature] = computed[feature]
 
-    # Merge back with original dataframe to keep all columns including original Patv
-    df_imputed = df.merge(df_imputed, on=["timestamp", "TurbID"], how="left")
+            # Cached features not requested now stay valid only if no rows were added
+            kept = cached if n_cached == len(values) else {}
+            self._cache[column] = (values.copy(), {**kept, **computed})
 
-    return df_imputed
+        return pd.DataFrame({feature: output[feature] for feature in features}, index=df.index)
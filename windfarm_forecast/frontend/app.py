@@ -1,6 +1,7 @@
 import sys
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import streamlit as st
@@ -9,10 +10,24 @@ import streamlit as st
 project_root = Path(__file__).parents[2]
 sys.path.append(str(project_root))
 
+from windfarm_forecast.predictions_archive import (  # noqa: E402
+    archive_models,
+    archive_time_range,
+    archive_version,
+    read_predictions,
+)
 
-def load_data():
-    """Load the predictions data"""
-    file_path = project_root / "data/modified/predictions/predictions.parquet"
+PREDICTIONS_PATH = project_root / "data/modified/predictions/predictions.parquet"
+# Partitioned archive of write_predictions, preferred over PREDICTIONS_PATH when it exists
+PREDICTIONS_ARCHIVE = project_root / "data/modified/predictions/archive"
+
+# Upper bound of points per plot, enough for a full-width chart without visible loss of peaks
+MAX_PLOT_POINTS = 4000
+
+
+@st.cache_resource(max_entries=1)
+def _read_predictions(file_path, mtime):
+    """Read and parse the predictions file, cached per (path, modification time). Do not mutate the result."""
     df = pd.read_parquet(file_path)
     # Ensure the index is datetime and drop any NaT values
     df.index = pd.to_datetime(df.index)
@@ -20,10 +35,58 @@ def load_data():
     return df
 
 
-def create_plot(data, model_col, title="Wind Farm Power Output Predictions"):
+def load_data():
+    """Load the predictions data, only re-read when the file has changed since the last rerun"""
+    return _read_predictions(str(PREDICTIONS_PATH), PREDICTIONS_PATH.stat().st_mtime)
+
+
+@st.cache_resource(max_entries=16)
+def _read_archive(root, version, set_name, start, end, models):
+    """Read a set, date range and model columns of the archive, cached per archive version. Do not mutate the result."""
+    return read_predictions(root, set_name, start, end, list(models)).dropna(subset=["actual"])
+
+
+@st.cache_resource(max_entries=4)
+def _read_archive_time_range(root, version, set_name):
+    """Time range of a set from the file footers, cached per archive version"""
+    return archive_time_range(root, set_name)
+
+
+def downsample_minmax(data, columns, max_points=MAX_PLOT_POINTS):
+    """
+    Downsample a time-ordered DataFrame to at most max_points rows keeping the min/max envelope.
+
+    The rows are split into equally sized buckets and, for every column, the rows holding the
+    minimum and the maximum of each bucket are kept, so peaks stay visible in the plot. Data with
+    at most max_points rows (e.g. a zoomed-in date range) is returned at full resolution.
+    """
+    n_rows = len(data)
+    n_buckets = (max_points - 2) // (2 * len(columns))
+    if n_rows <= max_points or n_buckets == 0:
+        return data
+
+    # Pad to a whole number of buckets and reshape to (n_buckets, bucket_size)
+    bucket_size = -(-n_rows // n_buckets)
+    positions = [np.array([0, n_rows - 1])]
+    for col in columns:
+        values = np.full(n_buckets * bucket_size, np.nan)
+        values[:n_rows] = data[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        buckets = values.reshape(n_buckets, bucket_size)
+        offsets = np.arange(n_buckets) * bucket_size
+        positions.append(offsets + np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1))
+        positions.append(offsets + np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1))
+
+    positions = np.unique(np.concatenate(positions))
+    return data.iloc[positions[positions < n_rows]]
+
+
+def create_plot(data, model_col, title="Wind Farm Power Output Predictions", max_points=MAX_PLOT_POINTS):
     """
     Creates a Plotly figure comparing predicted vs actual wind farm power output values.
+    Long time ranges are downsampled to at most max_points points per figure.
     """
+    data = downsample_minmax(data, ["actual", model_col], max_points)
+
     # Create DataFrame for plotting
     plot_df = pd.DataFrame({"Time": data.index, "Actual": data["actual"], "Predicted": data[model_col]})
 
@@ -91,15 +154,94 @@ def calculate_metrics(data, prediction_col):
     return mae, rmse
 
 
+class MetricsIndex:
+    """
+    Prefix sums of the absolute and squared errors of every pred_* column per set.
+
+    MAE and RMSE of any date range are computed from two prefix sum lookups per model instead of a
+    scan over the rows in the range. NaN predictions are skipped like in calculate_metrics.
+    """
+
+    def __init__(self, data):
+        self.models = [col for col in data.columns if col.startswith("pred_")]
+        self._sets = {}
+
+        for set_name, set_data in data.groupby("set"):
+            set_data = set_data.sort_index()
+            errors = set_data[self.models].to_numpy(dtype=np.float64, na_value=np.nan)
+            errors = errors - set_data["actual"].to_numpy(dtype=np.float64, na_value=np.nan)[:, None]
+            valid = ~np.isnan(errors)
+            errors = np.where(valid, errors, 0.0)
+
+            self._sets[set_name] = (
+                set_data.index.to_numpy(),
+                self._prefix_sum(np.abs(errors)),
+                self._prefix_sum(errors**2),
+                self._prefix_sum(valid.astype(np.float64)),
+            )
+
+    @staticmethod
+    def _prefix_sum(values):
+        """Cumulative sum over rows with a leading row of zeros: the sum over rows [i, j) is cum[j] - cum[i]"""
+        return np.concatenate([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+
+    def metrics(self, set_name, start, end):
+        """
+        MAE and RMSE of all models for the rows of a set with start <= timestamp <= end.
+
+        Returns:
+            DataFrame indexed by model column with columns mae and rmse
+        """
+        timestamps, abs_sum, squared_sum, count = self._sets[set_name]
+        first = np.searchsorted(timestamps, np.datetime64(pd.Timestamp(start)), side="left")
+        last = np.searchsorted(timestamps, np.datetime64(pd.Timestamp(end)), side="right")
+
+        n = count[last] - count[first]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mae = (abs_sum[last] - abs_sum[first]) / n
+            rmse = np.sqrt(np.maximum(squared_sum[last] - squared_sum[first], 0.0) / n)
+
+        return pd.DataFrame({"mae": mae, "rmse": rmse}, index=pd.Index(self.models, name="model"))
+
+
+@st.cache_resource(max_entries=1)
+def _build_metrics_index(_data, data_id):
+    """Build the MetricsIndex once per loaded DataFrame (the DataFrame is kept alive so its id stays unique)"""
+    return _data, MetricsIndex(_data)
+
+
+def get_metrics_index(data):
+    """Get the cached MetricsIndex of the loaded data"""
+    _, metrics_index = _build_metrics_index(data, id(data))
+    return metrics_index
+
+
+@st.cache_resource(max_entries=4)
+def _read_archive_models(root, version, set_name):
+    """Model columns of a set from the file footers, cached per archive version"""
+    return archive_models(root, set_name)
+
+
+@st.cache_resource(max_entries=16)
+def _build_archive_metrics_index(root, version, set_name, model):
+    """Build the MetricsIndex of one model of a set of the archive once per archive version"""
+    return MetricsIndex(read_predictions(root, set_name, models=[model]).dropna(subset=["actual"]))
+
+
+def get_archive_metrics(root, version, set_name, start, end):
+    """MAE and RMSE of all models of a set of the archive, reading only one model column at a time"""
+    models = _read_archive_models(root, version, set_name)
+    return pd.concat(
+        [_build_archive_metrics_index(root, version, set_name, model).metrics(set_name, start, end) for model in models]
+    )
+
+
 def main():
     st.set_page_config(page_title="Wind Farm Predictions", layout="wide")
 
     st.title("Wind Farm Power Output Predictions")
 
     try:
-        # Load data
-        data = load_data()
-
         # Dataset selector
         dataset = st.selectbox(
             "Select Dataset",
@@ -107,21 +249,28 @@ def main():
             key="dataset_selector",
             format_func=lambda x: "Training Set" if x == "Training" else "Validation Set",
         )
-
-        # Filter data based on selected dataset
         dataset_value = "train" if dataset == "Training" else "val"
-        mask = data["set"] == dataset_value
-        filtered_data = data[mask].copy()
 
         # Model selector
         model = st.selectbox("Select Model", ["Linear Regression", "XGBoost"], key="model_selector")
 
         prediction_col = "pred_linear_regression" if model == "Linear Regression" else "pred_xgboost"
 
-        # Date range selector
-        min_date = filtered_data.index.min().date()
-        max_date = filtered_data.index.max().date()
+        if PREDICTIONS_ARCHIVE.exists():
+            # Only the footers are read here, the data of the selection is read below
+            archive = (str(PREDICTIONS_ARCHIVE), archive_version(PREDICTIONS_ARCHIVE))
+            time_range = _read_archive_time_range(*archive, dataset_value)
+            min_date, max_date = time_range[0].date(), time_range[1].date()
+        else:
+            archive = None
+            # Load data and filter it based on the selected dataset
+            data = load_data()
+            mask = data["set"] == dataset_value
+            filtered_data = data[mask].copy()
+            min_date = filtered_data.index.min().date()
+            max_date = filtered_data.index.max().date()
 
+        # Date range selector
         date_range = st.date_input(
             "Select Date Range", value=(min_date, max_date), min_value=min_date, max_value=max_date
         )
@@ -133,15 +282,22 @@ def main():
             end_date = end_date.replace(hour=23, minute=59)
 
             # Filter data based on selected dates
-            mask = (filtered_data.index >= start_date) & (filtered_data.index <= end_date)
-            display_data = filtered_data[mask]
+            if archive:
+                display_data = _read_archive(*archive, dataset_value, start_date, end_date, (prediction_col,))
+            else:
+                mask = (filtered_data.index >= start_date) & (filtered_data.index <= end_date)
+                display_data = filtered_data[mask]
 
             # Create and display plot
             fig = create_plot(display_data, prediction_col, f"{dataset} Set: Wind Farm Power Output - {model} Model")
             st.plotly_chart(fig, use_container_width=True)
 
-            # Calculate and display metrics
-            mae, rmse = calculate_metrics(display_data, prediction_col)
+            # Look up the metrics of all models for the selected range
+            if archive:
+                metrics = get_archive_metrics(*archive, dataset_value, start_date, end_date)
+            else:
+                metrics = get_metrics_index(data).metrics(dataset_value, start_date, end_date)
+            mae, rmse = metrics.loc[prediction_col, ["mae", "rmse"]]
 
             # Display metrics in columns
             col1, col2 = st.columns(2)
@@ -150,9 +306,13 @@ def main():
             with col2:
                 st.metric("Root Mean Square Error", f"{rmse:.2f} MW")
 
+            # Compare all models on the selected range
+            st.subheader("Model Comparison")
+            st.dataframe(metrics.rename(columns={"mae": "MAE (MW)", "rmse": "RMSE (MW)"}).round(2))
+
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
-        st.info("Please ensure the predictions.parquet file is in the correct location and format.")
+        st.info("Please ensure the predictions archive or predictions.parquet is in the correct location and format.")
 
 
 if __name__ == "__main__":
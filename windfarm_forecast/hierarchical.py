@@ -0,0 +1,248 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from windfarm_forecast.instrumentation import instrument
+from windfarm_forecast.sweep import build_model
+
+
+def cluster_turbines(similar_turbines_df: pd.DataFrame, n_clusters: int) -> pd.Series:
+    """
+    Group turbines with correlated power output, using the similarities of get_top_similar_turbines.
+
+    Pairs listed in similar_turbines_df have the distance 1 - correlation, all other pairs the
+    maximum distance 2, and the turbines are merged by average linkage.
+
+    Args:
+        similar_turbines_df: DataFrame with columns [turbine_id, rank, similar_turbine_id, correlation]
+        n_clusters: Number of clusters
+
+    Returns:
+        Series of cluster labels 0..n_clusters-1 indexed by turbine_id
+    """
+    from sklearn.cluster import AgglomerativeClustering
+
+    turbine_ids = np.union1d(similar_turbines_df["turbine_id"], similar_turbines_df["similar_turbine_id"])
+    index = pd.Index(turbine_ids)
+    rows = index.get_indexer(similar_turbines_df["turbine_id"])
+    cols = index.get_indexer(similar_turbines_df["similar_turbine_id"])
+
+    distance = np.full((len(turbine_ids), len(turbine_ids)), 2.0)
+    distance[rows, cols] = 1.0 - similar_turbines_df["correlation"].to_numpy()
+    distance = np.minimum(distance, distance.T)
+    np.fill_diagonal(distance, 0.0)
+
+    labels = AgglomerativeClustering(n_clusters=n_clusters, metric="precomputed", linkage="average").fit_predict(
+        distance
+    )
+    return pd.Series(labels, index=pd.Index(turbine_ids, name="turbine_id"), name="cluster")
+
+
+def reconcile(turbine_forecasts: np.ndarray, farm_forecast: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Make per-turbine forecasts coherent with the farm level.
+
+    Without farm_forecast the farm forecast is the sum of the turbines (bottom-up). With a separate
+    farm-level forecast (e.g. of a model trained on aggregate_across_turbines), the turbines are
+    scaled proportionally to their non-negative forecasts so that they sum to it.
+
+    Args:
+        turbine_forecasts: Array of shape (n_turbines, n_timestamps), NaN for turbines without forecast
+        farm_forecast: Array of shape (n_timestamps,) to reconcile to, bottom-up if None
+
+    Returns:
+        Tuple (turbine_forecasts, farm_forecast) of the reconciled forecasts
+    """
+    has_forecast = ~np.isnan(turbine_forecasts)
+    bottom_up = np.where(has_forecast.any(axis=0), np.nansum(turbine_forecasts, axis=0), np.nan)
+    if farm_forecast is None:
+        return turbine_forecasts, bottom_up
+
+    farm_forecast = np.asarray(farm_forecast, dtype=np.float64)
+    positive = np.clip(np.nan_to_num(turbine_forecasts), 0.0, None)
+    total = positive.sum(axis=0)
+    # Equal shares at timestamps where no turbine has a positive forecast
+    equal = has_forecast / np.maximum(has_forecast.sum(axis=0), 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.where(total > 0, positive / total, equal)
+
+    return np.where(has_forecast, shares * farm_forecast, np.nan), farm_forecast
+
+
+def _fit_group(model_name: str, params: dict, n_threads: int, X: np.ndarray, y: np.ndarray):
+    """Fit the model of one turbine or cluster (runs in a worker process)."""
+    return build_model(model_name, params, n_threads).fit(X, y)
+
+
+class HierarchicalForecaster:
+    """
+    One lightweight model per turbine (or per cluster of similar turbines) and farm-level reconciliation.
+
+    The default "ridge" model fits all groups at once: the normal equations of every group are
+    accumulated and solved in one batched call, and all turbines are predicted with one einsum over
+    the stacked coefficients. "xgboost" and "lightgbm" models are fitted across a process pool and
+    predict with one call per group covering all its turbines and timestamps. Groups without valid
+    training rows are left unfitted (NaN coefficients, or no model in models_) and forecast as NaN.
+    """
+
+    def __init__(
+        self,
+        feature_cols: list[str],
+        target_col: str = "Patv_imputed",
+        model: str = "ridge",
+        params: dict | None = None,
+        clusters: pd.Series | None = None,
+        alpha: float = 1.0,
+        max_workers: int | None = None,
+        n_threads: int = 1,
+        turbine_col: str = "TurbID",
+        timestamp_col: str = "timestamp",
+    ):
+        """
+        Args:
+            feature_cols: Per-turbine feature columns, e.g. ["Wspd", "Wdir", "Etmp"]
+            target_col: Column to forecast
+            model: "ridge", or a model name of build_model fitted per group across a process pool
+            params: Hyperparameters of the pool models
+            clusters: Cluster label per turbine ID (e.g. from cluster_turbines), one model per turbine if None
+            alpha: L2 penalty of the ridge models on standardized features
+            max_workers: Size of the process pool, number of cpus if None
+            n_threads: Threads per pool model
+            turbine_col: Name of the column containing turbine IDs
+            timestamp_col: Name of the column containing timestamps
+        """
+        self.feature_cols = list(feature_cols)
+        self.target_col = target_col
+        self.model = model
+        self.params = params or {}
+        self.clusters = clusters
+        self.alpha = alpha
+        self.max_workers = max_workers
+        self.n_threads = n_threads
+        self.turbine_col = turbine_col
+        self.timestamp_col = timestamp_col
+
+    def _groups(self, turbines: pd.Series) -> np.ndarray:
+        """Group position of every row, -1 for turbines without a model."""
+        labels = turbines if self.clusters is None else turbines.map(self.clusters)
+        return pd.Index(self.groups_).get_indexer(labels)
+
+    def _features(self, df: pd.DataFrame) -> np.ndarray:
+        return df[self.feature_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    @instrument()
+    def fit(self, df: pd.DataFrame) -> "HierarchicalForecaster":
+        """
+        Fit the models of all groups.
+
+        Args:
+            df: Training data in long format with one row per (timestamp, turbine)
+
+        Returns:
+            The fitted forecaster
+        """
+        labels = df[self.turbine_col] if self.clusters is None else df[self.turbine_col].map(self.clusters)
+        self.groups_ = np.sort(labels.dropna().unique())
+
+        X = self._features(df)
+        y = df[self.target_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        group = self._groups(df[self.turbine_col])
+        valid = np.isfinite(X).all(axis=1) & np.isfinite(y) & (group >= 0)
+        X, y, group = X[valid], y[valid], group[valid]
+
+        # Rows of each group as contiguous slices
+        order = np.argsort(group, kind="stable")
+        X, y, group = X[order], y[order], group[order]
+        bounds = np.searchsorted(group, np.arange(len(self.groups_) + 1))
+
+        if self.model == "ridge":
+            self._fit_ridge(X, y, bounds)
+        else:
+            # Groups without rows are not submitted, they have no model like the NaN coefficients of ridge
+            with ProcessPoolExecutor(max_workers=self.max_workers or os.cpu_count()) as pool:
+                futures = [
+                    pool.submit(_fit_group, self.model, self.params, self.n_threads, X[first:last], y[first:last])
+                    if last > first
+                    else None
+                    for first, last in zip(bounds[:-1], bounds[1:])
+                ]
+                self.models_ = [None if future is None else future.result() for future in futures]
+
+        return self
+
+    def _fit_ridge(self, X: np.ndarray, y: np.ndarray, bounds: np.ndarray) -> None:
+        """Solve the ridge normal equations of all groups in one batched call."""
+        self.mean_ = X.mean(axis=0)
+        self.scale_ = X.std(axis=0)
+        self.scale_[self.scale_ == 0] = 1.0
+        Xs = np.column_stack([(X - self.mean_) / self.scale_, np.ones(len(X))])
+
+        n_groups, n_params = len(self.groups_), Xs.shape[1]
+        gram = np.zeros((n_groups, n_params, n_params))
+        moments = np.zeros((n_groups, n_params))
+        for i, (first, last) in enumerate(zip(bounds[:-1], bounds[1:])):
+            gram[i] = Xs[first:last].T @ Xs[first:last]
+            moments[i] = Xs[first:last].T @ y[first:last]
+
+        # The intercept is not penalized, groups without rows get NaN coefficients
+        penalty = np.diag(np.r_[np.full(n_params - 1, self.alpha), 0.0])
+        fitted = np.diff(bounds) > 0
+        self.coef_ = np.full((n_groups, n_params), np.nan)
+        self.coef_[fitted] = np.linalg.solve(gram[fitted] + penalty, moments[fitted][..., None])[..., 0]
+
+    def predict_rows(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Forecast every row of df with the model of its turbine.
+
+        Args:
+            df: Features in long format
+
+        Returns:
+            Array of shape (len(df),), NaN for rows with missing features or turbines without a model
+        """
+        X = self._features(df)
+        group = self._groups(df[self.turbine_col])
+        predictions = np.full(len(df), np.nan)
+
+        if self.model == "ridge":
+            coef = self.coef_[np.maximum(group, 0)]
+            Xs = (X - self.mean_) / self.scale_
+            predictions = np.einsum("np,np->n", Xs, coef[:, :-1]) + coef[:, -1]
+            predictions[group < 0] = np.nan
+            return predictions
+
+        valid = np.isfinite(X).all(axis=1) & (group >= 0)
+        for i in np.unique(group[valid]):
+            if self.models_[i] is None:
+                continue
+            rows = np.flatnonzero(valid & (group == i))
+            predictions[rows] = self.models_[i].predict(X[rows])
+        return predictions
+
+    @instrument()
+    def predict(self, df: pd.DataFrame, farm_forecast: np.ndarray | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Forecast all turbines and the farm total, reconciled with reconcile().
+
+        Args:
+            df: Features in long format with one row per (timestamp, turbine)
+            farm_forecast: Farm-level forecast per sorted unique timestamp to reconcile to, bottom-up if None
+
+        Returns:
+            Tuple (turbine_forecasts, farm_forecast) of DataFrames with columns [timestamp, TurbID,
+            prediction] and [timestamp, prediction]
+        """
+        turbine_codes, turbine_ids = pd.factorize(df[self.turbine_col], sort=True)
+        time_codes, timestamps = pd.factorize(df[self.timestamp_col], sort=True)
+
+        matrix = np.full((len(turbine_ids), len(timestamps)), np.nan)
+        matrix[turbine_codes, time_codes] = self.predict_rows(df)
+        matrix, farm = reconcile(matrix, farm_forecast)
+
+        turbines = df[[self.timestamp_col, self.turbine_col]].reset_index(drop=True)
+        turbines["prediction"] = matrix[turbine_codes, time_codes]
+        farm = pd.DataFrame({self.timestamp_col: np.asarray(timestamps), "prediction": farm})
+
+        return turbines, farm
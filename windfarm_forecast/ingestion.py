@@ -0,0 +1,138 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from windfarm_forecast.instrumentation import instrument
+
+# Compact dtypes of the raw SDWPF columns
+RAW_DTYPES = {
+    "TurbID": "int16",
+    "Day": "int16",
+    "Tmstamp": "category",
+    "Wspd": "float32",
+    "Wdir": "float32",
+    "Etmp": "float32",
+    "Itmp": "float32",
+    "Ndir": "float32",
+    "Pab1": "float32",
+    "Pab2": "float32",
+    "Pab3": "float32",
+    "Prtv": "float32",
+    "Patv": "float32",
+}
+
+# Schema of the files in the ingested dataset (Day is encoded in the partition directories)
+INGESTED_SCHEMA = pa.schema(
+    [("TurbID", pa.int16()), ("time", pa.dictionary(pa.int16(), pa.string()))]
+    + [(col, pa.float32()) for col, dtype in RAW_DTYPES.items() if dtype == "float32"]
+    + [("timestamp", pa.timestamp("ns"))]
+)
+
+PARTITIONING = ds.partitioning(pa.schema([("Day", pa.int16())]), flavor="hive")
+
+
+def parse_timestamps(chunk: pd.DataFrame, base_date: pd.Timestamp, offsets: dict) -> np.ndarray:
+    """
+    Build the timestamp column of a chunk, parsing every distinct Tmstamp value only once.
+
+    Args:
+        chunk: Raw chunk with Day and categorical Tmstamp columns
+        base_date: Date of Day 1
+        offsets: Lookup of already parsed Tmstamp strings to time-of-day offsets, updated in place
+
+    Returns:
+        Array of datetime64[ns] timestamps
+    """
+    categories = chunk["Tmstamp"].cat.categories
+    new_values = categories[~categories.isin(list(offsets))]
+    if len(new_values):
+        offsets.update(zip(new_values, pd.to_timedelta(new_values + ":00").to_numpy()))
+
+    # Look up the offsets per category and broadcast them to the rows through the category codes
+    category_offsets = np.array([offsets[value] for value in categories], dtype="timedelta64[ns]")
+    time_of_day = category_offsets[chunk["Tmstamp"].cat.codes.to_numpy()]
+    day_offset = (chunk["Day"].to_numpy(dtype=np.int64) - 1) * np.timedelta64(1, "D")
+
+    return np.datetime64(base_date, "ns") + day_offset + time_of_day
+
+
+@instrument()
+def ingest_csv_to_parquet(
+    csv_path: str | Path,
+    output_dir: str | Path,
+    base_date: str = "2020-05-01",
+    chunksize: int = 1_000_000,
+) -> int:
+    """
+    Stream the raw SDWPF csv into a Parquet dataset partitioned by Day.
+
+    The csv is read in chunks with compact dtypes, so memory is bounded by the chunk size and not
+    by the file size. Each chunk adds one file per day it contains (output_dir/Day=<day>/).
+
+    Args:
+        csv_path: Path to the raw csv (e.g. sdwpf_245days_v1.csv)
+        output_dir: Directory of the Parquet dataset, must not contain an earlier ingestion
+        base_date: Date of Day 1, used to build the timestamp column
+        chunksize: Number of csv rows per chunk
+
+    Returns:
+        Number of ingested rows
+    """
+    output_dir = Path(output_dir)
+    if output_dir.exists() and any(output_dir.iterdir()):
+        raise FileExistsError(f"{output_dir} is not empty, refusing to append to an earlier ingestion")
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    base_date = pd.Timestamp(base_date)
+    offsets = {}
+    n_rows = 0
+
+    with pd.read_csv(csv_path, dtype=RAW_DTYPES, chunksize=chunksize) as reader:
+        for chunk_id, chunk in enumerate(reader):
+            chunk["timestamp"] = parse_timestamps(chunk, base_date, offsets)
+            # Same column name as in the preprocessing notebook
+            chunk = chunk.rename(columns={"Tmstamp": "time"})
+
+            for day, day_chunk in chunk.groupby("Day", sort=False):
+                day_dir = output_dir / f"Day={day}"
+                day_dir.mkdir(exist_ok=True)
+                table = pa.Table.from_pandas(day_chunk, schema=INGESTED_SCHEMA, preserve_index=False)
+                pq.write_table(table, day_dir / f"part-{chunk_id:05d}.parquet")
+
+            n_rows += len(chunk)
+
+    return n_rows
+
+
+@instrument()
+def load_ingested(
+    dataset_dir: str | Path,
+    days: list[int] | None = None,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Load (parts of) an ingested Parquet dataset back into a DataFrame.
+
+    Args:
+        dataset_dir: Directory written by ingest_csv_to_parquet
+        days: Days to load, all days if None
+        columns: Columns to load, all columns if None
+
+    Returns:
+        DataFrame sorted by (Day, timestamp, TurbID) with Day as int16
+    """
+    dataset = ds.dataset(dataset_dir, format="parquet", partitioning=PARTITIONING)
+    day_filter = ds.field("Day").isin(days) if days is not None else None
+    if columns is not None and "Day" not in columns:
+        columns = ["Day"] + list(columns)
+
+    df = dataset.to_table(columns=columns, filter=day_filter).to_pandas()
+    # Restore the raw column order with Day next to TurbID
+    df.insert(int("TurbID" in df.columns), "Day", df.pop("Day"))
+    sort_cols = [col for col in ["Day", "timestamp", "TurbID"] if col in df.columns]
+
+    return df.sort_values(sort_cols, kind="stable").reset_index(drop=True)
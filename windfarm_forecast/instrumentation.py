@@ -0,0 +1,266 @@
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Set to 1 to enable the instrumentation at import, e.g. for the nightly runs
+ENV_VAR = "WINDFARM_INSTRUMENTATION"
+
+
+class StageRecord:
+    """Measurements of one run of a stage, filled in when the stage exits."""
+
+    __slots__ = (
+        "name",
+        "parent",
+        "started_at",
+        "wall_seconds",
+        "cpu_seconds",
+        "max_rss_mb",
+        "rss_increase_mb",
+        "tracemalloc_peak_mb",
+        "rows_in",
+        "rows_out",
+        "_peak",
+    )
+
+    def __init__(self, name: str, parent: str | None = None, rows_in: int | None = None):
+        self.name = name
+        self.parent = parent
+        self.started_at = None
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.max_rss_mb = None
+        self.rss_increase_mb = None
+        self.tracemalloc_peak_mb = None
+        self.rows_in = rows_in
+        self.rows_out = None
+        self._peak = 0
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__ if not name.startswith("_")}
+
+
+# Record handed out by stage() while disabled, never stored
+_NULL_RECORD = StageRecord("disabled")
+
+
+class Registry:
+    """Collects the records of all stages run while enabled."""
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.records = []
+        self._open = []
+
+    def reset(self) -> None:
+        self.records = []
+
+
+_REGISTRY = Registry()
+
+
+def _max_rss_mb() -> float | None:
+    """Peak resident set size of the process so far."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return max_rss / 2**20 if sys.platform == "darwin" else max_rss / 2**10
+
+
+def enable(trace_memory: bool = False) -> None:
+    """
+    Start recording stages.
+
+    Args:
+        trace_memory: Whether to also measure the peak of Python allocations per stage with tracemalloc
+            (numpy and pandas buffers included), which slows down allocation heavy code
+    """
+    _REGISTRY.enabled = True
+    _REGISTRY.trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    """Stop recording stages, the records collected so far are kept."""
+    _REGISTRY.enabled = False
+    if _REGISTRY.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _REGISTRY.trace_memory = False
+
+
+def is_enabled() -> bool:
+    return _REGISTRY.enabled
+
+
+def reset() -> None:
+    """Drop all collected records."""
+    _REGISTRY.reset()
+
+
+def records() -> list[dict]:
+    """Records of all finished stages in the order they finished."""
+    return [record.to_dict() for record in _REGISTRY.records]
+
+
+def _update_peaks() -> int:
+    """Carry the traced peak since the last reset into all open stages, then reset it for the next stage."""
+    peak = tracemalloc.get_traced_memory()[1]
+    for record in _REGISTRY._open:
+        record._peak = max(record._peak, peak)
+    tracemalloc.reset_peak()
+    return peak
+
+
+@contextmanager
+def stage(name: str, rows_in: int | None = None):
+    """
+    Measure a block of code as a pipeline stage.
+
+    Records wall time, CPU time, peak RSS of the process (and its increase during the stage), the
+    peak of traced allocations above the level at the start if trace_memory is enabled, and row
+    counts. Stages can be nested, the enclosing stage is stored as parent. While disabled this only
+    costs one attribute lookup.
+
+    Args:
+        name: Name of the stage
+        rows_in: Number of input rows
+
+    Yields:
+        StageRecord, set rows_out on it to record the number of output rows
+    """
+    if not _REGISTRY.enabled:
+        yield _NULL_RECORD
+        return
+
+    parent = _REGISTRY._open[-1].name if _REGISTRY._open else None
+    record = StageRecord(name, parent, rows_in)
+    trace_memory = _REGISTRY.trace_memory and tracemalloc.is_tracing()
+    if trace_memory:
+        _update_peaks()
+        start_traced = tracemalloc.get_traced_memory()[0]
+    _REGISTRY._open.append(record)
+
+    start_rss = _max_rss_mb()
+    record.started_at = time.time()
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        yield record
+    finally:
+        record.wall_seconds = time.perf_counter() - start_wall
+        record.cpu_seconds = time.process_time() - start_cpu
+        record.max_rss_mb = _max_rss_mb()
+        if start_rss is not None:
+            record.rss_increase_mb = record.max_rss_mb - start_rss
+        if trace_memory and tracemalloc.is_tracing():
+            _update_peaks()
+            record.tracemalloc_peak_mb = max(record._peak - start_traced, 0) / 2**20
+
+        _REGISTRY._open.remove(record)
+        _REGISTRY.records.append(record)
+
+
+def _n_rows(obj) -> int | None:
+    """Number of rows of a DataFrame/array, or of the first element of a tuple of results."""
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    shape = getattr(obj, "shape", None)
+    return int(shape[0]) if shape else None
+
+
+def instrument(name: str | None = None):
+    """
+    Decorator measuring every call of a function as a stage, see stage().
+
+    The rows of the first argument (skipping self) and of the result are recorded if they are
+    DataFrames or arrays.
+
+    Args:
+        name: Name of the stage, the qualified name of the function if None
+    """
+
+    def decorator(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _REGISTRY.enabled:
+                return func(*args, **kwargs)
+
+            first = next((arg for arg in args if hasattr(arg, "shape")), None)
+            with stage(stage_name, rows_in=_n_rows(first)) as record:
+                result = func(*args, **kwargs)
+                record.rows_out = _n_rows(result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def summary() -> dict:
+    """Totals per stage name: number of calls, wall and CPU seconds and the largest memory peaks."""
+    totals = {}
+    for record in _REGISTRY.records:
+        total = totals.setdefault(
+            record.name,
+            {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "max_rss_mb": None, "tracemalloc_peak_mb": None},
+        )
+        total["calls"] += 1
+        total["wall_seconds"] += record.wall_seconds
+        total["cpu_seconds"] += record.cpu_seconds
+        for key in ["max_rss_mb", "tracemalloc_peak_mb"]:
+            value = getattr(record, key)
+            if value is not None:
+                total[key] = value if total[key] is None else max(total[key], value)
+    return totals
+
+
+def report() -> dict:
+    """Structured report of all records and the totals per stage."""
+    return {"stages": records(), "summary": summary()}
+
+
+def write_report(path: str | Path) -> None:
+    """
+    Write the report as JSON.
+
+    Args:
+        path: File path to write to
+    """
+    with open(path, "w") as file:
+        json.dump(report(), file, indent=2)
+
+
+def log_to_mlflow(prefix: str = "stage") -> None:
+    """
+    Log the totals per stage as metrics of the active MLflow run.
+
+    Args:
+        prefix: Prefix of the metric names, e.g. stage.impute_power_output.wall_seconds
+    """
+    import mlflow
+
+    metrics = {}
+    for name, total in summary().items():
+        for key, value in total.items():
+            if value is not None:
+                metrics[f"{prefix}.{name}.{key}"] = value
+    mlflow.log_metrics(metrics)
+
+
+if os.environ.get(ENV_VAR, "0") == "1":
+    enable()
@@ -0,0 +1,149 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPLACEMENT_STRATEGIES = {"none", "median"}
+
+
+class ExtremeValueHandler:
+    """
+    Replace extreme values using statistics of the training data (handle_extreme_values of notebook 02).
+
+    fit() computes the mean, standard deviation and median of all features in one vectorized pass.
+    transform() replaces values more than n_std standard deviations from the training mean with NaN
+    or the training median and applies the fixed Etmp limits, as array operations on all features
+    at once. The statistics are small and can be saved next to the model, so new data can be
+    transformed without the training set.
+    """
+
+    def __init__(
+        self,
+        features: list[str] = ("Etmp", "Wspd", "Wdir", "Itmp"),
+        n_std: float = 3.0,
+        replacement_strategy: str = "none",
+        clip_upper: dict[str, float] | None = None,
+        null_below: dict[str, float] | None = None,
+    ):
+        """
+        Args:
+            features: Features to check for extreme values
+            n_std: Number of standard deviations from the mean beyond which a value is extreme
+            replacement_strategy: "none" to replace extreme values with NaN, "median" with the training median
+            clip_upper: Upper limit per feature applied after the replacement, e.g. {"Etmp": 60}
+            null_below: Lower limit per feature below which values are set to NaN, e.g. {"Etmp": -50}
+        """
+        if replacement_strategy not in REPLACEMENT_STRATEGIES:
+            raise ValueError(f"Invalid replacement strategy: {replacement_strategy}")
+
+        self.features = list(features)
+        self.n_std = n_std
+        self.replacement_strategy = replacement_strategy
+        self.clip_upper = {"Etmp": 60.0} if clip_upper is None else dict(clip_upper)
+        self.null_below = {"Etmp": -50.0} if null_below is None else dict(null_below)
+        self.stats_ = None
+
+    def fit(self, df: pd.DataFrame) -> "ExtremeValueHandler":
+        """
+        Compute the statistics of all features from the training data.
+
+        Args:
+            df: Training data
+
+        Returns:
+            The fitted handler
+        """
+        values = df[self.features].to_numpy(dtype=np.float64, na_value=np.nan)
+        # Population std like scipy.stats.zscore in the notebook
+        self.stats_ = {
+            "mean": np.nanmean(values, axis=0).tolist(),
+            "std": np.nanstd(values, axis=0).tolist(),
+            "median": np.nanmedian(values, axis=0).tolist(),
+        }
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Replace the extreme values of a new batch with the fitted statistics.
+
+        Args:
+            df: Data to transform, e.g. the validation, test or live data
+
+        Returns:
+            Copy of df with replaced values, the dtypes of the features are kept
+        """
+        if self.stats_ is None:
+            raise ValueError("ExtremeValueHandler is not fitted yet, call fit() or load() first")
+
+        values = df[self.features].to_numpy(dtype=np.float64, na_value=np.nan)
+        mean = np.asarray(self.stats_["mean"])
+        std = np.asarray(self.stats_["std"])
+
+        with np.errstate(invalid="ignore"):
+            extreme = np.abs(values - mean) > self.n_std * std
+        replacement = np.asarray(self.stats_["median"]) if self.replacement_strategy == "median" else np.nan
+        values = np.where(extreme, replacement, values)
+
+        upper = np.array([self.clip_upper.get(feature, np.inf) for feature in self.features])
+        lower = np.array([self.null_below.get(feature, -np.inf) for feature in self.features])
+        values = np.where(values > upper, upper, values)
+        values = np.where(values < lower, np.nan, values)
+
+        df = df.copy()
+        for i, feature in enumerate(self.features):
+            dtype = df[feature].dtype if pd.api.types.is_float_dtype(df[feature]) else np.float64
+            df[feature] = values[:, i].astype(dtype)
+
+        return df
+
+    def fit_transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.fit(df).transform(df)
+
+    def save(self, path: str | Path) -> None:
+        """
+        Persist the settings and fitted statistics as JSON, e.g. next to the model.
+
+        Args:
+            path: File path to write to
+        """
+        if self.stats_ is None:
+            raise ValueError("ExtremeValueHandler is not fitted yet")
+
+        with open(path, "w") as file:
+            json.dump(
+                {
+                    "features": self.features,
+                    "n_std": self.n_std,
+                    "replacement_strategy": self.replacement_strategy,
+                    "clip_upper": self.clip_upper,
+                    "null_below": self.null_below,
+                    "stats": self.stats_,
+                },
+                file,
+                indent=2,
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ExtremeValueHandler":
+        """
+        Load a handler written by save().
+
+        Args:
+            path: File path to read from
+
+        Returns:
+            The fitted handler
+        """
+        with open(path, "r") as file:
+            data = json.load(file)
+
+        handler = cls(
+            data["features"],
+            n_std=data["n_std"],
+            replacement_strategy=data["replacement_strategy"],
+            clip_upper=data["clip_upper"],
+            null_below=data["null_below"],
+        )
+        handler.stats_ = data["stats"]
+        return handler
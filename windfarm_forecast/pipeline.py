@@ -0,0 +1,189 @@
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from windfarm_forecast.feature_engineering import impute_power_output, to_turbine_matrix
+from windfarm_forecast.ingestion import load_ingested
+from windfarm_forecast.instrumentation import instrument
+from windfarm_forecast.preprocessing import flag_impute_days, preprocess
+from windfarm_forecast.rollups import aggregate_across_turbines
+from windfarm_forecast.similarity import TurbineSimilarityIndex
+
+# Methods of impute_power_when_turbine_stopped in the preprocessing section of the config
+IMPUTE_METHODS = ("most_similar_turbine",)
+# Power columns of aggregate_across_turbines, summed over the turbines in kW
+POWER_COLUMNS = ("Patv", "Patv_imputed")
+
+
+def check_impute_method(config: dict) -> None:
+    """Raise a ValueError if imputation is enabled with an unsupported method, before any work is done."""
+    impute_config = config["preprocessing"]["impute_power_when_turbine_stopped"]
+    if impute_config["enabled"] and impute_config["method"] not in IMPUTE_METHODS:
+        raise ValueError(
+            f"Unknown imputation method '{impute_config['method']}', expected one of {list(IMPUTE_METHODS)}"
+        )
+
+
+def impute(df: pd.DataFrame, config: dict, similar_turbines_df: pd.DataFrame, n_similar: int) -> pd.DataFrame:
+    """
+    Impute the power of flagged turbine days as configured in the preprocessing section.
+
+    Args:
+        df: Preprocessed SCADA data with the impute_day_patv column of flag_impute_days
+        config: Loaded config.yaml
+        similar_turbines_df: Similar turbines used for the imputation
+        n_similar: Number of similar turbines to use for imputation
+
+    Returns:
+        DataFrame with the Patv_imputed column, equal to Patv if imputation is disabled
+    """
+    check_impute_method(config)
+    if not config["preprocessing"]["impute_power_when_turbine_stopped"]["enabled"]:
+        df = df.reset_index(drop=True)
+        df["Patv_imputed"] = df["Patv"].to_numpy(dtype=np.float64, na_value=np.nan)
+        return df
+
+    return impute_power_output(df, similar_turbines_df, n_similar)
+
+
+def process_frame(
+    df: pd.DataFrame,
+    config: dict,
+    similar_turbines_df: pd.DataFrame | None = None,
+    n_similar: int = 10,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Run preprocess -> flag impute days -> impute -> aggregate on a DataFrame held in memory.
+
+    Args:
+        df: Raw SCADA data, e.g. from load_ingested
+        config: Loaded config.yaml
+        similar_turbines_df: Similar turbines used for the imputation, computed from the preprocessed
+            power of df with TurbineSimilarityIndex if None
+        n_similar: Number of similar turbines to use for imputation
+
+    Returns:
+        Tuple (df, df_agg) of the imputed per-turbine data and the farm-level aggregates of
+        aggregate_across_turbines
+    """
+    check_impute_method(config)
+    df, _ = preprocess(df, config)
+    df = flag_impute_days(df)
+    if similar_turbines_df is None:
+        similar_turbines_df = TurbineSimilarityIndex().update(df).to_frame(n_similar)
+
+    df = impute(df, config, similar_turbines_df, n_similar)
+    return df, aggregate_across_turbines(df)
+
+
+def list_days(dataset_dir: str | Path) -> list[int]:
+    """Days of an ingested Parquet dataset, from its partition directories."""
+    return sorted(int(path.name.split("=", 1)[1]) for path in Path(dataset_dir).glob("Day=*"))
+
+
+def _day_power(dataset_dir: str | Path, day: int, config: dict) -> tuple[np.ndarray, np.ndarray]:
+    """Preprocessed turbine x time power matrix of one day (runs in a worker process)."""
+    df, _ = preprocess(load_ingested(dataset_dir, days=[day]), config)
+    matrix, turbine_ids, _, _, _ = to_turbine_matrix(df, dtype=np.float64)
+    return matrix, turbine_ids
+
+
+def _process_day(
+    dataset_dir: str | Path,
+    day: int,
+    config: dict,
+    similar_turbines_df: pd.DataFrame,
+    n_similar: int,
+    output_dir: str | Path | None,
+) -> pd.DataFrame:
+    """Run process_frame on one day, write its per-turbine result and return its aggregates (runs in a worker)."""
+    df, df_agg = process_frame(load_ingested(dataset_dir, days=[day]), config, similar_turbines_df, n_similar)
+
+    if output_dir is not None:
+        day_dir = Path(output_dir) / f"Day={day}"
+        day_dir.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(df.drop(columns="Day"), preserve_index=False)
+        pq.write_table(table, day_dir / "part-00000.parquet")
+
+    return df_agg
+
+
+def _ordered_map(pool: Executor, func: Callable, tasks: Iterable[tuple], max_in_flight: int) -> Iterator:
+    """Results of func over tasks in task order, with at most max_in_flight tasks submitted at a time."""
+    pending = deque()
+    for args in tasks:
+        pending.append(pool.submit(func, *args))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+@instrument()
+def run_partitioned(
+    dataset_dir: str | Path,
+    config: dict,
+    output_dir: str | Path | None = None,
+    similar_turbines_df: pd.DataFrame | None = None,
+    n_similar: int = 10,
+    days: list[int] | None = None,
+    max_workers: int | None = None,
+    max_in_flight: int | None = None,
+) -> pd.DataFrame:
+    """
+    Run process_frame day by day across a process pool, for datasets that do not fit in memory.
+
+    Every worker loads a single day of the ingested dataset. The rules, the impute_day_patv bounds,
+    the imputation (similar turbines at the same timestamp) and the aggregation across turbines only
+    depend on the rows of the same day, so days are processed independently. The similarity of the
+    turbines depends on the whole history: a first pass sends the preprocessed power matrix of every
+    day to the parent, which absorbs it into a TurbineSimilarityIndex, unless similar_turbines_df is
+    given. Results are consumed in day order with at most max_in_flight days in flight, so memory is
+    bounded by a few days and the farm-level aggregates. The output equals process_frame on the
+    concatenated days.
+
+    Args:
+        dataset_dir: Directory written by ingest_csv_to_parquet
+        config: Loaded config.yaml
+        output_dir: Directory to write the imputed per-turbine data to, partitioned by Day like the
+            ingested dataset, not written if None
+        similar_turbines_df: Similar turbines used for the imputation, computed in a first pass if None
+        n_similar: Number of similar turbines to use for imputation
+        days: Days to process, all days of the dataset if None
+        max_workers: Size of the process pool, number of cpus if None
+        max_in_flight: Maximum number of days submitted to the pool at a time, 2 * max_workers if None
+
+    Returns:
+        Farm-level aggregates of aggregate_across_turbines for all days
+    """
+    check_impute_method(config)
+    days = list_days(dataset_dir) if days is None else sorted(days)
+    if not days:
+        raise ValueError(f"No days to process in {dataset_dir}")
+    max_workers = max_workers or os.cpu_count()
+    max_in_flight = max_in_flight or 2 * max_workers
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        if similar_turbines_df is None:
+            index = TurbineSimilarityIndex()
+            tasks = ((dataset_dir, day, config) for day in days)
+            for matrix, turbine_ids in _ordered_map(pool, _day_power, tasks, max_in_flight):
+                index.update_matrix(matrix, turbine_ids)
+            similar_turbines_df = index.to_frame(n_similar)
+
+        tasks = ((dataset_dir, day, config, similar_turbines_df, n_similar, output_dir) for day in days)
+        frames = list(_ordered_map(pool, _process_day, tasks, max_in_flight))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def to_megawatts(df_agg: pd.DataFrame) -> pd.DataFrame:
+    """Convert the power columns of the farm-level aggregates from kW to MW, as in notebook 03."""
+    return df_agg.assign(**{col: df_agg[col] / 1000 for col in POWER_COLUMNS})
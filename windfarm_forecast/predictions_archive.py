@@ -0,0 +1,152 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Files are partitioned by set and month: <root>/set=val/month=2020-12/<run_id>.parquet
+PARTITIONING = ds.partitioning(pa.schema([("set", pa.string()), ("month", pa.string())]), flavor="hive")
+
+# One row group per week of 10 minute predictions, the timestamp statistics let range filters skip the others
+ROW_GROUP_SIZE = 7 * 144
+
+
+def write_predictions(
+    root: str | Path, predictions: pd.DataFrame, run_id: str | None = None, row_group_size: int = ROW_GROUP_SIZE
+) -> list[Path]:
+    """
+    Append the predictions of a model run to the archive as new files, existing files are never rewritten.
+
+    Args:
+        root: Directory of the archive
+        predictions: DataFrame in the format of predictions.parquet: timestamp index and the columns
+            actual, set and one pred_<model> column per model
+        run_id: Name of the new files, the current UTC time if None (later runs sort last)
+        row_group_size: Rows per row group
+
+    Returns:
+        Paths of the written files
+    """
+    run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    df = predictions.rename_axis("timestamp").reset_index().sort_values("timestamp")
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    months = df["timestamp"].dt.strftime("%Y-%m")
+
+    paths = []
+    for (set_name, month), part in df.groupby([df["set"], months], sort=True):
+        path = Path(root) / f"set={set_name}" / f"month={month}" / f"{run_id}.parquet"
+        if path.exists():
+            raise FileExistsError(f"{path} already exists, use a new run_id")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(part.drop(columns="set"), preserve_index=False)
+        pq.write_table(table, path, row_group_size=row_group_size)
+        paths.append(path)
+
+    return paths
+
+
+def _fragments(root: str | Path, set_name: str | None = None, start=None, end=None) -> list:
+    """Files of the archive in the selected set and months, in the order of their runs."""
+    if not Path(root).exists():
+        return []
+    dataset = ds.dataset(root, format="parquet", partitioning=PARTITIONING)
+
+    partition_filter = None
+    conditions = []
+    if set_name is not None:
+        conditions.append(ds.field("set") == set_name)
+    if start is not None:
+        conditions.append(ds.field("month") >= pd.Timestamp(start).strftime("%Y-%m"))
+    if end is not None:
+        conditions.append(ds.field("month") <= pd.Timestamp(end).strftime("%Y-%m"))
+    for condition in conditions:
+        partition_filter = condition if partition_filter is None else partition_filter & condition
+
+    fragments = (
+        dataset.get_fragments(filter=partition_filter) if partition_filter is not None else dataset.get_fragments()
+    )
+    return sorted(fragments, key=lambda fragment: Path(fragment.path).name)
+
+
+def read_predictions(
+    root: str | Path, set_name: str, start=None, end=None, models: list[str] | None = None
+) -> pd.DataFrame:
+    """
+    Read the predictions of one set and date range, only reading the needed files, row groups and columns.
+
+    The set and months are selected through the partitions, the date range through the row group
+    statistics of the timestamp and only the requested model columns are read. If a model was
+    written by several runs, the latest run wins.
+
+    Args:
+        root: Directory of the archive
+        set_name: Set to read, e.g. "train" or "val"
+        start: First timestamp to include
+        end: Last timestamp to include
+        models: Model columns to read (e.g. ["pred_xgboost"]), all models of the set if None
+
+    Returns:
+        DataFrame in the format of predictions.parquet with a timestamp index and the columns actual,
+        set and the models
+    """
+    models = archive_models(root, set_name) if models is None else list(models)
+
+    row_filter = None
+    if start is not None:
+        row_filter = ds.field("timestamp") >= pa.scalar(pd.Timestamp(start), pa.timestamp("ns"))
+    if end is not None:
+        condition = ds.field("timestamp") <= pa.scalar(pd.Timestamp(end), pa.timestamp("ns"))
+        row_filter = condition if row_filter is None else row_filter & condition
+
+    frames = []
+    for fragment in _fragments(root, set_name, start, end):
+        columns = [model for model in models if model in fragment.physical_schema.names]
+        if columns:
+            frames.append(fragment.to_table(columns=["timestamp", "actual"] + columns, filter=row_filter).to_pandas())
+
+    if not frames:
+        df = pd.DataFrame({col: pd.Series(dtype=np.float64) for col in ["actual"] + models})
+        df.index = pd.DatetimeIndex([], name="timestamp")
+    else:
+        # Rows of the same timestamp from several runs are merged, the last non-null value of a column wins
+        df = pd.concat(frames, ignore_index=True).groupby("timestamp", sort=True).last()
+        df = df.reindex(columns=["actual"] + models)
+    df.insert(1, "set", set_name)
+
+    return df
+
+
+def archive_models(root: str | Path, set_name: str | None = None) -> list[str]:
+    """Model columns available in the archive (from the file footers), sorted."""
+    names = set()
+    for fragment in _fragments(root, set_name):
+        names.update(name for name in fragment.physical_schema.names if name.startswith("pred_"))
+    return sorted(names)
+
+
+def archive_time_range(root: str | Path, set_name: str) -> tuple[pd.Timestamp, pd.Timestamp] | None:
+    """
+    First and last timestamp of a set, read from the row group statistics without loading data.
+
+    Returns:
+        Tuple (first, last), None if the set has no predictions
+    """
+    minimum, maximum = None, None
+    for fragment in _fragments(root, set_name):
+        fragment.ensure_complete_metadata()
+        for row_group in fragment.row_groups:
+            statistics = row_group.statistics.get("timestamp")
+            if statistics:
+                minimum = statistics["min"] if minimum is None else min(minimum, statistics["min"])
+                maximum = statistics["max"] if maximum is None else max(maximum, statistics["max"])
+
+    return None if minimum is None else (pd.Timestamp(minimum), pd.Timestamp(maximum))
+
+
+def archive_version(root: str | Path) -> tuple[int, float]:
+    """Number of files and latest modification time of the archive, changes with every appended run."""
+    files = list(Path(root).rglob("*.parquet"))
+    return len(files), max((file.stat().st_mtime for file in files), default=0.0)
@@ -0,0 +1,199 @@
+import operator
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from windfarm_forecast.instrumentation import instrument
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+ACTIONS = {None, "set_target", "null_target"}
+
+
+class Condition(NamedTuple):
+    column: str
+    op: str
+    value: float
+
+
+class Rule(NamedTuple):
+    name: str
+    conditions: list[Condition]
+    combine: str = "all"
+    flag: str | None = None
+    action: str | None = None
+    value: float | None = None
+
+
+def parse_condition(condition: str) -> Condition:
+    """
+    Parse a condition of the form "<column> <operator> <number>", e.g. "Wspd > 2.5".
+
+    Args:
+        condition: Condition string from the config
+
+    Returns:
+        Parsed Condition
+    """
+    try:
+        column, op, value = condition.split()
+        value = float(value)
+    except ValueError:
+        raise ValueError(f"Invalid condition '{condition}', expected '<column> <operator> <number>'") from None
+
+    if op not in OPERATORS:
+        raise ValueError(f"Invalid operator '{op}' in condition '{condition}', expected one of {list(OPERATORS)}")
+
+    return Condition(column, op, value)
+
+
+def compile_rules(rules_config: list[dict]) -> list[Rule]:
+    """
+    Compile the declarative data quality rules of the config into Rule objects.
+
+    Args:
+        rules_config: List of rule dicts as in config["preprocessing"]["rules"]
+
+    Returns:
+        List of compiled rules in the order of the config
+    """
+    rules = []
+    for rule_config in rules_config:
+        rule = Rule(
+            name=rule_config["name"],
+            conditions=[parse_condition(condition) for condition in rule_config["conditions"]],
+            combine=rule_config.get("combine", "all"),
+            flag=rule_config.get("flag"),
+            action=rule_config.get("action"),
+            value=rule_config.get("value"),
+        )
+
+        if rule.combine not in ("all", "any"):
+            raise ValueError(f"Invalid combine '{rule.combine}' in rule '{rule.name}', expected 'all' or 'any'")
+        if rule.action not in ACTIONS:
+            raise ValueError(f"Invalid action '{rule.action}' in rule '{rule.name}', expected one of {ACTIONS}")
+        if rule.action == "set_target" and rule.value is None:
+            raise ValueError(f"Rule '{rule.name}' with action 'set_target' requires a value")
+
+        rules.append(rule)
+
+    return rules
+
+
+@instrument()
+def apply_rules(df: pd.DataFrame, rules: list[Rule], target_col: str = "Patv") -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Apply the compiled data quality rules in one pass over the NumPy columns of the DataFrame.
+
+    The rules are evaluated in order on the working arrays, so a rule sees the target as modified
+    by the rules before it (e.g. turbine_stopped sees the clipped Patv). The flag columns and the
+    modified target are written back to the DataFrame together at the end.
+
+    Args:
+        df: DataFrame with the raw SCADA data
+        rules: Compiled rules from compile_rules
+        target_col: Name of the target column modified by the rule actions
+
+    Returns:
+        Tuple (df, report) of the preprocessed DataFrame and a DataFrame with the number of hits
+        and the runtime in seconds per rule
+    """
+    # Extract every referenced column once, the target as a float copy that is modified in place
+    target_dtype = df[target_col].dtype if pd.api.types.is_float_dtype(df[target_col]) else np.float64
+    target = df[target_col].to_numpy(dtype=target_dtype, na_value=np.nan, copy=True)
+    columns = {target_col: target}
+    for rule in rules:
+        for condition in rule.conditions:
+            if condition.column not in columns:
+                columns[condition.column] = df[condition.column].to_numpy()
+
+    flags = {}
+    report = []
+    for rule in rules:
+        start = time.perf_counter()
+
+        masks = (OPERATORS[c.op](columns[c.column], c.value) for c in rule.conditions)
+        mask = np.logical_and.reduce(list(masks)) if rule.combine == "all" else np.logical_or.reduce(list(masks))
+
+        if rule.action == "set_target":
+            target[mask] = rule.value
+        elif rule.action == "null_target":
+            target[mask] = np.nan
+
+        if rule.flag is not None:
+            flags[rule.flag] = flags.get(rule.flag, 0) | mask.astype(np.int8)
+
+        report.append({"rule": rule.name, "hits": int(np.count_nonzero(mask)), "seconds": time.perf_counter() - start})
+
+    # Write all results back at once on a shallow copy, the input DataFrame is left untouched
+    df = df.copy(deep=False)
+    df[target_col] = target
+    for flag, values in flags.items():
+        df[flag] = values
+
+    return df, pd.DataFrame(report, columns=["rule", "hits", "seconds"])
+
+
+@instrument()
+def preprocess(df: pd.DataFrame, config: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Apply the data quality rules of the preprocessing section of the config.
+
+    Args:
+        df: DataFrame with the raw SCADA data
+        config: Loaded config.yaml
+
+    Returns:
+        Tuple (df, report) as returned by apply_rules
+    """
+    preprocessing_config = config["preprocessing"]
+    rules = compile_rules(preprocessing_config["rules"])
+
+    return apply_rules(df, rules, target_col=preprocessing_config.get("target", "Patv"))
+
+
+@instrument()
+def flag_impute_days(
+    df: pd.DataFrame,
+    n_std: float = 3.0,
+    target_col: str = "Patv",
+    day_col: str = "Day",
+    turbine_col: str = "TurbID",
+) -> pd.DataFrame:
+    """
+    Add the impute_day_patv column of the preprocessing notebook.
+
+    A turbine day is flagged when the turbine produced no power on that day although the lower bound
+    (mean - n_std * std of the daily power of all turbines) is positive. The bounds only depend on
+    the turbines of the same day, so every day can be flagged on its own.
+
+    Args:
+        df: Preprocessed SCADA data
+        n_std: Number of standard deviations of the lower bound
+        target_col: Name of the power column
+        day_col: Name of the column containing days
+        turbine_col: Name of the column containing turbine IDs
+
+    Returns:
+        Shallow copy of df with the int8 column impute_day_patv
+    """
+    daily = df.groupby([day_col, turbine_col])[target_col].sum()
+    stats = daily.groupby(level=day_col).agg(["mean", "std"])
+    lower_bound = (stats["mean"] - n_std * stats["std"]).reindex(daily.index.get_level_values(day_col))
+    flags = ((daily.to_numpy() == 0) & (lower_bound.to_numpy() > 0)).astype(np.int8)
+
+    # Broadcast the flag of every turbine day to its rows
+    positions = daily.index.get_indexer(pd.MultiIndex.from_frame(df[[day_col, turbine_col]]))
+    df = df.copy(deep=False)
+    df["impute_day_patv"] = flags[positions]
+
+    return df
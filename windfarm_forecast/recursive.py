@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from windfarm_forecast.feature_engineering import parse_feature
+from windfarm_forecast.instrumentation import instrument
+
+STEPS_PER_DAY = 144  # 10 minute steps
+
+
+class RecursiveForecaster:
+    """
+    Recursive multi-step forecasts of a one-step model from many origins in lockstep.
+
+    The model predicts the target from exogenous features (e.g. the weather, known for the forecast
+    period) and lags of the target. At step h all origins are advanced together: the lag columns of
+    a preallocated feature matrix are filled from a buffer holding the observed history followed by
+    the predictions made so far, the exogenous columns from the rows at origin + h, and a single
+    batched predict call writes the predictions of step h back into the buffer.
+    """
+
+    def __init__(
+        self,
+        model,
+        feature_cols: list[str],
+        target_col: str = "Patv_imputed",
+        horizon: int = 2 * STEPS_PER_DAY,
+        skip_missing: bool = False,
+    ):
+        """
+        Args:
+            model: Fitted one-step model with a predict method (sklearn, XGBoost, LightGBM)
+            feature_cols: Features in the order the model was fitted on. Lags of the target (e.g.
+                Patv_imputed_lag_6, see FeatureGenerator) are filled recursively, all other columns are
+                read from the frame passed to forecast()
+            target_col: Column to forecast
+            horizon: Number of 10 minute steps to forecast from every origin
+            skip_missing: Forecast NaN for rows with missing features instead of passing them to the
+                model, for models that cannot handle NaN such as LinearRegression. Later steps whose
+                lags need such a forecast are NaN as well
+        """
+        self.model = model
+        self.feature_cols = list(feature_cols)
+        self.target_col = target_col
+        self.horizon = horizon
+        self.skip_missing = skip_missing
+
+        self.lag_positions = []
+        self.lags = []
+        self.exog_positions = []
+        self.exog_cols = []
+        for i, feature in enumerate(self.feature_cols):
+            try:
+                kind, column, _, window = parse_feature(feature)
+            except ValueError:
+                kind, column, window = None, feature, 0
+
+            if column == target_col and kind == "lag":
+                self.lag_positions.append(i)
+                self.lags.append(window)
+            elif column == target_col:
+                raise ValueError(f"Feature '{feature}' depends on the current target, only lags can be recursive")
+            else:
+                self.exog_positions.append(i)
+                self.exog_cols.append(feature)
+
+        if self.lags and min(self.lags) < 1:
+            raise ValueError("Lags of the target must be at least 1")
+        self.max_lag = max(self.lags, default=0)
+        # Models fitted on a DataFrame expect the feature names
+        self._feature_names = getattr(model, "feature_names_in_", None)
+
+    def default_origins(
+        self, df: pd.DataFrame, stride: int = 1, timestamp_col: str | None = "timestamp", freq: str = "10min"
+    ) -> np.ndarray:
+        """
+        Row positions of all origins with max_lag rows of history and horizon rows ahead, skipping gaps.
+
+        Args:
+            df: Frame ordered by time
+            stride: Steps between consecutive origins
+            timestamp_col: Column used to skip origins whose window spans missing timestamps, None to skip the check
+            freq: Expected step between consecutive timestamps
+
+        Returns:
+            Array of row positions of the first forecast step of every origin
+        """
+        origins = np.arange(self.max_lag, len(df) - self.horizon + 1, stride)
+        if timestamp_col is None or len(origins) == 0:
+            return origins
+
+        timestamps = df[timestamp_col].to_numpy()
+        # Number of gaps before every row
+        gap = np.concatenate([[0], np.cumsum(np.diff(timestamps) != pd.Timedelta(freq).to_timedelta64())])
+        # No gap between the first lag row and the last forecast row
+        return origins[gap[origins + self.horizon - 1] == gap[origins - self.max_lag]]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        One-step predictions of a feature matrix.
+
+        Args:
+            X: Array of shape (n_rows, n_features) in the order of feature_cols
+
+        Returns:
+            Array of predictions, NaN for rows with missing features if skip_missing
+        """
+        if self.skip_missing:
+            complete = ~np.isnan(X).any(axis=1)
+            if not complete.all():
+                predictions = np.full(len(X), np.nan)
+                if complete.any():
+                    predictions[complete] = self._predict_rows(X[complete])
+                return predictions
+        return self._predict_rows(X)
+
+    def _predict_rows(self, X: np.ndarray) -> np.ndarray:
+        if self._feature_names is not None:
+            X = pd.DataFrame(X, columns=self._feature_names, copy=False)
+        return np.asarray(self.model.predict(X), dtype=np.float64)
+
+    @instrument()
+    def forecast(self, df: pd.DataFrame, origins: np.ndarray | None = None, stride: int = 1) -> np.ndarray:
+        """
+        Forecast horizon steps from every origin with one predict call per step.
+
+        Args:
+            df: Frame ordered by time with a regular 10 minute step, containing the target (observed up to
+                each origin) and the exogenous feature columns (for the forecast periods as well)
+            origins: Row positions of the first forecast step of every origin, default_origins() if None
+            stride: Steps between consecutive origins if origins is None
+
+        Returns:
+            Array of shape (n_origins, horizon) with the forecasts of rows origin..origin + horizon - 1
+        """
+        origins = self.default_origins(df, stride) if origins is None else np.asarray(origins)
+        if len(origins) and (origins.min() < self.max_lag or origins.max() + self.horizon > len(df)):
+            raise ValueError(f"Origins need {self.max_lag} rows of history and {self.horizon} rows ahead")
+
+        target = df[self.target_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        exog = df[self.exog_cols].to_numpy(dtype=np.float32, na_value=np.nan)
+
+        # Buffer per origin: the max_lag observed values before the origin, then the forecasts
+        buffer = np.empty((len(origins), self.max_lag + self.horizon))
+        if self.max_lag:
+            buffer[:, : self.max_lag] = sliding_window_view(target, self.max_lag)[origins - self.max_lag]
+
+        X = np.empty((len(origins), len(self.feature_cols)), dtype=np.float32)
+        lag_positions = np.array(self.lag_positions, dtype=np.intp)
+        # Buffer column of each lag at step 0, shifted by one per step
+        lag_columns = self.max_lag - np.array(self.lags, dtype=np.intp)
+        for step in range(self.horizon):
+            X[:, self.exog_positions] = exog[origins + step]
+            if len(lag_positions):
+                X[:, lag_positions] = buffer[:, lag_columns + step]
+            buffer[:, self.max_lag + step] = self.predict(X)
+
+        return buffer[:, self.max_lag :]
+
+    def evaluate(self, df: pd.DataFrame, origins: np.ndarray | None = None, stride: int = 1) -> pd.DataFrame:
+        """
+        Forecast from all origins and compute the error per horizon step against the observed target.
+
+        Args:
+            df: Frame as for forecast()
+            origins: Row positions of the origins, default_origins() if None
+            stride: Steps between consecutive origins if origins is None
+
+        Returns:
+            DataFrame with columns [horizon, mae, rmse, n_origins], horizon 1 being the first step
+        """
+        origins = self.default_origins(df, stride) if origins is None else np.asarray(origins)
+        forecasts = self.forecast(df, origins)
+
+        target = df[self.target_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        actuals = sliding_window_view(target, self.horizon)[origins]
+        errors = forecasts - actuals
+        valid = ~np.isnan(errors)
+        n = valid.sum(axis=0)
+        errors = np.where(valid, errors, 0.0)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.DataFrame(
+                {
+                    "horizon": np.arange(1, self.horizon + 1),
+                    "mae": np.abs(errors).sum(axis=0) / n,
+                    "rmse": np.sqrt((errors**2).sum(axis=0) / n),
+                    "n_origins": n,
+                }
+            )
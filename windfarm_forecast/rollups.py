@@ -0,0 +1,430 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from windfarm_forecast.instrumentation import instrument
+
+STEPS_PER_DAY = 144  # 10 minute steps
+STEP = pd.Timedelta("10min")
+
+# Number of periods per day and frequency of every granularity
+PERIODS_PER_DAY = {"10min": STEPS_PER_DAY, "hour": 24, "day": 1}
+LEVEL_FREQ = {"10min": "10min", "hour": "h", "day": "D"}
+
+# Additive statistics every aggregation is derived from
+AGGREGATION_STATS = {
+    "mean": {"sum", "count"},
+    "sum": {"sum"},
+    "count": {"count"},
+    "std": {"sum", "count", "sumsq"},
+    "count_positive": {"positive"},
+}
+AGGREGATIONS = set(AGGREGATION_STATS)
+
+# Output name -> (column, aggregation) of the rollups used by the notebooks, the frontend and the features
+DEFAULT_AGGREGATIONS = {
+    "num_turbines": ("TurbID", "count"),
+    "Day": ("Day", "mean"),
+    "Wspd": ("Wspd", "mean"),
+    "Wspd_std": ("Wspd", "std"),
+    "Wdir": ("Wdir", "mean"),
+    "Wdir_std": ("Wdir", "std"),
+    "Etmp": ("Etmp", "mean"),
+    "Itmp": ("Itmp", "mean"),
+    "Ndir": ("Ndir", "mean"),
+    "maintenance_day": ("maintenance_day", "mean"),
+    "turbine_stopped": ("turbine_stopped", "mean"),
+    "turbine_at_rest": ("turbine_at_rest", "mean"),
+    "impute_day_patv": ("impute_day_patv", "mean"),
+    "Patv": ("Patv", "sum"),
+    "Patv_imputed": ("Patv_imputed", "sum"),
+    "n_active_turbines": ("Patv_imputed", "count_positive"),
+}
+
+# Rollups of aggregate_daily, num_turbines marks the days with data
+DAILY_AGGREGATIONS = {
+    name: DEFAULT_AGGREGATIONS[name]
+    for name in ["num_turbines", "Day", "Wspd", "Wspd_std", "Wdir", "Wdir_std", "Etmp", "Patv"]
+    + ["maintenance_day", "turbine_stopped", "turbine_at_rest"]
+}
+
+
+class RollupCube:
+    """
+    Farm-level and per-turbine rollups at 10 minute, hourly and daily granularity.
+
+    The cube stores additive statistics (sum, count and, where needed, sum of squares and count of
+    positive values) per column, so all aggregations are derived from them and new data can be
+    added with update() without recomputing the history, also when it completes a partial day.
+    Farm-level rollups are kept for "10min", "hour" and "day", per-turbine rollups for "hour" and
+    "day" (per-turbine 10 minute values are the data itself, see TensorStore) unless turbine_rollups
+    is False.
+    """
+
+    def __init__(self, aggregations: dict | None = None, days_per_block: int = 30, turbine_rollups: bool = True):
+        """
+        Args:
+            aggregations: Output name -> (column, aggregation), DEFAULT_AGGREGATIONS if None
+            days_per_block: Number of days reduced at a time
+            turbine_rollups: Whether to keep per-turbine rollups, farm-level ones are reduced
+                without a dense (time x turbine) array if False
+        """
+        self.aggregations = dict(DEFAULT_AGGREGATIONS if aggregations is None else aggregations)
+        for name, (_, agg) in self.aggregations.items():
+            if agg not in AGGREGATIONS:
+                raise ValueError(f"Invalid aggregation '{agg}' for '{name}', expected one of {AGGREGATIONS}")
+
+        # Statistics to track per column
+        self._stats = {}
+        for column, agg in self.aggregations.values():
+            self._stats.setdefault(column, set()).update(AGGREGATION_STATS[agg])
+
+        self.days_per_block = days_per_block
+        self.turbine_rollups = turbine_rollups
+        self.start = None
+        self.n_days = 0
+        self.turbine_ids = None
+        # (scope, level, stat, column) -> array with one row per period (and one column per turbine),
+        # allocated for _capacity days of which the first n_days are used
+        self._arrays = {}
+        self._capacity = 0
+
+    def _keys(self):
+        """Keys of all stored arrays."""
+        for column, stats in self._stats.items():
+            for stat in stats:
+                if self.turbine_rollups:
+                    yield ("turbine", "hour", stat, column)
+                    yield ("turbine", "day", stat, column)
+                for level in PERIODS_PER_DAY:
+                    yield ("farm", level, stat, column)
+
+    def _grow(self, n_days: int) -> None:
+        """Extend all arrays with zeros up to n_days, doubling their capacity so appends are amortized O(1)."""
+        if n_days > self._capacity:
+            capacity = max(n_days, 2 * self._capacity)
+            for key in self._keys():
+                scope, level, _, _ = key
+                shape = (capacity * PERIODS_PER_DAY[level],) + ((len(self.turbine_ids),) if scope == "turbine" else ())
+                grown = np.zeros(shape)
+                if key in self._arrays:
+                    used = self.n_days * PERIODS_PER_DAY[level]
+                    grown[:used] = self._arrays[key][:used]
+                self._arrays[key] = grown
+            self._capacity = capacity
+        self.n_days = n_days
+
+    @instrument()
+    def update(self, df: pd.DataFrame, turbine_col: str = "TurbID", timestamp_col: str = "timestamp") -> "RollupCube":
+        """
+        Add data in long format (e.g. newly appended days) to the cube.
+
+        Every row must only be added once, but it does not matter how the data is split into updates.
+
+        Args:
+            df: DataFrame with one row per (timestamp, turbine) and the aggregated columns
+            turbine_col: Name of the column containing turbine IDs
+            timestamp_col: Name of the column containing timestamps
+
+        Returns:
+            The updated cube
+        """
+        if df.empty:
+            return self
+
+        if self.start is None:
+            self.start = df[timestamp_col].min().floor("D")
+            self.turbine_ids = np.sort(df[turbine_col].unique())
+
+        turbine_pos = pd.Index(self.turbine_ids).get_indexer(df[turbine_col])
+        if (turbine_pos < 0).any():
+            raise ValueError(f"Unknown turbines: {sorted(set(df.loc[turbine_pos < 0, turbine_col]))}")
+        timestamps = df[timestamp_col].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        step_pos = (timestamps - self.start.value) // STEP.value
+        if step_pos.min() < 0:
+            raise ValueError(f"Data before the start of the cube ({self.start})")
+        day_pos = step_pos // STEPS_PER_DAY
+
+        last_day = int(day_pos.max())
+        if last_day >= self.n_days:
+            self._grow(last_day + 1)
+
+        # Only the aggregated columns, sliced per block instead of the DataFrame
+        columns = {column: df[column].to_numpy(dtype=np.float64, na_value=np.nan) for column in self._stats}
+
+        # Reduce blocks of days at a time to bound the size of the dense intermediate arrays, farm-level
+        # rollups have none and are reduced at once
+        first_day = int(day_pos.min())
+        days_per_block = self.days_per_block if self.turbine_rollups else last_day + 1 - first_day
+        for first_day in range(first_day, last_day + 1, days_per_block):
+            in_block = (day_pos >= first_day) & (day_pos < first_day + days_per_block)
+            if not in_block.any():
+                continue
+            if in_block.all():
+                block_columns, block_steps, block_turbines = columns, step_pos, turbine_pos
+            else:
+                block_columns = {column: values[in_block] for column, values in columns.items()}
+                block_steps, block_turbines = step_pos[in_block], turbine_pos[in_block]
+            n_days = min(days_per_block, self.n_days - first_day)
+            block_steps = block_steps - first_day * STEPS_PER_DAY
+            self._add_block(self._reduce_block(block_columns, block_steps, block_turbines, n_days), first_day)
+
+        return self
+
+    def _reduce_block(
+        self, columns: dict[str, np.ndarray], step_pos: np.ndarray, turbine_pos: np.ndarray, n_days: int
+    ) -> dict:
+        """Compute the rollups of a block of n_days days, one reduction chain per statistic."""
+        if not self.turbine_rollups:
+            return self._reduce_farm_block(columns, step_pos, n_days)
+
+        n_steps = n_days * STEPS_PER_DAY
+        n_turbines = len(self.turbine_ids)
+        block = {}
+
+        for column, stats in self._stats.items():
+            values = np.full((n_steps, n_turbines), np.nan)
+            values[step_pos, turbine_pos] = columns[column]
+            valid = ~np.isnan(values)
+            zeroed = np.where(valid, values, 0.0)
+
+            per_step = {}
+            if "sum" in stats:
+                per_step["sum"] = zeroed
+            if "count" in stats:
+                per_step["count"] = valid.astype(np.float64)
+            if "sumsq" in stats:
+                per_step["sumsq"] = zeroed**2
+            if "positive" in stats:
+                per_step["positive"] = (zeroed > 0).astype(np.float64)
+
+            for stat, steps in per_step.items():
+                # 10 min -> hour -> day per turbine, then over turbines for the farm
+                hourly = steps.reshape(n_days * 24, 6, n_turbines).sum(axis=1)
+                daily = hourly.reshape(n_days, 24, n_turbines).sum(axis=1)
+                block[("turbine", "hour", stat, column)] = hourly
+                block[("turbine", "day", stat, column)] = daily
+                block[("farm", "10min", stat, column)] = steps.sum(axis=1)
+                block[("farm", "hour", stat, column)] = hourly.sum(axis=1)
+                block[("farm", "day", stat, column)] = daily.sum(axis=1)
+
+        return block
+
+    def _reduce_farm_block(self, columns: dict[str, np.ndarray], step_pos: np.ndarray, n_days: int) -> dict:
+        """Compute the farm-level rollups of a block of n_days days by summing the rows of every 10 minute step."""
+        n_steps = n_days * STEPS_PER_DAY
+        rows_per_step = None
+        block = {}
+
+        for column, stats in self._stats.items():
+            values = columns[column]
+            valid = ~np.isnan(values)
+            complete = valid.all()
+            zeroed = values if complete else np.where(valid, values, 0.0)
+
+            per_step = {}
+            if "sum" in stats:
+                per_step["sum"] = np.bincount(step_pos, weights=zeroed, minlength=n_steps)
+            if "count" in stats:
+                # Columns without missing values share the number of rows per step
+                if complete and rows_per_step is None:
+                    rows_per_step = np.bincount(step_pos, minlength=n_steps).astype(np.float64)
+                count = rows_per_step if complete else np.bincount(step_pos[valid], minlength=n_steps)
+                per_step["count"] = count.astype(np.float64, copy=False)
+            if "sumsq" in stats:
+                per_step["sumsq"] = np.bincount(step_pos, weights=zeroed**2, minlength=n_steps)
+            if "positive" in stats:
+                per_step["positive"] = np.bincount(step_pos[zeroed > 0], minlength=n_steps).astype(np.float64)
+
+            # 10 min -> hour -> day
+            for stat, steps in per_step.items():
+                block[("farm", "10min", stat, column)] = steps
+                block[("farm", "hour", stat, column)] = steps.reshape(n_days * 24, 6).sum(axis=1)
+                block[("farm", "day", stat, column)] = steps.reshape(n_days, STEPS_PER_DAY).sum(axis=1)
+
+        return block
+
+    def _add_block(self, block: dict, first_day: int) -> None:
+        """Add the rollups of a reduced block of days starting at first_day to the stored arrays."""
+        for key, values in block.items():
+            start = first_day * PERIODS_PER_DAY[key[1]]
+            self._arrays[key][start : start + len(values)] += values
+
+    def _aggregate(self, scope: str, level: str, column: str, agg: str, periods: slice) -> np.ndarray:
+        """Derive an aggregation from the stored statistics."""
+        stat = {name: self._arrays[(scope, level, name, column)][periods] for name in AGGREGATION_STATS[agg]}
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if agg == "mean":
+                return np.where(stat["count"] > 0, stat["sum"] / stat["count"], np.nan)
+            if agg == "sum":
+                return stat["sum"]
+            if agg == "count":
+                return stat["count"]
+            if agg == "count_positive":
+                return stat["positive"]
+            # Sample standard deviation (ddof=1) like pandas
+            total, count = stat["sum"], stat["count"]
+            variance = (stat["sumsq"] - total**2 / count) / (count - 1)
+            return np.where(count > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+
+    def frame(self, level: str = "10min", scope: str = "farm", start=None, end=None) -> pd.DataFrame:
+        """
+        Rollups of one granularity as a DataFrame.
+
+        Args:
+            level: Granularity, one of "10min", "hour" and "day"
+            scope: "farm" for the whole farm or "turbine" for per-turbine rollups (not for "10min")
+            start: First period to include, from the start of the cube if None
+            end: Last period to include, up to the end of the cube if None
+
+        Returns:
+            DataFrame with a timestamp column (start of the period), a TurbID column for per-turbine
+            rollups and one column per aggregation, including periods without data
+        """
+        if scope == "turbine" and level == "10min":
+            raise ValueError("Per-turbine rollups are only available for 'hour' and 'day'")
+        if scope == "turbine" and not self.turbine_rollups:
+            raise ValueError("The cube was created without per-turbine rollups")
+        if self.start is None:
+            return pd.DataFrame(columns=["timestamp"] + list(self.aggregations))
+
+        timestamps = pd.date_range(self.start, periods=self.n_days * PERIODS_PER_DAY[level], freq=LEVEL_FREQ[level])
+        first = 0 if start is None else timestamps.searchsorted(pd.Timestamp(start), side="left")
+        last = len(timestamps) if end is None else timestamps.searchsorted(pd.Timestamp(end), side="right")
+        periods = slice(first, last)
+        timestamps = timestamps[periods]
+
+        if scope == "farm":
+            df = pd.DataFrame({"timestamp": timestamps})
+        else:
+            df = pd.DataFrame(
+                {
+                    "timestamp": np.repeat(timestamps, len(self.turbine_ids)),
+                    "TurbID": np.tile(self.turbine_ids, len(timestamps)),
+                }
+            )
+        for name, (column, agg) in self.aggregations.items():
+            df[name] = self._aggregate(scope, level, column, agg, periods).ravel()
+
+        return df
+
+    def save(self, path: str | Path) -> None:
+        """
+        Persist the cube to a .npz file.
+
+        Args:
+            path: File path to write to
+        """
+        meta = {
+            "aggregations": self.aggregations,
+            "days_per_block": self.days_per_block,
+            "turbine_rollups": self.turbine_rollups,
+            "start": None if self.start is None else self.start.isoformat(),
+            "n_days": self.n_days,
+            "turbine_ids": None if self.turbine_ids is None else self.turbine_ids.tolist(),
+        }
+        # Without the unused capacity
+        arrays = {"/".join(key): array[: self.n_days * PERIODS_PER_DAY[key[1]]] for key, array in self._arrays.items()}
+        with open(path, "wb") as file:
+            np.savez(file, meta=json.dumps(meta), **arrays)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "RollupCube":
+        """
+        Load a cube written by save().
+
+        Args:
+            path: File path to read from
+
+        Returns:
+            The loaded cube
+        """
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            aggregations = {name: tuple(spec) for name, spec in meta["aggregations"].items()}
+            cube = cls(aggregations, meta["days_per_block"], meta.get("turbine_rollups", True))
+            cube.start = None if meta["start"] is None else pd.Timestamp(meta["start"])
+            cube.n_days = cube._capacity = meta["n_days"]
+            cube.turbine_ids = None if meta["turbine_ids"] is None else np.asarray(meta["turbine_ids"])
+            cube._arrays = {tuple(key.split("/")): data[key] for key in data.files if key != "meta"}
+
+        return cube
+
+
+@instrument()
+def aggregate_across_turbines(df: pd.DataFrame, cube: RollupCube | None = None) -> pd.DataFrame:
+    """
+    Aggregates wind farm data across all turbines for each timestamp (as in notebook 03) using the rollup cube.
+
+    Args:
+        df: Input DataFrame containing wind turbine measurements, used if no cube is given
+        cube: Cube with at least the DEFAULT_AGGREGATIONS, e.g. shared between train and validation,
+            a farm-level cube of df if None
+
+    Returns:
+        pd.DataFrame: Aggregated DataFrame containing mean of measurements and sum of power
+                      outputs across turbines for each timestamp with data
+    """
+    if cube is None:
+        cube = RollupCube(turbine_rollups=False).update(df)
+    start, end = (df["timestamp"].min(), df["timestamp"].max()) if not df.empty else (None, None)
+
+    df_agg = cube.frame("10min", start=start, end=end)
+    df_agg = df_agg[df_agg["num_turbines"] > 0].reset_index(drop=True)
+    df_agg.insert(3, "time", df_agg["timestamp"].dt.strftime("%H:%M"))
+    for col in ["num_turbines", "n_active_turbines"]:
+        df_agg[col] = df_agg[col].astype(np.int64)
+
+    columns = ["timestamp", "num_turbines", "Day", "time", "Wspd", "Wdir", "Etmp", "Itmp", "Ndir"]
+    columns += ["maintenance_day", "turbine_stopped", "turbine_at_rest", "impute_day_patv"]
+    return df_agg[columns + ["Patv", "Patv_imputed", "n_active_turbines"]]
+
+
+@instrument()
+def aggregate_daily(df: pd.DataFrame, cube: RollupCube | None = None) -> pd.DataFrame:
+    """
+    Aggregates wind turbine data to daily statistics of the whole farm (as in notebook 03) using the rollup cube.
+
+    Args:
+        df: Input DataFrame containing wind turbine measurements, used if no cube is given
+        cube: Cube with at least the DAILY_AGGREGATIONS, a farm-level cube of only those of df if None
+
+    Returns:
+        pd.DataFrame: Daily aggregated DataFrame with mean and std of wind speed and direction, mean
+                      temperature, sum of power output and mean of the indicator columns
+    """
+    if cube is None:
+        cube = RollupCube(DAILY_AGGREGATIONS, turbine_rollups=False).update(df)
+    start, end = (df["timestamp"].min().floor("D"), df["timestamp"].max()) if not df.empty else (None, None)
+
+    df_daily = cube.frame("day", start=start, end=end)
+    df_daily = df_daily[df_daily["num_turbines"] > 0].reset_index(drop=True)
+    df_daily["Day"] = df_daily["Day"].round().astype(np.int64)
+
+    return df_daily.rename(
+        columns={
+            "Wspd": "Wspd_mean",
+            "Wdir": "Wdir_mean",
+            "Etmp": "Etmp_mean",
+            "Patv": "Patv_sum",
+            "maintenance_day": "maintenance_day_mean",
+            "turbine_stopped": "turbine_stopped_mean",
+            "turbine_at_rest": "turbine_at_rest_mean",
+        }
+    )[
+        [
+            "Day",
+            "Wspd_mean",
+            "Wspd_std",
+            "Wdir_mean",
+            "Wdir_std",
+            "Etmp_mean",
+            "Patv_sum",
+            "maintenance_day_mean",
+            "turbine_stopped_mean",
+            "turbine_at_rest_mean",
+        ]
+    ]
@@ -0,0 +1,143 @@
+from collections.abc import Iterator
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+STEPS_PER_DAY = 144  # 10 minute steps
+
+
+class SequenceDataset:
+    """
+    (input window, target horizon) pairs of an aggregated time series, e.g. 14 days in -> 2 days out.
+
+    The features and the target are held once in contiguous arrays and every window is a strided
+    view into them, so the dataset takes no more memory than the source frame regardless of the
+    number of windows. Windows with missing values (or spanning a gap in the timestamps) are
+    filtered out through a validity index computed once with cumulative sums.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        feature_cols: list[str],
+        target_col: str,
+        input_steps: int = 14 * STEPS_PER_DAY,
+        horizon: int = 2 * STEPS_PER_DAY,
+        stride: int = 1,
+        timestamp_col: str | None = "timestamp",
+        freq: str = "10min",
+        drop_nan: bool = True,
+        dtype=np.float32,
+    ):
+        """
+        Args:
+            df: Aggregated frame ordered by time, e.g. the output of aggregate_across_turbines
+            feature_cols: Columns used as inputs
+            target_col: Column to forecast
+            input_steps: Length of the input window in 10 minute steps
+            horizon: Length of the forecast horizon in 10 minute steps
+            stride: Steps between the starts of two consecutive windows
+            timestamp_col: Column with the timestamps used to skip windows spanning gaps, None to skip the check
+            freq: Expected step between consecutive timestamps
+            drop_nan: Whether to skip windows with missing inputs or targets
+            dtype: dtype of the buffers
+        """
+        self.feature_cols = list(feature_cols)
+        self.target_col = target_col
+        self.input_steps = input_steps
+        self.horizon = horizon
+        self.stride = stride
+
+        self._features = np.ascontiguousarray(df[self.feature_cols].to_numpy(dtype=dtype, na_value=np.nan))
+        self._target = np.ascontiguousarray(df[target_col].to_numpy(dtype=dtype, na_value=np.nan))
+        self._timestamps = df[timestamp_col].to_numpy() if timestamp_col is not None else None
+        self._freq = pd.Timedelta(freq).to_timedelta64()
+
+        # Window views: inputs (n, input_steps, n_features) and targets (n, horizon), no data is copied
+        n_rows = len(df)
+        n_windows = max(n_rows - input_steps - horizon + 1, 0)
+        if n_windows:
+            self._inputs = sliding_window_view(self._features, input_steps, axis=0).transpose(0, 2, 1)
+            self._targets = sliding_window_view(self._target[input_steps:], horizon)
+        else:
+            self._inputs = np.empty((0, input_steps, len(self.feature_cols)), dtype=dtype)
+            self._targets = np.empty((0, horizon), dtype=dtype)
+        self.starts = self._valid_starts(n_windows, drop_nan)
+
+    def _valid_starts(self, n_windows: int, drop_nan: bool) -> np.ndarray:
+        """Start rows of all windows on the stride without missing values or gaps."""
+        starts = np.arange(0, n_windows, self.stride)
+        if not len(starts):
+            return starts
+
+        def window_count(bad_rows, offset, length):
+            # Number of bad rows in [start + offset, start + offset + length) for all starts
+            cumsum = np.concatenate([[0], np.cumsum(bad_rows)])
+            return cumsum[starts + offset + length] - cumsum[starts + offset]
+
+        valid = np.ones(len(starts), dtype=bool)
+        if drop_nan:
+            valid &= window_count(np.isnan(self._features).any(axis=1), 0, self.input_steps) == 0
+            valid &= window_count(np.isnan(self._target), self.input_steps, self.horizon) == 0
+        if self._timestamps is not None and len(self._timestamps) > 1:
+            # Row r is a gap if the step to row r + 1 differs from freq
+            gap = np.concatenate([np.diff(self._timestamps) != self._freq, [False]])
+            valid &= window_count(gap, 0, self.input_steps + self.horizon - 1) == 0
+
+        return starts[valid]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, i: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Window i as views into the buffers.
+
+        Returns:
+            Tuple (inputs, target) of shapes (input_steps, n_features) and (horizon,)
+        """
+        start = self.starts[i]
+        return self._inputs[start], self._targets[start]
+
+    def origins(self) -> np.ndarray:
+        """Timestamps of the first forecast step of every window."""
+        if self._timestamps is None:
+            raise ValueError("Dataset was created without timestamp_col")
+        return self._timestamps[self.starts + self.input_steps]
+
+    def batch(self, indices: np.ndarray, flatten: bool = False) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Gather the windows with the given indices into arrays (only the batch is copied).
+
+        Args:
+            indices: Window indices in [0, len(self))
+            flatten: Whether to flatten the inputs to (batch, input_steps * n_features), e.g. for XGBoost/LightGBM
+
+        Returns:
+            Tuple (inputs, targets) of shapes (batch, input_steps, n_features) and (batch, horizon)
+        """
+        starts = self.starts[indices]
+        inputs = self._inputs[starts]
+        if flatten:
+            inputs = inputs.reshape(len(starts), -1)
+        return inputs, self._targets[starts]
+
+    def iter_batches(
+        self, batch_size: int = 256, shuffle: bool = False, seed: int | None = None, flatten: bool = False
+    ) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """
+        Iterate over all windows in batches.
+
+        Args:
+            batch_size: Number of windows per batch
+            shuffle: Whether to shuffle the order of the windows (only the window indices are permuted)
+            seed: Seed of the shuffle
+            flatten: Whether to flatten the inputs, see batch()
+
+        Yields:
+            Tuples (inputs, targets) as returned by batch()
+        """
+        order = np.random.default_rng(seed).permutation(len(self)) if shuffle else np.arange(len(self))
+        for first in range(0, len(order), batch_size):
+            yield self.batch(order[first : first + batch_size], flatten=flatten)
@@ -0,0 +1,306 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def load_models(model_paths: dict[str, str | Path]) -> dict:
+    """
+    Load trained models once at startup.
+
+    Args:
+        model_paths: {model_name: path} of models saved with joblib.dump, e.g. a fitted LinearRegression or
+            XGBRegressor trained on a DataFrame of the aggregated features
+
+    Returns:
+        {model_name: model}
+    """
+    import joblib
+
+    return {name: joblib.load(path) for name, path in model_paths.items()}
+
+
+def model_features(model) -> list[str]:
+    """Feature columns a model was fitted on, in the order expected by predict."""
+    names = getattr(model, "feature_names_in_", None)
+    if names is None:
+        raise ValueError(f"{type(model).__name__} was not fitted on a DataFrame, its feature names are unknown")
+    return [str(name) for name in names]
+
+
+class LatencyStats:
+    """Request latencies (over a sliding window of the last requests) and throughput counters."""
+
+    def __init__(self, window: int = 10_000):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.n_requests = 0
+        self.n_rows = 0
+        self.n_batches = 0
+        self.n_errors = 0
+
+    def record_request(self, seconds: float, n_rows: int) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+            self.n_requests += 1
+            self.n_rows += n_rows
+
+    def record_batch(self) -> None:
+        with self._lock:
+            self.n_batches += 1
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.n_errors += 1
+
+    def snapshot(self) -> dict:
+        """Current counters, latency percentiles in milliseconds and throughput per second."""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            uptime = time.monotonic() - self.started
+            return {
+                "requests": self.n_requests,
+                "rows": self.n_rows,
+                "batches": self.n_batches,
+                "errors": self.n_errors,
+                "mean_batch_requests": self.n_requests / self.n_batches if self.n_batches else 0.0,
+                "latency_p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+                "latency_p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+                "requests_per_second": self.n_requests / uptime,
+                "rows_per_second": self.n_rows / uptime,
+                "uptime_seconds": uptime,
+            }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests into batches for a single predict call per model.
+
+    Requests are queued with a Future. A background thread takes the first waiting request, keeps
+    collecting requests until max_batch_size rows are reached or max_latency_ms have passed, then
+    runs one predict per model on the stacked rows and resolves the futures with their slices.
+    """
+
+    def __init__(self, models: dict, max_batch_size: int = 1024, max_latency_ms: float = 5.0, stats=None):
+        """
+        Args:
+            models: {model_name: fitted model}
+            max_batch_size: Maximum number of rows per batch (a single larger request forms its own batch)
+            max_latency_ms: Maximum time to wait for more requests after the first request of a batch
+            stats: LatencyStats to record the batches to, a new one if None
+        """
+        self.models = models
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.stats = LatencyStats() if stats is None else stats
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, model_name: str, features: np.ndarray) -> Future:
+        """
+        Queue rows for prediction.
+
+        Args:
+            model_name: Name of the model to use
+            features: Array of shape (n_rows, n_features) in the feature order of the model
+
+        Returns:
+            Future resolving to the predictions of shape (n_rows,)
+        """
+        if model_name not in self.models:
+            raise KeyError(f"Unknown model '{model_name}', available: {list(self.models)}")
+        future = Future()
+        self._queue.put((model_name, features, future))
+        return future
+
+    def close(self) -> None:
+        """Stop the batching thread after the queued requests."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first) -> tuple[list, bool]:
+        """Collect requests after first until the batch is full or the latency budget is used up."""
+        batch = [first]
+        n_rows = len(first[1])
+        deadline = time.monotonic() + self.max_latency
+        while n_rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            n_rows += len(item[1])
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            self._predict(batch)
+
+    def _predict(self, batch: list) -> None:
+        """One predict call per model for all requests of the batch."""
+        self.stats.record_batch()
+        by_model = {}
+        for model_name, features, future in batch:
+            by_model.setdefault(model_name, []).append((features, future))
+
+        for model_name, requests in by_model.items():
+            self._predict_requests(self.models[model_name], requests)
+
+    def _predict_requests(self, model, requests: list) -> None:
+        """Predict the (features, future) requests of one model in a single call and resolve their futures."""
+        try:
+            # One frame per batch, models fitted on a DataFrame check the feature names
+            inputs = pd.DataFrame(np.concatenate([f for f, _ in requests]), columns=model_features(model))
+            predictions = np.asarray(model.predict(inputs))
+        except Exception as error:
+            if len(requests) == 1:
+                requests[0][1].set_exception(error)
+                return
+            # A bad request (e.g. wrong shape or NaN features) must not fail the others, retry them one at a time
+            for request in requests:
+                self._predict_requests(model, [request])
+            return
+
+        splits = np.cumsum([len(features) for features, _ in requests])[:-1]
+        for (_, future), result in zip(requests, np.split(predictions, splits)):
+            future.set_result(result)
+
+
+class PredictionServer(ThreadingHTTPServer):
+    """
+    Local HTTP prediction service for farm-level Patv forecasts.
+
+    Endpoints:
+        POST /predict: {"model": name, "features": {column: [values, ...]}, "timestamp": [...] (optional)}
+            with the columns of the aggregated feature frame, returns {"model", "Patv", "timestamp"}
+        GET /metrics: latency percentiles and throughput counters, see LatencyStats.snapshot
+        GET /health: names and feature columns of the loaded models
+    """
+
+    daemon_threads = True
+
+    def __init__(self, models: dict, host: str = "127.0.0.1", port: int = 8080, **batcher_kwargs):
+        """
+        Args:
+            models: {model_name: fitted model}, e.g. the output of load_models
+            host: Host to bind to
+            port: Port to bind to, 0 for a free port
+            **batcher_kwargs: max_batch_size and max_latency_ms of the MicroBatcher
+        """
+        super().__init__((host, port), PredictionHandler)
+        self.features = {name: model_features(model) for name, model in models.items()}
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(models, stats=self.stats, **batcher_kwargs)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.batcher.close()
+
+    def predict(self, payload: dict) -> dict:
+        """Validate a /predict payload, queue it and wait for the batched predictions."""
+        model_name = payload.get("model")
+        if model_name not in self.features:
+            raise ValueError(f"Unknown model '{model_name}', available: {list(self.features)}")
+        columns = payload.get("features", {})
+        missing = [name for name in self.features[model_name] if name not in columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+
+        features = np.column_stack(
+            [np.asarray(columns[name], dtype=np.float32) for name in self.features[model_name]]
+        ).astype(np.float32, copy=False)
+        predictions = self.batcher.submit(model_name, features).result()
+
+        response = {"model": model_name, "Patv": predictions.tolist()}
+        if "timestamp" in payload:
+            response["timestamp"] = payload["timestamp"]
+        return response
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    server: PredictionServer
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path == "/metrics":
+            self._send_json(200, self.server.stats.snapshot())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok", "models": self.server.features})
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path != "/predict":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        start = time.perf_counter()
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            response = self.server.predict(payload)
+        except (ValueError, KeyError, TypeError) as error:
+            self.server.stats.record_error()
+            self._send_json(400, {"error": str(error)})
+            return
+        except Exception as error:
+            self.server.stats.record_error()
+            self._send_json(500, {"error": str(error)})
+            return
+
+        self.server.stats.record_request(time.perf_counter() - start, len(response["Patv"]))
+        self._send_json(200, response)
+
+    def log_message(self, format, *args) -> None:
+        # Per-request access logs would dominate the cost of small requests
+        pass
+
+
+def serve(config: dict) -> None:
+    """
+    Load the models of the serving config and serve predictions until interrupted.
+
+    Args:
+        config: Parsed config.yaml, uses the "serving" section
+    """
+    serving = config["serving"]
+    models = load_models(serving["models"])
+    server = PredictionServer(
+        models,
+        host=serving.get("host", "127.0.0.1"),
+        port=serving.get("port", 8080),
+        max_batch_size=serving.get("max_batch_size", 1024),
+        max_latency_ms=serving.get("max_latency_ms", 5.0),
+    )
+    print(f"Serving {list(models)} on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
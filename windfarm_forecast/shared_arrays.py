@@ -0,0 +1,46 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Arrays attached by the current worker process, key -> (block, array)
+_ATTACHED = {}
+
+
+def to_shared(array: np.ndarray) -> tuple[shared_memory.SharedMemory, tuple]:
+    """
+    Copy an array into a new shared memory block.
+
+    Args:
+        array: Array to share with the workers of a pool
+
+    Returns:
+        Tuple (block, spec) of the block, to release in the parent once the pool is done, and the spec
+        to pass to attach_shared_arrays
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def release(*blocks: shared_memory.SharedMemory) -> None:
+    """Close and remove blocks created by to_shared."""
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+def attach_shared_arrays(specs: dict) -> None:
+    """
+    Pool initializer: attach the shared arrays without copying them.
+
+    Args:
+        specs: Key -> spec returned by to_shared
+    """
+    for key, (name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        _ATTACHED[key] = (block, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf))
+
+
+def shared_array(key: str) -> np.ndarray:
+    """Array attached under key by attach_shared_arrays in this worker."""
+    return _ATTACHED[key][1]
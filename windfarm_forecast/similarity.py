@@ -0,0 +1,242 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from windfarm_forecast.feature_engineering import to_turbine_matrix
+from windfarm_forecast.instrumentation import instrument
+from windfarm_forecast.tensor_store import TensorStore
+
+
+class TurbineSimilarityIndex:
+    """
+    Pearson correlation of the power output between all pairs of turbines, maintained incrementally.
+
+    The index keeps running pairwise co-moment sums over the timestamps where both turbines of a
+    pair have a value (like DataFrame.corr), so new data can be absorbed with update() without
+    revisiting the history. Every timestamp must only be passed to update() once.
+    """
+
+    def __init__(self):
+        self.turbine_ids = np.array([], dtype=np.int64)
+        self.n_timestamps = 0
+        # Per turbine shift applied before summing to limit cancellation in the co-moments
+        self._shift = np.zeros(0)
+        # Pairwise sums: _n[i, j] counts the timestamps where i and j are both observed,
+        # _sx[i, j] and _sxx[i, j] sum x_i and x_i**2 over these timestamps, _sxy[i, j] sums x_i * x_j
+        self._n = np.zeros((0, 0))
+        self._sx = np.zeros((0, 0))
+        self._sxx = np.zeros((0, 0))
+        self._sxy = np.zeros((0, 0))
+
+    def _add_turbines(self, turbine_ids: np.ndarray, shift: np.ndarray) -> None:
+        """Extend the sums with zero rows and columns for turbines seen for the first time."""
+        new = ~np.isin(turbine_ids, self.turbine_ids)
+        if not new.any():
+            return
+
+        n_old = len(self.turbine_ids)
+        n_new = int(new.sum())
+        self.turbine_ids = np.concatenate([self.turbine_ids, turbine_ids[new]])
+        self._shift = np.concatenate([self._shift, np.nan_to_num(shift[new])])
+        for name in ["_n", "_sx", "_sxx", "_sxy"]:
+            grown = np.zeros((n_old + n_new, n_old + n_new))
+            grown[:n_old, :n_old] = getattr(self, name)
+            setattr(self, name, grown)
+
+    def update_matrix(self, matrix: np.ndarray, turbine_ids: np.ndarray) -> "TurbineSimilarityIndex":
+        """
+        Absorb a turbine x time matrix of new values into the index.
+
+        Args:
+            matrix: Array of shape (n_turbines, n_timestamps), NaN where a value is missing
+            turbine_ids: Turbine IDs of the rows of matrix
+
+        Returns:
+            The updated index
+        """
+        turbine_ids = np.asarray(turbine_ids)
+        matrix = np.asarray(matrix, dtype=np.float64)
+        observed = ~np.isnan(matrix)
+        # Mean of the observed values as shift of new turbines, NaN (then 0) for turbines without any
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self._add_turbines(turbine_ids, np.nansum(matrix, axis=1) / observed.sum(axis=1))
+
+        # Shift, then zero the missing values so that they drop out of all sums
+        positions = pd.Index(self.turbine_ids).get_indexer(turbine_ids)
+        values = np.where(observed, matrix - self._shift[positions, None], 0.0)
+        observed = observed.astype(np.float64)
+
+        # Pairwise-complete co-moments of all turbine pairs as matrix products
+        block = np.ix_(positions, positions)
+        self._n[block] += observed @ observed.T
+        self._sx[block] += values @ observed.T
+        self._sxx[block] += (values**2) @ observed.T
+        self._sxy[block] += values @ values.T
+        self.n_timestamps += matrix.shape[1]
+
+        return self
+
+    @instrument()
+    def update(
+        self,
+        df: pd.DataFrame,
+        turbine_col: str = "TurbID",
+        timestamp_col: str = "timestamp",
+        value_col: str = "Patv",
+    ) -> "TurbineSimilarityIndex":
+        """
+        Absorb new data in long format (e.g. the SCADA data of a new day) into the index.
+
+        Args:
+            df: DataFrame containing turbine data of timestamps not yet seen by the index
+            turbine_col: Name of the column containing turbine IDs
+            timestamp_col: Name of the column containing timestamps
+            value_col: Name of the column containing values to correlate
+
+        Returns:
+            The updated index
+        """
+        matrix, turbine_ids, _, _, _ = to_turbine_matrix(
+            df, value_col=value_col, turbine_col=turbine_col, timestamp_col=timestamp_col, dtype=np.float64
+        )
+        return self.update_matrix(matrix, turbine_ids)
+
+    @instrument()
+    def update_store(
+        self, store: TensorStore, variable: str = "Patv", start=None, end=None, chunk_size: int = 30 * 144
+    ) -> "TurbineSimilarityIndex":
+        """
+        Absorb a time range of a TensorStore chunk by chunk, only holding one chunk in memory.
+
+        Args:
+            store: Store with the turbine x time arrays, e.g. of the full history
+            variable: Variable of the store to correlate
+            start: First timestamp to include, from the start of the store if None
+            end: Last timestamp to include, up to the end of the store if None
+            chunk_size: Number of timestamps read from the memory mapped file at a time
+
+        Returns:
+            The updated index
+        """
+        values = store.get(variable, start, end)
+        for first in range(0, values.shape[1], chunk_size):
+            self.update_matrix(values[:, first : first + chunk_size], store.turbine_ids)
+        return self
+
+    def correlation(self) -> np.ndarray:
+        """
+        Pearson correlation matrix of all turbines, NaN for pairs with less than two common observations.
+
+        Returns:
+            Array of shape (n_turbines, n_turbines) in the order of turbine_ids
+        """
+        n = self._n
+        sx = self._sx
+        sxx = self._sxx
+        with np.errstate(invalid="ignore", divide="ignore"):
+            covariance = n * self._sxy - sx * sx.T
+            variance = n * sxx - sx**2
+            corr = covariance / np.sqrt(variance * variance.T)
+
+        corr[(n < 2) | ~np.isfinite(corr)] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    def top_similar(self, n_top: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the n_top most correlated other turbines of every turbine with one partial sort.
+
+        Args:
+            n_top: Number of similar turbines to return per turbine
+
+        Returns:
+            Tuple (similar_ids, correlations) of arrays of shape (n_turbines, n_top), sorted by
+            descending correlation. Slots without a valid correlation hold NaN.
+        """
+        n_turbines = len(self.turbine_ids)
+        n_top = min(n_top, max(n_turbines - 1, 0))
+
+        scores = self.correlation()
+        np.fill_diagonal(scores, np.nan)
+        scores = np.where(np.isnan(scores), -np.inf, scores)
+
+        # Unordered top n_top per row, then sort only these
+        top = np.argpartition(-scores, n_top - 1, axis=1)[:, :n_top] if n_top else np.zeros((n_turbines, 0), int)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        valid = np.isfinite(top_scores)
+        similar_ids = np.where(valid, self.turbine_ids[top].astype(np.float64), np.nan)
+        correlations = np.where(valid, top_scores, np.nan)
+
+        return similar_ids, correlations
+
+    def to_frame(self, n_top: int = 10) -> pd.DataFrame:
+        """
+        Top similar turbines in the long format consumed by impute_power_output.
+
+        Args:
+            n_top: Number of similar turbines per turbine
+
+        Returns:
+            DataFrame with columns [turbine_id, rank, similar_turbine_id, correlation]
+        """
+        similar_ids, correlations = self.top_similar(n_top)
+        n_turbines, k = similar_ids.shape
+
+        df = pd.DataFrame(
+            {
+                "turbine_id": np.repeat(self.turbine_ids, k),
+                "rank": np.tile(np.arange(1, k + 1), n_turbines),
+                "similar_turbine_id": similar_ids.ravel(),
+                "correlation": correlations.ravel(),
+            }
+        )
+        df = df.dropna(subset=["similar_turbine_id"])
+        df["similar_turbine_id"] = df["similar_turbine_id"].astype(self.turbine_ids.dtype)
+
+        return df.sort_values(["turbine_id", "rank"]).reset_index(drop=True)
+
+    def save(self, path: str | Path) -> None:
+        """
+        Persist the index to a .npz file.
+
+        Args:
+            path: File path to write to
+        """
+        with open(path, "wb") as file:
+            np.savez(
+                file,
+                turbine_ids=self.turbine_ids,
+                n_timestamps=self.n_timestamps,
+                shift=self._shift,
+                n=self._n,
+                sx=self._sx,
+                sxx=self._sxx,
+                sxy=self._sxy,
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "TurbineSimilarityIndex":
+        """
+        Load an index written by save().
+
+        Args:
+            path: File path to read from
+
+        Returns:
+            The loaded index
+        """
+        index = cls()
+        with np.load(path) as data:
+            index.turbine_ids = data["turbine_ids"]
+            index.n_timestamps = int(data["n_timestamps"])
+            index._shift = data["shift"]
+            index._n = data["n"]
+            index._sx = data["sx"]
+            index._sxx = data["sxx"]
+            index._sxy = data["sxy"]
+
+        return index
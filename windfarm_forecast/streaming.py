@@ -0,0 +1,141 @@
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from windfarm_forecast.ingestion import parse_timestamps
+from windfarm_forecast.instrumentation import instrument
+from windfarm_forecast.pipeline import check_impute_method, impute
+from windfarm_forecast.preprocessing import apply_rules, compile_rules
+
+
+class StreamingIngestor:
+    """
+    Clean 10 minute SCADA records as they arrive instead of re-running notebook 01 on the full data.
+
+    Every pushed batch is cleaned right away with the data quality rules of the config and its power
+    is added to running sums per day and turbine. A day is closed once records of a later day arrive
+    (or with close_day/flush): the impute_day_patv flags are finalized from the sums (as in
+    flag_impute_days) and the power of the flagged turbines is imputed for that day only.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        similar_turbines_df: pd.DataFrame,
+        n_similar: int = 10,
+        n_std: float = 3.0,
+        on_day_closed: Callable[[int, pd.DataFrame], None] | None = None,
+    ):
+        """
+        Args:
+            config: Loaded config.yaml
+            similar_turbines_df: Similar turbines used for the imputation, e.g. from TurbineSimilarityIndex.to_frame
+            n_similar: Number of similar turbines to use for imputation
+            n_std: Number of standard deviations of the lower bound of the impute flags
+            on_day_closed: Called with the day and its cleaned and imputed data whenever a day is closed
+        """
+        check_impute_method(config)
+        preprocessing_config = config["preprocessing"]
+        self.config = config
+        self.rules = compile_rules(preprocessing_config["rules"])
+        self.target_col = preprocessing_config.get("target", "Patv")
+        self.similar_turbines_df = similar_turbines_df
+        self.n_similar = n_similar
+        self.n_std = n_std
+        self.on_day_closed = on_day_closed
+        self.base_date = pd.Timestamp(config["ingestion"]["base_date"])
+
+        self.closed_days = set()
+        self._offsets = {}
+        # day -> cleaned batches, day -> sum of the power per turbine
+        self._batches = {}
+        self._sums = {}
+
+    @property
+    def open_days(self) -> list[int]:
+        return sorted(self._batches)
+
+    def _prepare(self, records) -> pd.DataFrame:
+        """Records as a DataFrame in the format of load_ingested (time and timestamp columns)."""
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+        if "timestamp" not in df.columns:
+            df = df.assign(Tmstamp=df["Tmstamp"].astype("category"))
+            df["timestamp"] = parse_timestamps(df, self.base_date, self._offsets)
+            df = df.rename(columns={"Tmstamp": "time"})
+        return df
+
+    @instrument()
+    def push(self, records: pd.DataFrame | list[dict]) -> list[pd.DataFrame]:
+        """
+        Clean new records and close the days completed by them.
+
+        Args:
+            records: Raw SCADA records with the columns of the raw csv (TurbID, Day, Tmstamp, ...) or
+                a timestamp column instead of Tmstamp, in order of arrival
+
+        Returns:
+            Cleaned and imputed data of every day closed by these records, in day order
+        """
+        df = self._prepare(records)
+        if df.empty:
+            return []
+
+        late = np.isin(df["Day"].to_numpy(), list(self.closed_days))
+        if late.any():
+            raise ValueError(f"Records of already closed days {sorted(set(df.loc[late, 'Day']))}")
+
+        df, _ = apply_rules(df, self.rules, target_col=self.target_col)
+        for day, day_df in df.groupby("Day", sort=True):
+            day = int(day)
+            self._batches.setdefault(day, []).append(day_df)
+            sums = day_df.groupby("TurbID")[self.target_col].sum()
+            self._sums[day] = self._sums[day].add(sums, fill_value=0) if day in self._sums else sums
+
+        # Records arrive in time order, so all days before the latest one are complete
+        latest = max(self._batches)
+        return [self.close_day(day) for day in self.open_days if day < latest]
+
+    def current(self, day: int | None = None) -> pd.DataFrame:
+        """
+        Cleaned records of an open day so far, for intraday forecasting. Flags and imputation follow when it closes.
+
+        Args:
+            day: Open day, the latest if None
+
+        Returns:
+            DataFrame of the cleaned records ordered by (timestamp, TurbID)
+        """
+        day = self.open_days[-1] if day is None else day
+        df = pd.concat(self._batches[day], ignore_index=True)
+        return df.sort_values(["timestamp", "TurbID"], kind="stable").reset_index(drop=True)
+
+    def close_day(self, day: int) -> pd.DataFrame:
+        """
+        Finalize the impute flags of a day and impute its power, later records of the day are rejected.
+
+        Args:
+            day: Open day to close
+
+        Returns:
+            Cleaned data of the day with the impute_day_patv and Patv_imputed columns
+        """
+        df = self.current(day)
+        del self._batches[day]
+        sums = self._sums.pop(day)
+        self.closed_days.add(day)
+
+        # Same bounds as flag_impute_days: mean - n_std * std of the daily power of all turbines of the day
+        lower_bound = sums.mean() - self.n_std * sums.std()
+        flagged = sums.index[(sums == 0) & (lower_bound > 0)]
+        df["impute_day_patv"] = df["TurbID"].isin(flagged).astype(np.int8)
+
+        df = impute(df, self.config, self.similar_turbines_df, self.n_similar)
+        if self.on_day_closed is not None:
+            self.on_day_closed(day, df)
+
+        return df
+
+    def flush(self) -> list[pd.DataFrame]:
+        """Close all open days, e.g. at the end of a replay."""
+        return [self.close_day(day) for day in self.open_days]
@@ -0,0 +1,199 @@
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from windfarm_forecast.instrumentation import instrument
+from windfarm_forecast.shared_arrays import attach_shared_arrays, release, shared_array, to_shared
+
+
+def build_model(model_name: str, params: dict, n_threads: int = 1):
+    """
+    Create an unfitted model. xgboost and lightgbm are only imported when they are used.
+
+    Args:
+        model_name: One of "linear_regression", "xgboost" and "lightgbm"
+        params: Hyperparameters passed to the model
+        n_threads: Threads per model for xgboost and lightgbm, unless set in params
+
+    Returns:
+        sklearn compatible regressor
+    """
+    if model_name == "linear_regression":
+        from sklearn.linear_model import LinearRegression
+
+        return LinearRegression(**params)
+    if model_name == "xgboost":
+        from xgboost import XGBRegressor
+
+        return XGBRegressor(**{"n_jobs": n_threads, **params})
+    if model_name == "lightgbm":
+        from lightgbm import LGBMRegressor
+
+        return LGBMRegressor(**{"n_jobs": n_threads, "verbose": -1, **params})
+
+    raise ValueError(f"Unknown model '{model_name}', expected one of linear_regression, xgboost, lightgbm")
+
+
+def expand_grid(grid: dict) -> list[tuple[str, dict]]:
+    """
+    Expand a grid of model configs into single configs.
+
+    Args:
+        grid: {model_name: {param: [values, ...]}}, e.g. {"xgboost": {"max_depth": [3, 6], "n_estimators": [200]}}
+
+    Returns:
+        List of (model_name, params) for every combination of values
+    """
+    configs = []
+    for model_name, param_grid in grid.items():
+        names = list(param_grid)
+        for values in itertools.product(*(param_grid[name] for name in names)):
+            configs.append((model_name, dict(zip(names, values))))
+    return configs
+
+
+def time_series_folds(n_rows: int, n_folds: int = 5, test_size: int | None = None) -> list[tuple[int, int, int, int]]:
+    """
+    Expanding time-based folds: every fold trains on all rows before its test block.
+
+    Args:
+        n_rows: Number of rows, ordered by time
+        n_folds: Number of folds
+        test_size: Rows per test block, n_rows // (n_folds + 1) if None
+
+    Returns:
+        List of (train_start, train_end, test_start, test_end) row ranges
+    """
+    test_size = n_rows // (n_folds + 1) if test_size is None else test_size
+    first_test = n_rows - n_folds * test_size
+    if test_size <= 0 or first_test <= 0:
+        raise ValueError(f"Not enough rows ({n_rows}) for {n_folds} folds with test_size {test_size}")
+
+    return [
+        (0, first_test + i * test_size, first_test + i * test_size, first_test + (i + 1) * test_size)
+        for i in range(n_folds)
+    ]
+
+
+def _run_task(model_name: str, params: dict, fold: tuple[int, int, int, int], n_threads: int) -> dict:
+    """Fit and evaluate one model config on one fold of the shared feature matrix."""
+    X = shared_array("X")
+    y = shared_array("y")
+    train_start, train_end, test_start, test_end = fold
+    X_train, y_train = X[train_start:train_end], y[train_start:train_end]
+    X_test, y_test = X[test_start:test_end], y[test_start:test_end]
+    if model_name == "linear_regression":
+        # Unlike xgboost and lightgbm it cannot handle missing features, drop these rows like cli.train
+        train_rows = ~np.isnan(X_train).any(axis=1)
+        X_train, y_train = X_train[train_rows], y_train[train_rows]
+    # Every model is scored on the same rows, those linear regression can predict
+    test_rows = ~np.isnan(X_test).any(axis=1)
+    X_test, y_test = X_test[test_rows], y_test[test_rows]
+
+    model = build_model(model_name, params, n_threads)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    errors = model.predict(X_test) - y_test
+    return {
+        "mae": float(np.mean(np.abs(errors))),
+        "rmse": float(np.sqrt(np.mean(errors**2))),
+        "n_test": int(test_rows.sum()),
+        "fit_seconds": fit_seconds,
+    }
+
+
+def _log_runs(results: pd.DataFrame, experiment_name: str, feature_cols: list[str]) -> None:
+    """Log one MLflow run per model config with the fold metrics as steps, from the coordinator only."""
+    import mlflow
+
+    from windfarm_forecast.utils import setup_mlflow
+
+    setup_mlflow(experiment_name)
+    for (config_id, model_name), runs in results.groupby(["config_id", "model"], sort=False):
+        with mlflow.start_run(run_name=f"sweep_{model_name}_{config_id}"):
+            mlflow.log_param("model", model_name)
+            mlflow.log_params(runs["params"].iloc[0])
+            mlflow.log_param("features", ",".join(feature_cols))
+            for row in runs.itertuples():
+                mlflow.log_metrics({"fold_mae": row.mae, "fold_rmse": row.rmse}, step=row.fold)
+            mlflow.log_metrics({"mae": runs["mae"].mean(), "rmse": runs["rmse"].mean()})
+
+
+@instrument()
+def run_sweep(
+    df: pd.DataFrame,
+    feature_cols: list[str],
+    target_col: str,
+    grid: dict,
+    n_folds: int = 5,
+    max_workers: int | None = None,
+    n_threads: int = 1,
+    log_to_mlflow: bool = True,
+    experiment_name: str = "windfarm_power_prediction",
+) -> pd.DataFrame:
+    """
+    Evaluate a grid of model configs on time-based folds across a process pool.
+
+    The feature matrix and the target are copied once into shared memory and attached by every worker,
+    instead of being pickled with every task. Finished runs are collected by the calling process,
+    which is the only one logging to the local MLflow store.
+
+    Args:
+        df: Frame ordered by time, e.g. the aggregated training data
+        feature_cols: Columns used as features
+        target_col: Column to predict
+        grid: Model configs, see expand_grid
+        n_folds: Number of expanding time-based folds
+        max_workers: Size of the process pool, number of cpus if None
+        n_threads: Threads per model for xgboost and lightgbm
+        log_to_mlflow: Whether to log one run per config to MLflow
+        experiment_name: Name of the MLflow experiment
+
+    Returns:
+        DataFrame with one row per (config, fold) and the columns config_id, model, params, fold, mae,
+        rmse, n_test (number of scored rows, the rows of the test block without missing features, the
+        same for all models) and fit_seconds
+    """
+    configs = expand_grid(grid)
+
+    # Rows without target can neither be trained nor evaluated on
+    y = df[target_col].to_numpy(dtype=np.float32, na_value=np.nan)
+    has_target = ~np.isnan(y)
+    X = df[feature_cols].to_numpy(dtype=np.float32, na_value=np.nan)[has_target]
+    folds = time_series_folds(len(X), n_folds)
+
+    X_block, X_spec = to_shared(np.ascontiguousarray(X))
+    y_block, y_spec = to_shared(y[has_target])
+    del X, y
+
+    rows = []
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count(),
+            initializer=attach_shared_arrays,
+            initargs=({"X": X_spec, "y": y_spec},),
+        ) as pool:
+            futures = {
+                pool.submit(_run_task, model_name, params, fold, n_threads): (config_id, model_name, params, i)
+                for config_id, (model_name, params) in enumerate(configs)
+                for i, fold in enumerate(folds)
+            }
+            for future in as_completed(futures):
+                config_id, model_name, params, fold = futures[future]
+                rows.append(
+                    {"config_id": config_id, "model": model_name, "params": params, "fold": fold, **future.result()}
+                )
+    finally:
+        release(X_block, y_block)
+
+    results = pd.DataFrame(rows).sort_values(["config_id", "fold"]).reset_index(drop=True)
+    if log_to_mlflow:
+        _log_runs(results, experiment_name, feature_cols)
+
+    return results
@@ -0,0 +1,180 @@
+from collections.abc import Iterator
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+STEPS_PER_DAY = 144  # 10 minute steps
+TMSTAMPS = [f"{hour:02d}:{minute:02d}" for hour in range(24) for minute in range(0, 60, 10)]
+
+# Power curve of the SDWPF turbines (kW, m/s)
+RATED_POWER = 1550.0
+CUT_IN_SPEED = 3.0
+RATED_SPEED = 12.0
+
+# Day on which all turbines are down for maintenance in the real data (see the maintenance_day rule)
+MAINTENANCE_DAY = 66
+
+
+def _farm_wind(n_days: int, seed: int) -> np.ndarray:
+    """Farm-wide wind speed of every timestamp: a slowly varying AR(1) process with a daily cycle."""
+    rng = np.random.default_rng([seed, 0])
+    n = n_days * STEPS_PER_DAY
+    # AR(1) with a correlation length of about a day
+    level = lfilter([1.0], [1.0, -0.995], rng.normal(0.0, 0.08, n))
+
+    daily_cycle = 0.8 * np.sin(2 * np.pi * (np.arange(n) % STEPS_PER_DAY) / STEPS_PER_DAY)
+    return np.clip(6.0 * np.exp(0.35 * level) + daily_cycle, 0.0, None)
+
+
+def power_curve(wind_speed: np.ndarray) -> np.ndarray:
+    """Active power (kW) of a turbine at the given wind speed."""
+    relative = np.clip((wind_speed - CUT_IN_SPEED) / (RATED_SPEED - CUT_IN_SPEED), 0.0, 1.0)
+    return RATED_POWER * relative**3
+
+
+def iter_sdwpf_days(
+    n_turbines: int = 134,
+    n_days: int = 245,
+    seed: int = 0,
+    missing_rate: float = 0.01,
+    stopped_rate: float = 0.02,
+    outage_rate: float = 0.005,
+    days_per_chunk: int = 1,
+) -> Iterator[pd.DataFrame]:
+    """
+    Generate synthetic SCADA data in the raw SDWPF schema, in chunks of whole days.
+
+    The output is deterministic for a given seed and does not depend on days_per_chunk. Besides a
+    realistic power curve it contains the patterns handled by the preprocessing rules: missing
+    blocks of all measurements, a maintenance day with no data, turbines stopped despite wind
+    (Patv 0) for a few hours or whole days, turbines at rest (blade angles > 89), slightly
+    negative power at low wind and rare abnormal Ndir/Wdir values.
+
+    Args:
+        n_turbines: Number of turbines (134 in SDWPF)
+        n_days: Number of days (245 in the KDD Cup data, 730 for two years)
+        seed: Random seed
+        missing_rate: Probability per turbine and day of a block of a few hours without data
+        stopped_rate: Probability per turbine and day of a stop of a few hours despite wind
+        outage_rate: Probability per turbine and day of a stop of the whole day
+        days_per_chunk: Number of days per yielded DataFrame
+
+    Yields:
+        DataFrames with the columns TurbID, Day, Tmstamp, Wspd, Wdir, Etmp, Itmp, Ndir, Pab1, Pab2,
+        Pab3, Prtv, Patv, sorted by Day, Tmstamp and TurbID
+    """
+    farm_wind = _farm_wind(n_days, seed)
+    turbine_rng = np.random.default_rng([seed, 1])
+    # Static differences between turbines: exposure to the wind and nacelle orientation offset
+    exposure = turbine_rng.normal(1.0, 0.08, n_turbines)
+    ndir_offset = turbine_rng.uniform(-180.0, 180.0, n_turbines)
+    tmstamp = pd.Categorical.from_codes(np.repeat(np.arange(STEPS_PER_DAY), n_turbines), categories=TMSTAMPS)
+
+    for first_day in range(1, n_days + 1, days_per_chunk):
+        days = range(first_day, min(first_day + days_per_chunk, n_days + 1))
+        chunks = [
+            _generate_day(day, farm_wind, exposure, ndir_offset, seed, missing_rate, stopped_rate, outage_rate)
+            for day in days
+        ]
+        for chunk in chunks:
+            chunk.insert(2, "Tmstamp", tmstamp)
+        yield pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def _generate_day(
+    day: int,
+    farm_wind: np.ndarray,
+    exposure: np.ndarray,
+    ndir_offset: np.ndarray,
+    seed: int,
+    missing_rate: float,
+    stopped_rate: float,
+    outage_rate: float,
+) -> pd.DataFrame:
+    """Generate the (timestamp, turbine) rows of one day, seeded by the day only."""
+    rng = np.random.default_rng([seed, 2, day])
+    n_turbines = len(exposure)
+    shape = (STEPS_PER_DAY, n_turbines)
+    steps = np.arange(STEPS_PER_DAY)[:, None]
+
+    wind = farm_wind[(day - 1) * STEPS_PER_DAY : day * STEPS_PER_DAY, None]
+    wspd = np.clip(wind * exposure + rng.normal(0.0, 0.4, shape), 0.0, None)
+    wdir = rng.normal(0.0, 12.0, shape)
+    etmp = 15.0 + 8.0 * np.sin(2 * np.pi * (day / 365.0 + (steps - 54) / STEPS_PER_DAY)) + rng.normal(0, 0.5, shape)
+    itmp = etmp + 10.0 + rng.normal(0.0, 1.0, shape)
+    ndir = ndir_offset + 30.0 * np.sin(2 * np.pi * (day + steps / STEPS_PER_DAY) / 7.0) + rng.normal(0.0, 2.0, shape)
+    pab = np.where(wspd < CUT_IN_SPEED, 1.0, 0.0) + rng.uniform(0.0, 0.5, shape)
+
+    patv = power_curve(wspd) * rng.normal(1.0, 0.03, shape)
+    # Small negative readings when the turbine consumes power at low wind
+    patv = np.where(wspd < CUT_IN_SPEED, -rng.uniform(0.0, 0.5, shape), patv)
+
+    def blocks(rate):
+        # Blocks of 2-8 hours starting at random hours, per turbine
+        starts = rng.random((24, n_turbines)) < rate / 24
+        mask = np.zeros(shape, dtype=bool)
+        for hour, turbine in zip(*np.nonzero(starts)):
+            mask[hour * 6 : hour * 6 + 6 * rng.integers(2, 9), turbine] = True
+        return mask
+
+    # Stopped: no power despite wind, at rest: blades turned out of the wind
+    stopped = blocks(stopped_rate) | (rng.random(n_turbines) < outage_rate)
+    at_rest = blocks(stopped_rate / 2)
+    patv = np.where(stopped, 0.0, patv)
+    pab = np.where(at_rest, rng.uniform(89.5, 92.0, shape), pab)
+    patv = np.where(at_rest, -rng.uniform(0.0, 0.5, shape), patv)
+    prtv = 0.1 * patv + rng.normal(0.0, 5.0, shape)
+
+    # Rare sensor errors
+    ndir = np.where(rng.random(shape) < 1e-4, ndir + 1000.0, ndir)
+    wdir = np.where(rng.random(shape) < 1e-4, wdir + 360.0, wdir)
+
+    missing = blocks(missing_rate) | (day == MAINTENANCE_DAY)
+    values = {"Wspd": wspd, "Wdir": wdir, "Etmp": etmp, "Itmp": itmp, "Ndir": ndir}
+    values |= {"Pab1": pab, "Pab2": pab, "Pab3": pab, "Prtv": prtv, "Patv": patv}
+
+    df = pd.DataFrame(
+        {
+            "TurbID": np.tile(np.arange(1, n_turbines + 1, dtype=np.int16), STEPS_PER_DAY),
+            "Day": np.full(STEPS_PER_DAY * n_turbines, day, dtype=np.int16),
+        }
+    )
+    for col, value in values.items():
+        df[col] = np.where(missing, np.nan, np.broadcast_to(value, shape)).astype(np.float32).ravel()
+    return df
+
+
+def generate_sdwpf(
+    n_turbines: int = 134,
+    n_days: int = 245,
+    seed: int = 0,
+    missing_rate: float = 0.01,
+    stopped_rate: float = 0.02,
+    outage_rate: float = 0.005,
+    base_date: str | None = None,
+) -> pd.DataFrame:
+    """
+    Generate a synthetic SDWPF dataset, see iter_sdwpf_days.
+
+    Args:
+        n_turbines: Number of turbines
+        n_days: Number of days
+        seed: Random seed
+        missing_rate: Rate of missing blocks
+        stopped_rate: Rate of stops despite wind
+        outage_rate: Rate of whole days without power
+        base_date: If given, add a timestamp column with Day 1 at this date (as derived in the preprocessing)
+
+    Returns:
+        DataFrame in the raw SDWPF schema with the compact dtypes of the ingestion
+    """
+    df = pd.concat(
+        iter_sdwpf_days(n_turbines, n_days, seed, missing_rate, stopped_rate, outage_rate, days_per_chunk=30),
+        ignore_index=True,
+    )
+    if base_date is not None:
+        day_offset = (df["Day"].to_numpy(dtype=np.int64) - 1) * np.timedelta64(1, "D")
+        step_offset = df["Tmstamp"].cat.codes.to_numpy().astype(np.int64) * np.timedelta64(10, "m")
+        df["timestamp"] = np.datetime64(pd.Timestamp(base_date), "ns") + day_offset + step_offset
+    return df
@@ -0,0 +1,202 @@
+import json
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+META_FILE = "meta.json"
+
+
+def _write_meta(path: Path, meta: dict) -> None:
+    """Replace the header atomically, so concurrent readers see either the old or the new one."""
+    tmp_path = path / f"{META_FILE}.{uuid.uuid4().hex}"
+    with open(tmp_path, "w") as file:
+        json.dump(meta, file)
+    os.replace(tmp_path, path / META_FILE)
+
+
+class TensorStore:
+    """
+    On-disk store of aligned turbine x time arrays, one file per variable, read through memory mapping.
+
+    Every variable is a float32 array on a regular time grid (missing values are NaN), stored
+    time-major so that new timestamps can be appended to the end of the files. A small json header
+    holds the turbine IDs and the time grid. Readers only map the files, so several processes can
+    slice the same data without each holding a copy in RAM.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path / META_FILE, "r") as file:
+            self.meta = json.load(file)
+
+        self.turbine_ids = np.asarray(self.meta["turbine_ids"])
+        self.variables = list(self.meta["variables"])
+        self.freq = pd.Timedelta(self.meta["freq"])
+        self.start = pd.Timestamp(self.meta["start"])
+        self.n_timestamps = self.meta["n_timestamps"]
+
+    @property
+    def timestamps(self) -> pd.DatetimeIndex:
+        """Timestamps of the time axis."""
+        return pd.date_range(self.start, periods=self.n_timestamps, freq=self.freq)
+
+    @classmethod
+    def create(
+        cls,
+        path: str | Path,
+        df: pd.DataFrame,
+        variables: list[str],
+        freq: str = "10min",
+        turbine_col: str = "TurbID",
+        timestamp_col: str = "timestamp",
+    ) -> "TensorStore":
+        """
+        Create a new store from a DataFrame in long format.
+
+        Args:
+            path: Directory of the store, must not exist yet
+            df: DataFrame with one row per (timestamp, turbine)
+            variables: Columns to store, e.g. ["Patv", "Wspd", "turbine_stopped"]
+            freq: Frequency of the time grid
+            turbine_col: Name of the column containing turbine IDs
+            timestamp_col: Name of the column containing timestamps
+
+        Returns:
+            The opened store
+        """
+        path = Path(path)
+        path.mkdir(parents=True)
+
+        meta = {
+            "turbine_ids": np.sort(df[turbine_col].unique()).tolist(),
+            "variables": {variable: "float32" for variable in variables},
+            "freq": freq,
+            "start": df[timestamp_col].min().isoformat(),
+            "n_timestamps": 0,
+            "turbine_col": turbine_col,
+            "timestamp_col": timestamp_col,
+        }
+        _write_meta(path, meta)
+        for variable in variables:
+            (path / f"{variable}.bin").touch()
+
+        store = cls(path)
+        store.append(df)
+        return store
+
+    def _file(self, variable: str) -> Path:
+        if variable not in self.variables:
+            raise KeyError(f"Variable '{variable}' not in store, available: {self.variables}")
+        return self.path / f"{variable}.bin"
+
+    def append(self, df: pd.DataFrame) -> None:
+        """
+        Append the data of new timestamps (e.g. new days) to all variables of the store.
+
+        Args:
+            df: DataFrame in long format with timestamps after the end of the store
+        """
+        turbine_col = self.meta["turbine_col"]
+        timestamp_col = self.meta["timestamp_col"]
+        if df.empty:
+            return
+
+        # Position of every row on the grid, relative to the current end of the store
+        offsets = (df[timestamp_col] - self.start).to_numpy() / self.freq.to_timedelta64()
+        if not np.all(offsets == np.round(offsets)):
+            raise ValueError(f"Timestamps are not on the {self.meta['freq']} grid starting at {self.start}")
+        time_pos = offsets.astype(np.int64) - self.n_timestamps
+        if time_pos.min() < 0:
+            raise ValueError(f"Can only append timestamps after the end of the store ({self.timestamps[-1]})")
+
+        turbine_pos = pd.Index(self.turbine_ids).get_indexer(df[turbine_col])
+        if (turbine_pos < 0).any():
+            raise ValueError(f"Unknown turbines: {sorted(set(df.loc[turbine_pos < 0, turbine_col]))}")
+
+        # Scatter each variable into a block of new rows and append it to the end of its file
+        n_new = int(time_pos.max()) + 1
+        for variable in self.variables:
+            block = np.full((n_new, len(self.turbine_ids)), np.nan, dtype=np.float32)
+            block[time_pos, turbine_pos] = df[variable].to_numpy(dtype=np.float32, na_value=np.nan)
+            with open(self._file(variable), "ab") as file:
+                block.tofile(file)
+
+        # Update the header last, readers never see a header pointing past the end of the data
+        self.n_timestamps += n_new
+        self.meta["n_timestamps"] = self.n_timestamps
+        _write_meta(self.path, self.meta)
+
+    def array(self, variable: str) -> np.ndarray:
+        """
+        Memory mapped turbine x time array of a variable (read only, nothing is loaded yet).
+
+        Args:
+            variable: Name of the variable
+
+        Returns:
+            Array of shape (n_turbines, n_timestamps)
+        """
+        shape = (self.n_timestamps, len(self.turbine_ids))
+        if self.n_timestamps == 0:
+            return np.zeros(shape[::-1], dtype=np.float32)
+        return np.memmap(self._file(variable), dtype=np.float32, mode="r", shape=shape).T
+
+    def _time_slice(self, start=None, end=None) -> slice:
+        """Positions of the timestamps with start <= timestamp <= end."""
+        first = 0 if start is None else self.timestamps.searchsorted(pd.Timestamp(start), side="left")
+        last = self.n_timestamps if end is None else self.timestamps.searchsorted(pd.Timestamp(end), side="right")
+        return slice(first, last)
+
+    def get(self, variable: str, start=None, end=None, turbines=None) -> np.ndarray:
+        """
+        Slice a variable by time range and turbines, only reading the selected part from disk.
+
+        Args:
+            variable: Name of the variable
+            start: First timestamp to include, from the start of the store if None
+            end: Last timestamp to include, up to the end of the store if None
+            turbines: Turbine IDs to select, all turbines if None
+
+        Returns:
+            Array of shape (n_selected_turbines, n_selected_timestamps)
+        """
+        data = self.array(variable)[:, self._time_slice(start, end)]
+        if turbines is None:
+            return data
+
+        positions = pd.Index(self.turbine_ids).get_indexer(turbines)
+        if (positions < 0).any():
+            raise KeyError(f"Unknown turbines: {[t for t, p in zip(turbines, positions) if p < 0]}")
+        return data[positions]
+
+    def to_frame(self, variables: list[str] | None = None, start=None, end=None, turbines=None) -> pd.DataFrame:
+        """
+        Load a selection of the store as a DataFrame in long format.
+
+        Args:
+            variables: Variables to load, all variables if None
+            start: First timestamp to include
+            end: Last timestamp to include
+            turbines: Turbine IDs to select, all turbines if None
+
+        Returns:
+            DataFrame with one row per (timestamp, turbine), sorted by timestamp and turbine
+        """
+        variables = self.variables if variables is None else variables
+        timestamps = self.timestamps[self._time_slice(start, end)]
+        turbine_ids = self.turbine_ids if turbines is None else np.asarray(turbines)
+
+        df = pd.DataFrame(
+            {
+                self.meta["timestamp_col"]: np.repeat(timestamps, len(turbine_ids)),
+                self.meta["turbine_col"]: np.tile(turbine_ids, len(timestamps)),
+            }
+        )
+        for variable in variables:
+            # Time-major ravel gives the (timestamp, turbine) order of the rows
+            df[variable] = self.get(variable, start, end, turbines).T.ravel()
+
+        return df
@@ -1,9 +1,7 @@
 from pathlib import Path
 
-import mlflow
 import numpy as np
 import pandas as pd
-import plotly.express as px
 
 
 def setup_mlflow(experiment_name="windfarm_power_prediction"):
@@ -15,6 +13,8 @@ def setup_mlflow(experiment_name="windfarm_power_prediction"):
     Returns:
         str: ID of the created or existing experiment
     """
+    import mlflow
+
     # Set MLflow tracking URI to use a local directory at project root
     project_root = Path(__file__).parent.parent
     mlflow.set_tracking_uri(f"file:{project_root}/mlruns")
@@ -44,6 +44,8 @@ def plot_predictions(y_true: pd.Series, y_pred: np.ndarray | list, title: str =
     Returns:
         None.
     """
+    import plotly.express as px
+
     plot_df = pd.concat(
         [
             pd.DataFrame({"Time": y_true.index, "Power Output (kW)": y_true.values, "Type": "Actual"}),